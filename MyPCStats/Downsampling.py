@@ -0,0 +1,41 @@
+import numpy as np
+
+# Returns the indexes of the points kept by Largest-Triangle-Three-Buckets downsampling to at most
+# threshold points. The first and last points are always kept. The points in between are split into
+# threshold - 2 buckets, and each bucket keeps the point that makes the largest triangle with the point
+# kept before it and the average of the next bucket, so peaks and dips survive. The buckets are picked
+# one after another, but the work inside each bucket is done by NumPy
+def getLTTBIndices(x, y, threshold):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    pointCount = len(x)
+    if threshold >= pointCount or threshold < 3:
+        return np.arange(pointCount)
+
+    # Bucket i holds the points from edges[i] up to (not including) edges[i + 1]
+    bucketSize = (pointCount - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * bucketSize).astype(int) + 1
+    edges[-1] = pointCount - 1
+    lengths = np.diff(edges)
+    averageX = np.add.reduceat(x[:-1], edges[:-1]) / lengths
+    averageY = np.add.reduceat(y[:-1], edges[:-1]) / lengths
+
+    # The triangle of the last bucket uses the last point instead of a next average
+    nextX = np.append(averageX[1:], x[-1])
+    nextY = np.append(averageY[1:], y[-1])
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = pointCount - 1
+    kept = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        areas = np.abs((x[kept] - nextX[bucket]) * (y[start:end] - y[kept]) - (x[kept] - x[start:end]) * (nextY[bucket] - y[kept]))
+        kept = start + int(np.argmax(areas))
+        indices[bucket + 1] = kept
+    return indices
+
+# Downsamples a series to at most threshold points with LTTB, returning the kept x and y values
+def downsampleLTTB(x, y, threshold):
+    indices = getLTTBIndices(x, y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
@@ -0,0 +1,52 @@
+import numpy as np
+import mmap
+from EventJournal import HEADER, RECORD, JOURNAL_MAGIC, getSegments
+
+# NumPy layout of an event journal record (see EventJournal.RECORD)
+RECORD_DTYPE = np.dtype({
+    'names': ['time', 'inputID', 'eventTypeID', 'positionX', 'positionY', 'duration'],
+    'formats': ['<i8', '<u4', 'u1', '<i4', '<i4', '<f8'],
+    'offsets': [0, 8, 12, 16, 20, 24],
+    'itemsize': RECORD.size
+})
+
+# Returns the minute (time / 60000) of every record of a mapped segment that matches the filter. The
+# records are read in place from the map, only the matching minutes are copied out
+def getSegmentMinutes(journalMap, eventTypeID, inputIDs):
+    magic, version, recordSize, recordCount = HEADER.unpack_from(journalMap)
+    if magic != JOURNAL_MAGIC or recordSize != RECORD.size:
+        return np.empty(0, dtype=np.int64)
+    records = np.frombuffer(journalMap, RECORD_DTYPE, recordCount, HEADER.size)
+    matches = records['eventTypeID'] == eventTypeID
+    if inputIDs is not None:
+        matches &= np.isin(records['inputID'], inputIDs)
+    return records['time'][matches] // 60000
+
+# Counts the journal events per minute from startMinute on that are not in the events table yet, being
+# in the open segment or in closed segments the collector has not compacted
+def countJournalMinutes(conn, directory, eventTypeID, inputIDs, startMinute):
+    segments = getSegments(directory)
+    if not segments:
+        return {}
+    cursor = conn.cursor()
+    cursor.execute('SELECT sequence FROM journalSegments WHERE sequence >= ?', (segments[0][0],))
+    compacted = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+
+    minuteCounts = {}
+    for sequence, path in segments:
+        if sequence in compacted:
+            continue
+        # The segment can be compacted and deleted at any point, or still be empty
+        try:
+            with open(path, 'rb') as file:
+                journalMap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            continue
+        minutes = getSegmentMinutes(journalMap, eventTypeID, inputIDs)
+        journalMap.close()
+
+        minutes, counts = np.unique(minutes[minutes >= startMinute], return_counts=True)
+        for minute, count in zip(minutes.tolist(), counts.tolist()):
+            minuteCounts[minute] = minuteCounts.get(minute, 0) + count
+    return minuteCounts
@@ -0,0 +1,45 @@
+import numpy as np
+from KeyTransitions import SIZE, ALL_KEYS, KEY_FINGERS
+
+# Finger of every key of the matrix, -1 for keys without a QWERTY finger
+FINGERS = np.array([KEY_FINGERS.get(key, -1) for key in ALL_KEYS])
+
+# Sequences counted by getLayoutStats: both keys have a finger. Of those, the ones typed with alternating
+# hands (fingers 0-3 are the left hand) and the ones typed with the same finger on two different keys
+HAS_FINGERS = (FINGERS[:, None] >= 0) & (FINGERS[None, :] >= 0)
+ALTERNATING = HAS_FINGERS & ((FINGERS[:, None] < 4) != (FINGERS[None, :] < 4))
+SAME_FINGER = HAS_FINGERS & (FINGERS[:, None] == FINGERS[None, :]) & ~np.eye(SIZE, dtype=bool)
+
+# Sums the daily snapshots from startDay to endDay (inclusive, 'YYYY-mm-dd') into one SIZE x SIZE matrix,
+# indexed [from, to]. Snapshots of the current size are summed in one step, older ones saved with fewer
+# keys are added into the top left corner
+def getKeyTransitions(conn, startDay, endDay):
+    cursor = conn.cursor()
+    cursor.execute('SELECT counts FROM keyTransitions WHERE day BETWEEN ? AND ?', (startDay, endDay))
+    blobs = [counts for counts, in cursor.fetchall()]
+    cursor.close()
+
+    total = np.zeros((SIZE, SIZE), dtype=np.int64)
+    currentBlobs = [blob for blob in blobs if len(blob) == 4 * SIZE * SIZE]
+    if currentBlobs:
+        total += np.frombuffer(b''.join(currentBlobs), dtype=np.uint32).reshape(-1, SIZE, SIZE).sum(axis=0, dtype=np.int64)
+    for blob in blobs:
+        if len(blob) != 4 * SIZE * SIZE:
+            savedSize = int((len(blob) // 4) ** 0.5)
+            total[:savedSize, :savedSize] += np.frombuffer(blob, dtype=np.uint32).reshape(savedSize, savedSize)
+    return total
+
+# Returns the most common (fromKey, toKey, count) sequences of a matrix
+def getTopSequences(matrix, amount):
+    counts = matrix.ravel()
+    indices = np.flatnonzero(counts)
+    top = indices[np.lexsort((indices, counts[indices]))][::-1][:amount]
+    return [(ALL_KEYS[i // SIZE], ALL_KEYS[i % SIZE], int(counts[i])) for i in top]
+
+# Returns the percentage of sequences typed with alternating hands and with the same finger on two
+# different keys, counting only the keys that have a QWERTY finger
+def getLayoutStats(matrix):
+    total = matrix[HAS_FINGERS].sum()
+    if not total:
+        return 0, 0
+    return float(matrix[ALTERNATING].sum() / total * 100), float(matrix[SAME_FINGER].sum() / total * 100)
@@ -0,0 +1,128 @@
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtGui import QColor, QPainter, QFont
+from PySide6.QtCore import Qt, QRectF
+import math
+
+# Size of a normal key and the gap between keys, in the units the layouts are drawn in
+KEY_SIZE = 45
+KEY_GAP = 5
+
+# Rows of (input name, text on the key, width) for each keyboard layout. Input names are the ones stored
+# by the collector, so a layout only moves where each character is drawn. Both shift keys show the
+# count of 'shift'
+def getRows(firstRow, secondRow, thirdRow, fourthRow):
+    return [
+        [('esc', 'Esc', 52)] + [(key, key.upper(), KEY_SIZE) for key in firstRow] + [('backspace', 'Backspace', 138)],
+        [('tab', 'Tab', 87)] + [(key, key.upper(), KEY_SIZE) for key in secondRow] + [('\\', '\\', 103)],
+        [('capslock', 'Caps', 96)] + [(key, key.upper(), KEY_SIZE) for key in thirdRow] + [('enter', 'Enter', 143)],
+        [('shift', 'Shift', 121)] + [(key, key.upper(), KEY_SIZE) for key in fourthRow] + [('shift', 'Shift', 168)],
+        [('ctrl', 'Ctrl', 60), ('win', 'Win', 60), ('alt', 'Alt', 60), ('space', '', 399),
+         ('left', '←', KEY_SIZE), ('up', '↑', KEY_SIZE), ('down', '↓', KEY_SIZE), ('right', '→', KEY_SIZE)],
+    ]
+
+KEYBOARD_LAYOUTS = {
+    'QWERTY': getRows('1234567890-=', 'qwertyuiop[]', "asdfghjkl;'", 'zxcvbnm,./'),
+    'Dvorak': getRows('1234567890[]', "',.pyfgcrl/=", 'aoeuidhtns-', ';qjkxbmwvz'),
+    'Colemak': getRows('1234567890-=', 'qwfpgjluy;[]', "arstdhneio'", 'zxcvbkm,./'),
+}
+
+# Returns the color of a key in a color scheme, for an intensity from 0 (least used) to 1 (most used)
+def getHeatmapColor(scheme, intensity):
+    color = QColor()
+    if scheme == 'greenToRedScheme':
+        color.setHsvF(0.33 - 0.33 * intensity, 1, 1)  # Green to Red
+    elif scheme == 'greenScheme':
+        hue = 0.40 - 0.10 * intensity  # Adjust hue for the desired range
+        saturation = 1  # Adjust saturation for the desired range
+        value = 0.3 + 0.7 * intensity  # Adjust value for the desired range
+        color.setHsvF(hue, saturation, value)
+    color.setAlphaF(0.85)
+    return color
+
+# Keyboard heatmap painted in one widget. setCounts() works out the color of every key, and the
+# widget is only repainted when one of those colors changes
+class KeyboardHeatmapWidget(QWidget):
+    def __init__(self, parent=None):
+        super(KeyboardHeatmapWidget, self).__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.colorScheme = 'greenToRedScheme'
+        self.roundedCorners = True
+        self.showLetters = True
+        self.keyCounts = {}
+        self.keyColors = {}
+        self.setKeyboardLayout('QWERTY')
+
+    # Places the keys of a layout from KEYBOARD_LAYOUTS
+    def setKeyboardLayout(self, layoutName):
+        self.keys = []
+        for rowIndex, row in enumerate(KEYBOARD_LAYOUTS[layoutName]):
+            x = 0
+            for inputName, text, width in row:
+                self.keys.append((inputName, text, QRectF(x, rowIndex * (KEY_SIZE + KEY_GAP), width, KEY_SIZE)))
+                x += width + KEY_GAP
+        self.layoutWidth = max(key[2].right() for key in self.keys)
+        self.layoutHeight = max(key[2].bottom() for key in self.keys)
+        self.updateColors()
+        self.update()
+
+    # Takes the total count of every input and recolors the keys, using a log scale between the least
+    # and most used key
+    def setCounts(self, totalCounts):
+        keyCounts = {inputName: totalCounts.get(inputName, 0) for inputName, _, _ in self.keys}
+        if keyCounts == self.keyCounts:
+            return
+        self.keyCounts = keyCounts
+        self.updateColors()
+
+    def setColorScheme(self, scheme):
+        self.colorScheme = scheme
+        self.updateColors()
+
+    def setRoundedCorners(self, rounded):
+        self.roundedCorners = rounded
+        self.update()
+
+    def setShowLetters(self, showLetters):
+        self.showLetters = showLetters
+        self.update()
+
+    # Works out the color of every key, repainting only if any of them changed
+    def updateColors(self):
+        logCounts = {inputName: math.log(self.keyCounts.get(inputName, 0) + 1) for inputName, _, _ in self.keys}
+        minLogCount = min(logCounts.values())
+        maxLogCount = max(logCounts.values())
+
+        keyColors = {}
+        for inputName, logCount in logCounts.items():
+            if maxLogCount > minLogCount:
+                intensity = (logCount - minLogCount) / (maxLogCount - minLogCount)
+            else:
+                intensity = 0
+            keyColors[inputName] = getHeatmapColor(self.colorScheme, intensity).rgba()
+
+        if keyColors != self.keyColors:
+            self.keyColors = keyColors
+            self.update()
+
+    # Draws the keys scaled to fit the widget, centered
+    def paintEvent(self, event):
+        scale = min(self.width() / self.layoutWidth, self.height() / self.layoutHeight)
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate((self.width() - self.layoutWidth * scale) / 2, (self.height() - self.layoutHeight * scale) / 2)
+        painter.scale(scale, scale)
+        painter.setPen(Qt.NoPen)
+
+        font = QFont("Arial", 14)
+        font.setBold(True)
+        painter.setFont(font)
+        radius = 5 if self.roundedCorners else 0
+        for inputName, text, rect in self.keys:
+            painter.setBrush(QColor.fromRgba(self.keyColors[inputName]))
+            painter.drawRoundedRect(rect, radius, radius)
+
+        if self.showLetters:
+            painter.setPen(Qt.white)
+            for inputName, text, rect in self.keys:
+                painter.drawText(rect, Qt.AlignCenter, text)
+        painter.end()
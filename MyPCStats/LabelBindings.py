@@ -0,0 +1,24 @@
+# View-model for the labels that show computed stats. Stats are bound to the page they are shown on
+# together with the labels they fill, so update() only computes the stats of one page, and a label's
+# setText() (and the relayout it causes) only runs when its text changed
+class LabelBindings:
+    def __init__(self):
+        self.pageBindings = {}
+        self.shownTexts = {}
+
+    # Binds computeTexts, which returns one text per label, to labels on a page
+    def bind(self, page, labels, computeTexts):
+        self.pageBindings.setdefault(page, []).append((labels, computeTexts))
+
+    # Computes the stats bound to a page from args and pushes the changed texts to their labels.
+    # A stat that returns fewer texts than it has labels leaves the rest as they are
+    def update(self, page, *args):
+        for labels, computeTexts in self.pageBindings.get(page, ()):
+            for label, text in zip(labels, computeTexts(*args)):
+                self.setText(label, text)
+
+    # Sets the text of a label if it is not already showing it
+    def setText(self, label, text):
+        if self.shownTexts.get(label) != text:
+            self.shownTexts[label] = text
+            label.setText(text)
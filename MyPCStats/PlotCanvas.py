@@ -0,0 +1,36 @@
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from PySide6.QtCore import Qt
+
+# Graph creation and customization
+class MplCanvas(FigureCanvas):
+    # Set by the dashboard's profiling mode to time chart drawing
+    profiler = None
+
+    def __init__(self, parent=None, width=5, height=4, dpi=100, backgroundColor='#171C30'):
+        fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = fig.add_subplot(111)
+        fig.patch.set_facecolor(backgroundColor)
+        self.axes.set_facecolor("#1C2540")
+        super(MplCanvas, self).__init__(fig)
+        self.setStyleSheet(f"background-color: {backgroundColor};")
+        self.setFocusPolicy(Qt.NoFocus)
+
+        # Called with the scroll steps and the x position (0 to 1 across the axes) on ctrl + scroll
+        self.zoomHandler = None
+        
+    # Lets mouse scroll over graphs. Charts with a zoomHandler zoom on ctrl + scroll instead
+    def wheelEvent(self, event):
+        if self.zoomHandler and event.modifiers() & Qt.ControlModifier:
+            axesBox = self.axes.get_position()
+            xFraction = (event.position().x() / self.width() - axesBox.x0) / axesBox.width
+            self.zoomHandler(event.angleDelta().y() / 120, min(max(xFraction, 0), 1))
+        else:
+            self.parent().wheelEvent(event)
+
+    # Draws the figure, timed as drawing when profiling
+    def draw(self):
+        if MplCanvas.profiler is None:
+            return super(MplCanvas, self).draw()
+        with MplCanvas.profiler.measure('draw'):
+            super(MplCanvas, self).draw()
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+import cProfile
+import sqlite3
+import time
+
+# Refreshes that take longer than this many ms are printed as they happen
+SLOW_REFRESH_MS = 50
+
+# Parts of a refresh that are reported. Python is the time of the refresh that is not spent in the others
+CATEGORIES = ('sql', 'python', 'draw', 'qt')
+
+# Times the dashboard's refresh tasks, split into SQL, Python post-processing, matplotlib drawing and
+# Qt widget updates. SQL is timed by a ProfilingConnection and drawing by MplCanvas.draw(). Qt updates
+# normally wait for the next paint, so flushWidgets() (like a window repaint) is timed after each refresh
+class RefreshProfiler:
+    def __init__(self, flushWidgets, slowRefreshMs=SLOW_REFRESH_MS):
+        self.flushWidgets = flushWidgets
+        self.slowRefreshMs = slowRefreshMs
+        self.current = None
+        self.measuring = False
+        self.taskTotals = {}
+        self.trace = None
+
+    # Adds the time spent inside the block to a category of the running refresh. Blocks inside
+    # another measured block are not counted again
+    @contextmanager
+    def measure(self, category):
+        if self.current is None or self.measuring:
+            yield
+            return
+        self.measuring = True
+        startTime = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.current[category] += time.perf_counter_ns() - startTime
+            self.measuring = False
+
+    # Runs a refresh task and records how long each part of it took
+    def timeRefresh(self, taskName, task):
+        self.current = dict.fromkeys(CATEGORIES, 0)
+        startTime = time.perf_counter_ns()
+        try:
+            task()
+        finally:
+            taskTime = time.perf_counter_ns() - startTime
+            with self.measure('qt'):
+                self.flushWidgets()
+            timings = self.current
+            self.current = None
+
+        timings['python'] = taskTime - timings['sql'] - timings['draw']
+        totalMs = (taskTime + timings['qt']) / 1e6
+        totals = self.taskTotals.setdefault(taskName, {'count': 0, 'max': 0, **dict.fromkeys(CATEGORIES, 0)})
+        totals['count'] += 1
+        totals['max'] = max(totals['max'], totalMs)
+        for category in CATEGORIES:
+            totals[category] += timings[category]
+
+        if totalMs >= self.slowRefreshMs:
+            breakdown = ", ".join(f"{category} {timings[category] / 1e6:.1f}" for category in CATEGORIES)
+            print(f"Slow refresh '{taskName}': {totalMs:.1f} ms ({breakdown})")
+
+    # Prints the average breakdown and the slowest run of every task
+    def printSummary(self):
+        for taskName, totals in sorted(self.taskTotals.items()):
+            count = totals['count']
+            breakdown = ", ".join(f"{category} {totals[category] / count / 1e6:.1f}" for category in CATEGORIES)
+            print(f"{taskName}: {count} refreshes, average ({breakdown}) ms, slowest {totals['max']:.1f} ms")
+
+    # Records a cProfile trace of the GUI thread until stopTrace() saves it. The file is a pstats dump
+    # that snakeviz, flameprof or gprof2dot can read
+    def startTrace(self):
+        self.trace = cProfile.Profile()
+        self.trace.enable()
+
+    def stopTrace(self, path):
+        if self.trace is None:
+            return
+        self.trace.disable()
+        self.trace.dump_stats(path)
+        self.trace = None
+        print(f"Saved profile trace to {path}")
+
+# Cursor of a ProfilingConnection, its queries and fetches count as SQL time
+class ProfilingCursor(sqlite3.Cursor):
+    def execute(self, *args):
+        with self.connection.profiler.measure('sql'):
+            return super().execute(*args)
+
+    def executemany(self, *args):
+        with self.connection.profiler.measure('sql'):
+            return super().executemany(*args)
+
+    def fetchone(self):
+        with self.connection.profiler.measure('sql'):
+            return super().fetchone()
+
+    def fetchmany(self, *args):
+        with self.connection.profiler.measure('sql'):
+            return super().fetchmany(*args)
+
+    def fetchall(self):
+        with self.connection.profiler.measure('sql'):
+            return super().fetchall()
+
+    def __next__(self):
+        with self.connection.profiler.measure('sql'):
+            return super().__next__()
+
+# Connection used in profiling mode, made with sqlite3.connect(database, factory=ProfilingConnection).
+# Its profiler has to be set before it is used
+class ProfilingConnection(sqlite3.Connection):
+    profiler = None
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
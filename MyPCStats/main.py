@@ -1,17 +1,32 @@
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QGridLayout, QLabel, QScrollArea, QCalendarWidget, QDialog, QGraphicsView, QGraphicsScene, QGraphicsProxyWidget
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import time
+
+# Start of the app, used by the startup timing mode
+STARTUP_TIME = time.perf_counter()
+
+from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QGridLayout, QLabel, QScrollArea, QCalendarWidget, QDialog, QGraphicsView, QGraphicsScene, QGraphicsProxyWidget, QComboBox, QPushButton, QFileDialog, QInputDialog, QMessageBox
 from PySide6.QtGui import QDesktopServices, QColor, QPainter, QPen, QIcon
-from PySide6.QtCore import QEvent, QUrl, QTimer, Qt, QPoint, QDate
+from PySide6.QtCore import QEvent, QUrl, QTimer, Qt, QPoint, QDate, QObject, Signal, QRect
 from datetime import datetime, timedelta
 from MyPCStats_ui import Ui_MainWindow
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
+from RefreshProfiler import RefreshProfiler, ProfilingConnection
+from KeyboardHeatmap import KeyboardHeatmapWidget, KEYBOARD_LAYOUTS
+from LabelBindings import LabelBindings
+import threading
 import sqlite3
+import zlib
 import random
-import math
 import sys
 import os
 
+# Matplotlib is the slowest import of the app, so it is loaded by loadPlotting() after the first paint
+MplCanvas = None
+mdates = None
+downsampleLTTB = None
+countJournalMinutes = None
+getKeyTransitions = None
+getTopSequences = None
+getLayoutStats = None
+
 # Gets the app/script directory, depending on the run
 if getattr(sys, 'frozen', False):
     scriptDirectory = os.path.dirname(sys.executable)
@@ -21,39 +36,87 @@ else:
 # Path to the database
 DATABASE = os.path.join(scriptDirectory, 'scripts', 'InputDB.db')
 
-# Given a start and end time, queries the database to get all mouse inputs in that timeframe
-def getMouseClicksBetweenTimes(conn, startTime, endTime):
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT timestamp, COUNT(*)
-        FROM events
-        WHERE timestamp BETWEEN ? AND ?
-        AND button IN ('mouseright', 'mouseleft', 'mousemiddle')
-        AND eventTypeID IN ('3')
-        GROUP BY strftime('%Y-%m-%d %H:%M', timestamp)
-    ''', (startTime, endTime))
-    data = cursor.fetchall()
-    return data
-
-# Given a start and end time, queries the database to get all keyboard inputs in that timeframe
-def getKeyboardInputsBetweenTimes(conn, startTime, endTime):
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT timestamp, COUNT(*)
-        FROM events
-        WHERE timestamp BETWEEN ? AND ?
-        AND eventTypeID = 1
-        GROUP BY strftime('%Y-%m-%d %H:%M', timestamp)
-    ''', (startTime, endTime))
-    data = cursor.fetchall()
-    return data
+# Folder of the collector's event journal, holding the events not yet added to the database
+JOURNAL_DIRECTORY = os.path.join(scriptDirectory, 'scripts', 'journal')
+
+# Database that the stats of this PC and the databases of other machines are merged into
+MERGED_DATABASE = os.path.join(scriptDirectory, 'scripts', 'MergedDB.db')
+
+# Copy of another machine's database with an older layout, set up so it can be viewed without changing it
+VIEWED_COPY = os.path.join(scriptDirectory, 'scripts', f'viewedDatabase-{os.getpid()}.tmp')
+
+# Folder of the database backups, made by the collector every day or from the settings page
+BACKUP_DIRECTORY = os.path.join(scriptDirectory, 'scripts', 'backups')
+
+# Modules shared with the collector live next to it in the scripts folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from LiveCounters import LiveCountersReader
+from LiveChannel import LiveSubscriber
+from StatsDatabase import setupDatabase, getReadableDatabase, toEventTime, fromEventTime
+from TypingSpeed import BURST_BINS, PAUSE_BINS, toWPM
+from HoldDurations import getHoldHistograms, mergeHistograms, getPercentile
+from ForegroundApps import getAppUsage
+from ActivityHistogram import getAverageInputsPerHour
+from ActivityPyramid import LEVEL_SIZES, getLevelForSpan, getActivityCounts, getFirstActivityTime
+from CollectorMetrics import METRICS, getCollectorMetrics
+from DatabaseMerge import LOCAL_SOURCE_NAME, setupMergedDatabase, addSource, getSources, mergeDatabases
+from EventPartitions import queryEvents, countEvents, detachPartitions
+from EventJournal import SEGMENT_MAX_AGE, COMPACT_INTERVAL, getSegments
+from EventAggregation import aggregateEvents, shutdownExecutor
+from DatabaseBackup import BACKUP_COUNT, createBackup, rotateBackups, getBackups, restoreBackup
+
+# Longest time an event waits in the journal: its segment is closed when it is this old, then the next
+# compaction adds it to the database
+JOURNAL_DELAY = timedelta(seconds=SEGMENT_MAX_AGE + COMPACT_INTERVAL)
+
+# Prints time-to-first-paint and time-to-interactive when the app is started with this flag
+STARTUP_TIMING_FLAG = '--startup-timing'
+
+# Profiling mode times every refresh and prints the slow ones. With --profile-trace=SECONDS, a cProfile
+# trace of the first SECONDS after startup is also saved to PROFILE_TRACE_FILE
+PROFILE_FLAG = '--profile'
+PROFILE_TRACE_FLAG = '--profile-trace='
+PROFILE_TRACE_FILE = os.path.join(scriptDirectory, 'dashboardProfile.prof')
+
+# Periods that the key sequences and app usage can be shown for (in days, None for all time)
+HISTORY_PERIODS = [("Last 7 Days", 7), ("Last 30 Days", 30), ("Last Year", 365), ("All Time", None)]
+
+# Days of hold duration histograms used for the hold time stats
+HOLD_TIME_DAYS = 30
+
+# Shortest span (in ms) the history chart can be zoomed in to, and how much one scroll step zooms
+HISTORY_MIN_SPAN = 30 * 60000
+HISTORY_ZOOM_STEP = 0.8
+
+# The history chart reads up to this many times more buckets than it has pixels, and LTTB downsamples
+# them back to one point per pixel so that short peaks still show
+HISTORY_OVERSAMPLING = 4
+
+# Hours of collector metrics shown on the settings page
+COLLECTOR_HEALTH_HOURS = 24
+
+# Indexes of the app's pages in the Pages stacked widget
+HOME_PAGE = 0
+MOUSE_PAGE = 1
+KEYBOARD_PAGE = 2
+ANALYTICS_PAGE = 3
+CONFIGURE_PAGE = 4
+SETTINGS_PAGE = 5
+
+# Returns the seconds given with PROFILE_TRACE_FLAG, or None if there are none
+def getProfileTraceSeconds():
+    for arg in sys.argv:
+        if arg.startswith(PROFILE_TRACE_FLAG):
+            return float(arg[len(PROFILE_TRACE_FLAG):])
+    return None
 
 # Queries the totalCounts table from the database and puts it into a dictionary
 def getTotalCounts(conn):
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT inputName, totalCount
-        FROM totalCounts
+        SELECT i.name, t.totalCount
+        FROM totalCounts t
+        JOIN inputs i ON i.id = t.inputID
     ''')
     data = cursor.fetchall()
     
@@ -64,8 +127,9 @@ def getTotalCounts(conn):
 def getLifetimeLongestDurations(conn):
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT inputName, duration
-        FROM lifetimeLongestDurations
+        SELECT i.name, l.duration
+        FROM lifetimeLongestDurations l
+        JOIN inputs i ON i.id = l.inputID
     ''')
     data = cursor.fetchall()
     return {inputName: duration for inputName, duration in data}
@@ -165,20 +229,17 @@ def getMouseClicksLast24Hours(conn):
     nowLocal = datetime.now()
     yesterdayLocal = nowLocal - timedelta(days=1)
 
-    nowLocalStr = nowLocal.strftime('%Y-%m-%d %H:%M:%S')
-    yesterdayLocalStr = yesterdayLocal.strftime('%Y-%m-%d %H:%M:%S')
-
-    cursor = conn.cursor()
+    startTime, endTime = toEventTime(yesterdayLocal), toEventTime(nowLocal)
 
-    cursor.execute('''
+    rows = queryEvents(conn, '''
         SELECT COUNT(*)
-        FROM events
-        WHERE timestamp BETWEEN ? AND ?
-        AND button IN ('mouseright', 'mouseleft', 'mousemiddle')
-        AND eventTypeID IN ('3')
-    ''', (yesterdayLocalStr, nowLocalStr))
+        FROM {events}
+        WHERE eventTypeID = 3
+        AND time BETWEEN ? AND ?
+        AND inputID IN (SELECT id FROM inputs WHERE name IN ('mouseright', 'mouseleft', 'mousemiddle'))
+    ''', (startTime, endTime), startTime, endTime)
 
-    count = cursor.fetchone()[0]
+    count = sum(row[0] for row in rows)
     return count
 
 # Finds the amount of key inputs in the last 24 hours
@@ -186,35 +247,249 @@ def getKeyInputsLast24Hours(conn):
     nowLocal = datetime.now()
     yesterdayLocal = nowLocal - timedelta(days=1)
 
-    nowLocalStr = nowLocal.strftime('%Y-%m-%d %H:%M:%S')
-    yesterdayLocalStr = yesterdayLocal.strftime('%Y-%m-%d %H:%M:%S')
+    startTime, endTime = toEventTime(yesterdayLocal), toEventTime(nowLocal)
 
-    cursor = conn.cursor()
-
-    cursor.execute('''
+    rows = queryEvents(conn, '''
         SELECT COUNT(*)
-        FROM events
-        WHERE timestamp BETWEEN ? AND ?
-        AND eventTypeID IN (1)
-    ''', (yesterdayLocalStr, nowLocalStr))
+        FROM {events}
+        WHERE eventTypeID = 1
+        AND time BETWEEN ? AND ?
+    ''', (startTime, endTime), startTime, endTime)
 
-    count = cursor.fetchone()[0]
+    count = sum(row[0] for row in rows)
     return count
 
-# Finds the average amount of user inputs every hour
-def getAverageInputsPerHour(conn):
+# Inputs further apart than this (in ms) are in different active sessions
+SESSION_GAP = 15 * 60000
+
+# Finds the time of the latest key press or mouse click from startTime up to (not including) endTime,
+# or None if there is none. Times are in ms, None for no limit
+def getLatestInputTime(conn, startTime=None, endTime=None):
+    return aggregateEvents(conn, '''
+        SELECT 1, MAX(time)
+        FROM {events}
+        WHERE eventTypeID IN (1, 3)
+        AND time >= ? AND time < ?
+    ''', (startTime if startTime is not None else 0, endTime if endTime is not None else 2**62), startTime, endTime, merge='max').get(1)
+
+# Finds the (start, end of the session before) of every active session in time order, in ms. Each events
+# table finds the inputs that come more than SESSION_GAP after the one before them. The first input of a
+# table has nothing before it in that table, so it is checked against the other tables here, and the end
+# of the session before it is left as None to be looked up when needed
+def getActiveSessions(conn):
+    candidates = aggregateEvents(conn, '''
+        SELECT time, COALESCE(previousTime, 0)
+        FROM (
+            SELECT time, LAG(time) OVER (ORDER BY time) as previousTime
+            FROM {events}
+            WHERE eventTypeID IN (1, 3)
+        )
+        WHERE previousTime IS NULL OR time - previousTime > ?
+    ''', (SESSION_GAP,), merge='max')
+
+    sessions = []
+    for sessionStart, previousTime in sorted(candidates.items()):
+        if not previousTime:
+            if getLatestInputTime(conn, sessionStart - SESSION_GAP, sessionStart) is not None:
+                continue
+            previousTime = None
+        sessions.append((sessionStart, previousTime))
+    return sessions
+
+# Finds the average and peak typing speed of every day since startTime from the hourly typing rollups
+def getTypingSpeedByDay(conn, startTime):
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT strftime('%H', timestamp) as hour, COUNT(*)
-        FROM events
-        WHERE eventTypeID IN (1, 3)
-        GROUP BY hour
-    ''')
+        SELECT strftime('%Y-%m-%d', hourStart / 1000, 'unixepoch', 'localtime') as day, SUM(keyCount), SUM(typingTime), MAX(peakWPM)
+        FROM typingSpeedHourly
+        WHERE hourStart >= ?
+        GROUP BY day
+        ORDER BY day
+    ''', (toEventTime(startTime),))
     data = cursor.fetchall()
+    cursor.close()
+    return [(day, toWPM(keyCount, typingTime), peakWPM) for day, keyCount, typingTime, peakWPM in data]
 
-    hourlyTotals = {int(hour): count for hour, count in data}
-    hourlyAverages = [(hour, hourlyTotals.get(hour, 0) / 7) for hour in range(24)]
-    return hourlyAverages
+# Finds the counts of each burst length or pause bin since startTime
+def getTypingIntervalHistogram(conn, kind, startTime, bins):
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT bin, SUM(count)
+        FROM typingIntervalHistogram
+        WHERE kind = ?
+        AND hourStart >= ?
+        GROUP BY bin
+    ''', (kind, toEventTime(startTime)))
+    binCounts = dict(cursor.fetchall())
+    cursor.close()
+    return [binCounts.get(i, 0) for i in range(len(bins) + 1)]
+
+# Makes the labels of histogram bins from their upper edges, formatting the edges with formatEdge
+def getBinLabels(bins, formatEdge):
+    labels = [f"≤{formatEdge(bins[0])}"]
+    labels += [f"{formatEdge(low)}-{formatEdge(high)}" for low, high in zip(bins, bins[1:])]
+    labels.append(f">{formatEdge(bins[-1])}")
+    return labels
+
+# Formats a pause length in ms as seconds or minutes
+def formatPause(milliseconds):
+    if milliseconds < 60000:
+        return f"{milliseconds // 1000}s"
+    return f"{milliseconds // 60000}m"
+
+# Rolling per-minute event counts for a recent window (the live plots). After the first load, only
+# events with an id above the last one seen are read, and minutes that leave the window are dropped.
+# Minutes are kept as integer minutes since the epoch (time / 60000). Events the collector has only
+# written to its journal so far are counted from the journal on every update
+class LiveSeries:
+    def __init__(self, eventTypeID, inputNames=None, window=timedelta(hours=1)):
+        self.eventTypeID = eventTypeID
+        self.inputNames = inputNames
+        self.eventFilter = f"eventTypeID = {eventTypeID}"
+        if inputNames is not None:
+            names = ', '.join(f"'{name}'" for name in inputNames)
+            self.eventFilter += f" AND inputID IN (SELECT id FROM inputs WHERE name IN ({names}))"
+        self.window = window
+        self.lastEventID = None
+        self.inputIDs = None
+        self.minuteCounts = {}
+        self.minuteDates = {}
+        self.journalCounts = {}
+        self.readJournal = True
+
+    # Starts the series over, for when another database is shown. The journal only holds this PC's events
+    def reset(self, readJournal):
+        self.lastEventID = None
+        self.minuteCounts = {}
+        self.minuteDates = {}
+        self.journalCounts = {}
+        self.readJournal = readJournal
+
+    # Brings the series up to date with the events tables. Ids are unique over all partitions, so only
+    # the tables of the window need to be followed
+    def update(self, conn, now):
+        startTime = toEventTime(now - self.window)
+        if self.lastEventID is None:
+            self.load(conn, now)
+        else:
+            rows = queryEvents(conn, f'''
+                SELECT id, time / 60000
+                FROM {{events}}
+                WHERE id > ?
+                AND {self.eventFilter}
+            ''', (self.lastEventID,), startTime)
+            for eventID, minute in rows:
+                self.minuteCounts[minute] = self.minuteCounts.get(minute, 0) + 1
+                self.lastEventID = max(self.lastEventID, eventID)
+        self.trim(now)
+        if countJournalMinutes is not None and self.readJournal:
+            self.journalCounts = countJournalMinutes(conn, JOURNAL_DIRECTORY, self.eventTypeID, self.inputIDs, startTime // 60000)
+
+    # Loads the whole window once, remembering the newest event id as the tail cursor
+    def load(self, conn, now):
+        startTime = toEventTime(now - self.window)
+        if self.inputNames is not None:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id FROM inputs WHERE name IN ({', '.join('?' * len(self.inputNames))})", self.inputNames)
+            self.inputIDs = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+        self.lastEventID = max(row[0] for row in queryEvents(conn, 'SELECT COALESCE(MAX(id), 0) FROM {events}', (), startTime))
+        self.minuteCounts = countEvents(conn, f'''
+            SELECT time / 60000 as minute, COUNT(*)
+            FROM {{events}}
+            WHERE id <= ?
+            AND time >= ?
+            AND {self.eventFilter}
+            GROUP BY minute
+        ''', (self.lastEventID, startTime), startTime)
+
+    # Drops the minutes that are older than the window
+    def trim(self, now):
+        cutoff = toEventTime(now - self.window) // 60000
+        self.minuteCounts = {minute: count for minute, count in self.minuteCounts.items() if minute >= cutoff}
+        self.minuteDates = {minute: date for minute, date in self.minuteDates.items() if minute in self.minuteCounts}
+
+    # Returns the dates and counts of the series in time order
+    def points(self):
+        minutes = sorted(self.minuteCounts.keys() | self.journalCounts.keys())
+        for minute in minutes:
+            if minute not in self.minuteDates:
+                self.minuteDates[minute] = fromEventTime(minute * 60000)
+        counts = [self.minuteCounts.get(minute, 0) + self.journalCounts.get(minute, 0) for minute in minutes]
+        return [self.minuteDates[minute] for minute in minutes], counts
+
+# Event counts per hour, day or month over a range that ends now (the day, week, month and year plots).
+# Every bucket before the one that is still open is closed and can not change anymore, so closed buckets
+# are cached and a refresh only queries the open bucket, the partial bucket the range starts in, and
+# any buckets that closed since the last refresh
+class BucketSeries:
+    # strftime format of the bucket keys for each unit
+    KEY_FORMATS = {'hour': '%Y-%m-%d %H', 'day': '%Y-%m-%d', 'month': '%Y-%m'}
+
+    def __init__(self, eventFilter, unit):
+        self.eventFilter = eventFilter
+        self.unit = unit
+        self.keyFormat = self.KEY_FORMATS[unit]
+        self.clear()
+
+    # Forgets the cached buckets, so the next refresh reads the whole range again
+    def clear(self):
+        self.closedCounts = {}
+        self.cachedUntil = None
+
+    # Returns the start of the bucket a datetime is in
+    def getBucketStart(self, date):
+        if self.unit == 'hour':
+            return date.replace(minute=0, second=0, microsecond=0)
+        if self.unit == 'day':
+            return date.replace(hour=0, minute=0, second=0, microsecond=0)
+        return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    # Returns the start of the bucket after the one starting at bucketStart
+    def getNextBucketStart(self, bucketStart):
+        if self.unit == 'hour':
+            return bucketStart + timedelta(hours=1)
+        if self.unit == 'day':
+            return bucketStart + timedelta(days=1)
+        return (bucketStart + timedelta(days=32)).replace(day=1)
+
+    # Counts the events of every bucket from startTime up to (not including) endTime. Long ranges are
+    # counted a partition per thread
+    def queryBuckets(self, conn, startTime, endTime):
+        startTime, endTime = toEventTime(startTime), toEventTime(endTime)
+        return list(aggregateEvents(conn, f'''
+            SELECT strftime('{self.keyFormat}', time / 1000, 'unixepoch', 'localtime') as bucket, COUNT(*)
+            FROM {{events}}
+            WHERE time >= ? AND time < ?
+            AND {self.eventFilter}
+            GROUP BY bucket
+        ''', (startTime, endTime), startTime, endTime).items())
+
+    # Returns the (bucket key, count) of every bucket with events from startTime to now, in time order.
+    # Events wait in the collector's journal for up to JOURNAL_DELAY before they reach the database, so
+    # a bucket is only cached as closed once it ended that long ago
+    def getCounts(self, conn, startTime, now):
+        openStart = self.getBucketStart(now - JOURNAL_DELAY)
+        firstClosedStart = self.getBucketStart(startTime)
+        if firstClosedStart < startTime:
+            firstClosedStart = self.getNextBucketStart(firstClosedStart)
+
+        # Adds the buckets that closed since the last refresh, and drops the ones that left the range.
+        # The cache starts over if the range moved past it or the clock went back
+        if self.cachedUntil is None or not firstClosedStart <= self.cachedUntil <= openStart:
+            self.closedCounts = {}
+            self.cachedUntil = firstClosedStart
+        if self.cachedUntil < openStart:
+            self.closedCounts.update(self.queryBuckets(conn, self.cachedUntil, openStart))
+            self.cachedUntil = openStart
+        firstKey = firstClosedStart.strftime(self.keyFormat)
+        self.closedCounts = {key: count for key, count in self.closedCounts.items() if key >= firstKey}
+
+        counts = dict(self.closedCounts)
+        if startTime < firstClosedStart <= openStart:
+            counts.update(self.queryBuckets(conn, startTime, firstClosedStart))
+        counts.update(self.queryBuckets(conn, max(openStart, startTime), now + timedelta(milliseconds=1)))
+        return sorted(counts.items())
 
 # Overlay widget for the mouse click map
 class OverlayWidget(QWidget):
@@ -293,19 +568,14 @@ class OverlayWidget(QWidget):
         nowLocal = datetime.now()
         yesterdayLocal = nowLocal - timedelta(days=1)
 
-        nowLocalStr = nowLocal.strftime('%Y-%m-%d %H:%M:%S')
-        yesterdayLocalStr = yesterdayLocal.strftime('%Y-%m-%d %H:%M:%S')
-
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT positionX, positionY, button
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND button IN ('mouseleft', 'mouseright', 'mousemiddle')
-        ''', (yesterdayLocalStr, nowLocalStr))
-
-        data = cursor.fetchall()
-        cursor.close()
+        startTime, endTime = toEventTime(yesterdayLocal), toEventTime(nowLocal)
+        data = queryEvents(self.conn, '''
+            SELECT e.positionX, e.positionY, i.name
+            FROM {events} e
+            JOIN inputs i ON i.id = e.inputID
+            WHERE e.time BETWEEN ? AND ?
+            AND i.name IN ('mouseleft', 'mouseright', 'mousemiddle')
+        ''', (startTime, endTime), startTime, endTime)
 
         filteredData = []
         for click in data:
@@ -420,21 +690,29 @@ class MouseDrawOverlayWidget(QWidget):
         self.historyAmount = amount
         self.update()
 
-# Graph creation and customization
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=4, dpi=100, backgroundColor='#171C30'):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = fig.add_subplot(111)
-        fig.patch.set_facecolor(backgroundColor)
-        self.axes.set_facecolor("#1C2540")
-        super(MplCanvas, self).__init__(fig)
-        self.setStyleSheet(f"background-color: {backgroundColor};")
-        self.setFocusPolicy(Qt.NoFocus)
-        
-    # Lets mouse scroll over graphs
-    def wheelEvent(self, event):
-        self.parent().wheelEvent(event)
-        
+# Imports matplotlib and the canvas class that depends on it
+def loadPlotting():
+    global MplCanvas, mdates, downsampleLTTB, countJournalMinutes, getKeyTransitions, getTopSequences, getLayoutStats
+    if MplCanvas is None:
+        from PlotCanvas import MplCanvas
+        from Downsampling import downsampleLTTB
+        from JournalReader import countJournalMinutes
+        from KeyTransitionReader import getKeyTransitions, getTopSequences, getLayoutStats
+        import matplotlib.dates as mdates
+
+# Passes live channel messages from its background thread to the GUI thread
+class LiveChannelBridge(QObject):
+    messageReceived = Signal(object)
+    connectionChanged = Signal(bool)
+
+# Passes the result of a database merge from its background thread to the GUI thread
+class MergeBridge(QObject):
+    mergeFinished = Signal(str)
+
+# Passes the result of a backup or restore from its background thread to the GUI thread
+class BackupBridge(QObject):
+    backupFinished = Signal(str, bool)
+
 # Custom QDialog for choosing a date on the calendar (for active sessions)
 class CustomDatePicker(QDialog):
     def __init__(self, parent=None):
@@ -460,8 +738,20 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         iconPath = os.path.join(os.path.dirname(__file__), 'icons', 'MyPCStatsFavicon.ico')
         self.setWindowIcon(QIcon(iconPath))
 
-        # Create a single database connection
-        self.conn = sqlite3.connect(DATABASE)
+        # Create a single database connection, migrating the database first if the collector has not yet
+        setupDatabase(DATABASE)
+        self.profileTraceSeconds = getProfileTraceSeconds()
+        if PROFILE_FLAG in sys.argv or self.profileTraceSeconds:
+            self.profiler = RefreshProfiler(self.repaint)
+            QApplication.instance().aboutToQuit.connect(self.profiler.printSummary)
+        else:
+            self.profiler = None
+        self.conn = self.connectDatabase(DATABASE)
+
+        # The stats of another machine or of all merged machines can be shown instead of this PC's.
+        # The local connection stays open for the overlays, which always show this PC
+        self.localConn = self.conn
+        self.showingLocal = True
 
         # List of buttons
         self.buttons = [
@@ -501,56 +791,82 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.HelpButton.clicked.connect(self.openHelpLink)
         self.ManualRefreshButton.clicked.connect(self.handleManualRefresh)
         
-        # Update functions that use input totals every second
+        # Refresh tasks and the page they draw on. A task only runs while its page is visible,
+        # otherwise it is marked dirty and runs the next time its page is shown
+        self.refreshTasks = {
+            'mouseTotals': (MOUSE_PAGE, self.updateMouseTotals),
+            'keyboardTotals': (KEYBOARD_PAGE, self.updateKeyboardTotals),
+            'holdTimes': (KEYBOARD_PAGE, self.updateHoldTimes),
+            'randomKey': (KEYBOARD_PAGE, self.randomizeKey),
+            'livePlots': (ANALYTICS_PAGE, self.updateLivePlots),
+            'otherPlots': (ANALYTICS_PAGE, self.updateOtherPlots),
+            'activeSession': (ANALYTICS_PAGE, self.updateActiveSessionInfo),
+            'timeline': (ANALYTICS_PAGE, lambda: self.updateTimelineChart(self.selectedDate)),
+            'appUsage': (ANALYTICS_PAGE, self.updateAppUsage),
+            'history': (ANALYTICS_PAGE, self.updateHistoryChart),
+            'typingSpeed': (KEYBOARD_PAGE, self.updateTypingSpeed),
+            'keySequences': (KEYBOARD_PAGE, self.updateKeySequences),
+            'collectorHealth': (SETTINGS_PAGE, self.updateCollectorHealth),
+        }
+
+        # Summary labels are bound to their stats, so only the changed ones are set (see LabelBindings)
+        self.labelBindings = LabelBindings()
+        self.bindMouseLabels()
+        self.bindKeyboardLabels()
+
+        # Inputs the pie charts were last drawn with, so they are only redrawn when these change
+        self.drawnPieInputs = {}
+
+        # Nothing has been drawn yet, so every page gets computed on its first show
+        self.dirtyTasks = set(self.refreshTasks)
+        self.Pages.currentChanged.connect(self.refreshDirtyTasks)
+
+        # Refresh timers, started by finishStartup() once the charts exist
         self.timer = QTimer(self)
-        self.timer.timeout.connect(self.updateAllTotals)
-        self.timer.start(1000)
-        
-        # Update live plots every 5 seconds
+        self.timer.timeout.connect(lambda: self.requestRefresh('mouseTotals', 'keyboardTotals'))
         self.liveGraphTimer = QTimer(self)
-        self.liveGraphTimer.timeout.connect(self.updateLivePlots)
-        self.liveGraphTimer.start(5000)
-        
-        # Update active session info every 60 seconds
+        self.liveGraphTimer.timeout.connect(lambda: self.requestRefresh('livePlots'))
         self.activeSessionTimer = QTimer(self)
-        self.activeSessionTimer.timeout.connect(self.updateActiveSessionInfo)
-        self.activeSessionTimer.start(60000)
-
-        # Update graphs every 5 minutes
+        self.activeSessionTimer.timeout.connect(lambda: self.requestRefresh('activeSession'))
         self.graphTimer = QTimer(self)
-        self.graphTimer.timeout.connect(self.updateOtherPlots)
-        self.graphTimer.start(300000)
-
-        # Matplotlib Canvases for graphs
-        self.liveCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.dayCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.weekCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.monthCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.yearCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.pieCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.kbPieCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.avgDayInputsCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.keyboardLiveCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.keyboardDayCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.keyboardWeekCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.keyboardMonthCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.keyboardYearCanvas = MplCanvas(self, width=5, height=4, dpi=100)
-
-        self.LiveGraphContainer.addWidget(self.liveCanvas)
-        self.DayGraphContainer.addWidget(self.dayCanvas)
-        self.WeekGraphContainer.addWidget(self.weekCanvas)
-        self.MonthGraphContainer.addWidget(self.monthCanvas)
-        self.YearGraphContainer.addWidget(self.yearCanvas)
-        self.PieChartContainer.addWidget(self.pieCanvas)
-        self.KBPieChartContainer.addWidget(self.kbPieCanvas)
-        self.AvgDayInputsHolder.addWidget(self.avgDayInputsCanvas)
-        self.KeyboardLiveGraphContainer.addWidget(self.keyboardLiveCanvas)
-        self.KeyboardDayGraphContainer.addWidget(self.keyboardDayCanvas)
-        self.KeyboardWeekGraphContainer.addWidget(self.keyboardWeekCanvas)
-        self.KeyboardMonthGraphContainer.addWidget(self.keyboardMonthCanvas)
-        self.KeyboardYearGraphContainer.addWidget(self.keyboardYearCanvas)
-        
-        self.updateAllPlots()
+        self.graphTimer.timeout.connect(lambda: self.requestRefresh('otherPlots', 'typingSpeed', 'keySequences', 'holdTimes', 'appUsage', 'history', 'collectorHealth'))
+
+        # Timers and the tasks they refresh, paused while the window is minimized
+        self.refreshTimers = [
+            (self.timer, ('mouseTotals', 'keyboardTotals')),
+            (self.liveGraphTimer, ('livePlots',)),
+            (self.activeSessionTimer, ('activeSession',)),
+            (self.graphTimer, ('otherPlots', 'typingSpeed', 'keySequences', 'holdTimes', 'appUsage', 'history', 'collectorHealth')),
+        ]
+        self.minimizedAt = None
+
+        # Updates pushed by the collector. While connected, totals come from the pushes instead of the
+        # database, and the totals and live plot timers are replaced by throttled refreshes on push
+        self.pushConnected = False
+        self.pushedTotals = {}
+        self.pushedLongest = {}
+        self.todayCounts = {}
+        self.pushedTimers = (self.timer, self.liveGraphTimer)
+
+        # Totals shared by the collector through memory, read instead of the totalCounts table
+        self.liveCounters = LiveCountersReader(os.path.dirname(DATABASE))
+        self.liveChannelBridge = LiveChannelBridge(self)
+        self.liveChannelBridge.messageReceived.connect(self.onLivePush)
+        self.liveChannelBridge.connectionChanged.connect(self.onLiveConnectionChanged)
+        self.liveSubscriber = LiveSubscriber(os.path.dirname(DATABASE), self.liveChannelBridge.messageReceived.emit, self.liveChannelBridge.connectionChanged.emit)
+
+        self.pushTotalsTimer = QTimer(self)
+        self.pushTotalsTimer.setSingleShot(True)
+        self.pushTotalsTimer.timeout.connect(lambda: self.requestRefresh('mouseTotals', 'keyboardTotals'))
+        self.pushLiveTimer = QTimer(self)
+        self.pushLiveTimer.setSingleShot(True)
+        self.pushLiveTimer.timeout.connect(lambda: self.requestRefresh('livePlots'))
+
+        # The home page paints first, then finishStartup() builds the charts
+        self.startupComplete = False
+        self.startupTiming = STARTUP_TIMING_FLAG in sys.argv
+        self.firstPaintTime = None
+        self.centralWidget().installEventFilter(self)
         
         # Overlay buttons
         self.overlay = OverlayWidget(self.conn)
@@ -573,22 +889,154 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Connect randomize buttons
         self.RandomizeL.clicked.connect(self.randomizeKey)
         self.RandomizeR.clicked.connect(self.randomizeKey)
-        self.randomizeKey()
         
+        # Typing speed container at the bottom of the keyboard page, its charts are added by finishStartup()
+        typingSpeedLayout = self.addPageContainer(self.gridLayout_3, 'TypingSpeedContainer', "Typing Speed")
+        self.CurrentWPM, self.PeakWPMToday, self.AverageWPMToday = self.addStatLabels(typingSpeedLayout, ["Current WPM", "Peak WPM Today", "Average WPM Today"])
+        self.TypingSpeedGraphContainer = QVBoxLayout()
+        self.TypingIntervalGraphContainer = QHBoxLayout()
+        typingSpeedLayout.addLayout(self.TypingSpeedGraphContainer, 1)
+        typingSpeedLayout.addLayout(self.TypingIntervalGraphContainer, 1)
+
+        # Key sequences container, read from the daily key transition snapshots
+        keySequencesLayout = self.addPageContainer(self.gridLayout_3, 'KeySequencesContainer', "Key Sequences")
+        self.SequencePeriod = self.addPeriodSelector(keySequencesLayout, 'keySequences')
+        self.TopSequence, self.HandAlternation, self.SameFingerSequences = self.addStatLabels(keySequencesLayout, ["Most Common Sequence", "Hand Alternation", "Same-Finger Sequences"])
+        self.KeySequencesGraphContainer = QVBoxLayout()
+        keySequencesLayout.addLayout(self.KeySequencesGraphContainer, 1)
+
+        # Hold times container, read from the daily hold duration histograms
+        holdTimesLayout = self.addPageContainer(self.gridLayout_3, 'HoldTimesContainer', "Hold Times")
+        self.MedianKeyHold, self.P99KeyHold, self.MedianClickHold = self.addStatLabels(holdTimesLayout, ["Median Key Hold", "99th Percentile Key Hold", "Median Click Hold"])
+        self.HoldTimesGraphContainer = QVBoxLayout()
+        holdTimesLayout.addLayout(self.HoldTimesGraphContainer, 1)
+        self.holdHistograms = {}
+
+        # App usage container on the analytics page, read from the per-app daily counts
+        appUsageLayout = self.addPageContainer(self.gridLayout_4, 'AppUsageContainer', "Apps")
+        self.AppUsagePeriod = self.addPeriodSelector(appUsageLayout, 'appUsage')
+        self.TopApp, self.AppsUsed, self.TopAppShare = self.addStatLabels(appUsageLayout, ["Most Used App", "Apps Used", "Inputs in Most Used App"])
+        self.AppUsageGraphContainer = QVBoxLayout()
+        appUsageLayout.addLayout(self.AppUsageGraphContainer, 1)
+
+        # Zoomable input history on the analytics page, read at the resolution that fits the visible span.
+        # historyRange is the visible (start, end) in ms, or None to show everything
+        historyLayout = self.addPageContainer(self.gridLayout_4, 'HistoryContainer', "Input History")
+        self.HistoryResolution, self.HistorySpan = self.addStatLabels(historyLayout, ["Resolution", "Visible Span"])
+        historyHint = QLabel("Ctrl + scroll to zoom, drag to move, double-click to show everything")
+        historyHint.setFont(self.ITText.font())
+        historyHint.setAlignment(Qt.AlignCenter)
+        historyLayout.addWidget(historyHint)
+        self.HistoryGraphContainer = QVBoxLayout()
+        historyLayout.addLayout(self.HistoryGraphContainer, 1)
+        self.historyRange = None
+        self.historyBounds = None
+        self.historyDrag = None
+        self.historyRefreshTimer = QTimer(self)
+        self.historyRefreshTimer.setSingleShot(True)
+        self.historyRefreshTimer.timeout.connect(lambda: self.requestRefresh('history'))
+
+        # Collector health under the other settings, charting one of the collector's own metrics
+        self.CollectorHealthHolder = QWidget(self.RightSettingsHolder)
+        self.CollectorHealthHolder.setGeometry(QRect(10, 120, 380, 305))
+        collectorHealthLayout = QVBoxLayout(self.CollectorHealthHolder)
+        collectorHealthLayout.setContentsMargins(0, 0, 0, 0)
+        self.CollectorMetric = QComboBox()
+        self.CollectorMetric.addItems([caption for caption, _ in METRICS.values()])
+        self.CollectorMetric.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D;")
+        self.CollectorMetric.currentIndexChanged.connect(lambda: self.requestRefresh('collectorHealth'))
+        collectorHealthLayout.addWidget(self.CollectorMetric, 0, Qt.AlignCenter)
+        self.CollectorHealthGraphContainer = QVBoxLayout()
+        collectorHealthLayout.addLayout(self.CollectorHealthGraphContainer, 1)
+
+        # Machine selector under the other settings, showing this PC, a merged machine or all of them
+        self.MachinesHolder = QWidget(self.LeftSettingsHolder)
+        self.MachinesHolder.setGeometry(QRect(10, 190, 331, 120))
+        machinesLayout = QVBoxLayout(self.MachinesHolder)
+        machinesLayout.setContentsMargins(0, 0, 0, 0)
+        self.MachineSelector = QComboBox()
+        self.MachineSelector.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D;")
+        machinesLayout.addWidget(self.MachineSelector, 0, Qt.AlignCenter)
+        machineButtonsLayout = QHBoxLayout()
+        self.AddDatabaseButton = QPushButton("Add Database")
+        self.MergeButton = QPushButton("Merge Now")
+        for button in (self.AddDatabaseButton, self.MergeButton):
+            button.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D; padding: 4px 10px;")
+            button.setCursor(Qt.PointingHandCursor)
+            machineButtonsLayout.addWidget(button)
+        machinesLayout.addLayout(machineButtonsLayout)
+        self.MergeStatus = QLabel("")
+        self.MergeStatus.setAlignment(Qt.AlignCenter)
+        self.MergeStatus.setWordWrap(True)
+        machinesLayout.addWidget(self.MergeStatus)
+        self.machineDatabases = []
+        self.loadMachines()
+        self.MachineSelector.currentIndexChanged.connect(self.showMachine)
+        self.AddDatabaseButton.clicked.connect(self.addMachineDatabase)
+        self.MergeButton.clicked.connect(self.startMerge)
+        self.mergeBridge = MergeBridge(self)
+        self.mergeBridge.mergeFinished.connect(self.onMergeFinished)
+
+        # Backups of this PC's database, with a restore of the picked one
+        self.BackupsHolder = QWidget(self.LeftSettingsHolder)
+        self.BackupsHolder.setGeometry(QRect(10, 320, 331, 110))
+        backupsLayout = QVBoxLayout(self.BackupsHolder)
+        backupsLayout.setContentsMargins(0, 0, 0, 0)
+        self.BackupSelector = QComboBox()
+        self.BackupSelector.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D;")
+        backupsLayout.addWidget(self.BackupSelector, 0, Qt.AlignCenter)
+        backupButtonsLayout = QHBoxLayout()
+        self.BackUpButton = QPushButton("Back Up Now")
+        self.RestoreButton = QPushButton("Restore")
+        for button in (self.BackUpButton, self.RestoreButton):
+            button.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D; padding: 4px 10px;")
+            button.setCursor(Qt.PointingHandCursor)
+            backupButtonsLayout.addWidget(button)
+        backupsLayout.addLayout(backupButtonsLayout)
+        self.BackupStatus = QLabel("")
+        self.BackupStatus.setAlignment(Qt.AlignCenter)
+        self.BackupStatus.setWordWrap(True)
+        backupsLayout.addWidget(self.BackupStatus)
+        self.backupPaths = []
+        self.loadBackups()
+        self.BackUpButton.clicked.connect(self.startBackup)
+        self.RestoreButton.clicked.connect(self.startRestore)
+        self.backupBridge = BackupBridge(self)
+        self.backupBridge.backupFinished.connect(self.onBackupFinished)
+
+        # Typical hold times of the random key, shown under its longest hold
+        self.HoldTimesText = QLabel(f"Median / 99th Percentile Hold ({HOLD_TIME_DAYS} Days)", self.RKRightHolder)
+        self.HoldTimesText.setFont(self.LTHDText.font())
+        self.RandomKeyHoldTimes = QLabel("-", self.RKRightHolder)
+        self.RandomKeyHoldTimes.setFont(self.LongestTimeHeld.font())
+        self.verticalLayout_59.insertWidget(self.verticalLayout_59.indexOf(self.LongestTimeHeld) + 1, self.HoldTimesText)
+        self.verticalLayout_59.insertWidget(self.verticalLayout_59.indexOf(self.HoldTimesText) + 1, self.RandomKeyHoldTimes)
+
+        # The keyboard heatmap is painted by one widget, which replaces the designer-made key labels
+        for keyLabel in self.HeatmapContainer.findChildren(QLabel):
+            keyLabel.deleteLater()
+        self.keyboardHeatmap = KeyboardHeatmapWidget(self.HeatmapContainer)
+        heatmapLayout = QVBoxLayout(self.HeatmapContainer)
+        heatmapLayout.setContentsMargins(14, 10, 14, 8)
+        heatmapLayout.addWidget(self.keyboardHeatmap)
+
         # Keyboard heatmap buttons
         self.RoundedButton.toggled.connect(self.toggleRoundedBorders)
         self.ToggleLetterButton.toggled.connect(self.toggleKeyTextVisibility)
         self.ToggleColorSchemeButton.toggled.connect(self.toggleColorScheme)
-        self.colorScheme = 'greenToRedScheme'
+        self.KeyboardLayout = QComboBox()
+        self.KeyboardLayout.addItems(list(KEYBOARD_LAYOUTS))
+        self.KeyboardLayout.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D;")
+        self.KeyboardLayout.currentTextChanged.connect(self.keyboardHeatmap.setKeyboardLayout)
+        self.verticalLayout_57.insertWidget(self.verticalLayout_57.indexOf(self.HeatmapText) + 1, self.KeyboardLayout, 0, Qt.AlignCenter)
         
         # Close database connection
         QApplication.instance().aboutToQuit.connect(self.closeDatabaseConnection)
         
-        # Set default date to current date and update timeline chart
+        # Set default date to current date (the timeline chart is drawn when the page is first shown)
         currentDate = QDate.currentDate()
         self.selectedDate = currentDate
         self.SelectedDate.setText(self.selectedDate.toString('MMMM d'))
-        self.updateTimelineChart(self.selectedDate)
 
         # Date change button
         self.DateLabel.clicked.connect(self.openDatePicker)
@@ -601,6 +1049,516 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Button that opens the application's location in file explorer
         self.OAFHolder.clicked.connect(self.openAppFolder)
         
+    # Second startup stage, run after the window first paints: loads matplotlib and creates the charts
+    def finishStartup(self):
+        loadPlotting()
+        if self.profiler:
+            MplCanvas.profiler = self.profiler
+            if self.profileTraceSeconds:
+                self.profiler.startTrace()
+                QTimer.singleShot(int(self.profileTraceSeconds * 1000), lambda: self.profiler.stopTrace(PROFILE_TRACE_FILE))
+
+        # Matplotlib Canvases for graphs
+        self.liveCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.dayCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.weekCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.monthCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.yearCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.pieCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.kbPieCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.avgDayInputsCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.keyboardLiveCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.keyboardDayCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.keyboardWeekCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.keyboardMonthCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.keyboardYearCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.typingSpeedCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.burstCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.pauseCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.keySequencesCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.holdTimesCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.appUsageCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.collectorHealthCanvas = MplCanvas(self, width=4, height=3, dpi=100)
+        self.historyCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+
+        self.LiveGraphContainer.addWidget(self.liveCanvas)
+        self.DayGraphContainer.addWidget(self.dayCanvas)
+        self.WeekGraphContainer.addWidget(self.weekCanvas)
+        self.MonthGraphContainer.addWidget(self.monthCanvas)
+        self.YearGraphContainer.addWidget(self.yearCanvas)
+        self.PieChartContainer.addWidget(self.pieCanvas)
+        self.KBPieChartContainer.addWidget(self.kbPieCanvas)
+        self.AvgDayInputsHolder.addWidget(self.avgDayInputsCanvas)
+        self.KeyboardLiveGraphContainer.addWidget(self.keyboardLiveCanvas)
+        self.KeyboardDayGraphContainer.addWidget(self.keyboardDayCanvas)
+        self.KeyboardWeekGraphContainer.addWidget(self.keyboardWeekCanvas)
+        self.KeyboardMonthGraphContainer.addWidget(self.keyboardMonthCanvas)
+        self.KeyboardYearGraphContainer.addWidget(self.keyboardYearCanvas)
+        self.TypingSpeedGraphContainer.addWidget(self.typingSpeedCanvas)
+        self.TypingIntervalGraphContainer.addWidget(self.burstCanvas)
+        self.TypingIntervalGraphContainer.addWidget(self.pauseCanvas)
+        self.KeySequencesGraphContainer.addWidget(self.keySequencesCanvas)
+        self.HoldTimesGraphContainer.addWidget(self.holdTimesCanvas)
+        self.AppUsageGraphContainer.addWidget(self.appUsageCanvas)
+        self.CollectorHealthGraphContainer.addWidget(self.collectorHealthCanvas)
+        self.HistoryGraphContainer.addWidget(self.historyCanvas)
+
+        # The history chart zooms with ctrl + scroll and pans by dragging
+        self.historyCanvas.zoomHandler = self.zoomHistory
+        self.historyCanvas.mpl_connect('button_press_event', self.onHistoryPress)
+        self.historyCanvas.mpl_connect('motion_notify_event', self.onHistoryDrag)
+        self.historyCanvas.mpl_connect('button_release_event', self.onHistoryRelease)
+
+        # Day, week, month and year plots keep the counts of their closed buckets (see BucketSeries)
+        mouseClickFilter = "eventTypeID = 3 AND inputID IN (SELECT id FROM inputs WHERE name IN ('mouseright', 'mouseleft', 'mousemiddle'))"
+        self.daySeries = BucketSeries(mouseClickFilter, 'hour')
+        self.weekSeries = BucketSeries(mouseClickFilter, 'day')
+        self.monthSeries = BucketSeries(mouseClickFilter, 'day')
+        self.yearSeries = BucketSeries(mouseClickFilter, 'month')
+        self.keyboardDaySeries = BucketSeries("eventTypeID = 1", 'hour')
+        self.keyboardWeekSeries = BucketSeries("eventTypeID = 1", 'day')
+        self.keyboardMonthSeries = BucketSeries("eventTypeID = 1", 'day')
+        self.keyboardYearSeries = BucketSeries("eventTypeID = 1", 'month')
+        self.bucketSeries = [self.daySeries, self.weekSeries, self.monthSeries, self.yearSeries,
+                             self.keyboardDaySeries, self.keyboardWeekSeries, self.keyboardMonthSeries, self.keyboardYearSeries]
+
+        # Live plots follow the events table and redraw their lines in place
+        self.liveMouseSeries = LiveSeries(3, ('mouseright', 'mouseleft', 'mousemiddle'))
+        self.liveKeyboardSeries = LiveSeries(1)
+        self.liveLine = None
+        self.keyboardLiveLine = None
+
+        # Update functions that use input totals every second
+        self.timer.start(1000)
+        
+        # Update live plots every 5 seconds
+        self.liveGraphTimer.start(5000)
+        
+        # Update active session info every 60 seconds
+        self.activeSessionTimer.start(60000)
+
+        # Update graphs every 5 minutes
+        self.graphTimer.start(300000)
+
+        self.startupComplete = True
+        self.refreshDirtyTasks(self.Pages.currentIndex())
+        self.liveSubscriber.start()
+
+        if self.startupTiming:
+            interactiveTime = time.perf_counter()
+            print(f"Time to first paint: {(self.firstPaintTime - STARTUP_TIME) * 1000:.0f} ms")
+            print(f"Time to interactive: {(interactiveTime - STARTUP_TIME) * 1000:.0f} ms")
+
+    # Runs the given refresh tasks if their page is visible, otherwise marks them dirty
+    def requestRefresh(self, *taskNames):
+        currentPage = self.Pages.currentIndex()
+        for taskName in taskNames:
+            page, task = self.refreshTasks[taskName]
+            if page == currentPage and self.startupComplete and not self.isMinimized():
+                self.dirtyTasks.discard(taskName)
+                self.runRefreshTask(taskName, task)
+            else:
+                self.dirtyTasks.add(taskName)
+
+    # Runs the dirty refresh tasks of a page once it becomes visible
+    def refreshDirtyTasks(self, index):
+        if not self.startupComplete or self.isMinimized():
+            return
+        for taskName, (page, task) in self.refreshTasks.items():
+            if page == index and taskName in self.dirtyTasks:
+                self.dirtyTasks.discard(taskName)
+                self.runRefreshTask(taskName, task)
+
+    # Runs a refresh task, timing it in profiling mode
+    def runRefreshTask(self, taskName, task):
+        if self.profiler:
+            self.profiler.timeRefresh(taskName, task)
+        else:
+            task()
+
+    # Pauses all refresh timers while the window is minimized
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized() and self.minimizedAt is None:
+                self.minimizedAt = time.monotonic()
+                for timer, _ in self.refreshTimers:
+                    timer.stop()
+            elif not self.isMinimized() and self.minimizedAt is not None:
+                # Anything whose timer would have fired while minimized is now stale
+                minimizedMs = (time.monotonic() - self.minimizedAt) * 1000
+                self.minimizedAt = None
+                for timer, taskNames in self.refreshTimers:
+                    if minimizedMs >= timer.interval():
+                        self.dirtyTasks.update(taskNames)
+                    if self.startupComplete and not (self.pushConnected and timer in self.pushedTimers):
+                        timer.start()
+                self.refreshDirtyTasks(self.Pages.currentIndex())
+        super(MainWindow, self).changeEvent(event)
+
+    # Switches between pushed updates and polling when the collector connects or disconnects
+    def onLiveConnectionChanged(self, connected):
+        self.pushConnected = connected
+        self.todayCounts = {}
+        for timer in self.pushedTimers:
+            if connected:
+                timer.stop()
+            elif self.startupComplete and not self.isMinimized():
+                timer.start()
+        if not connected:
+            self.pushedTotals = {}
+            self.pushedLongest = {}
+            self.CurrentWPM.setText("-")
+
+    # Applies an update from the collector and schedules a refresh of what it changed
+    def onLivePush(self, message):
+        self.pushedTotals.update(message['totals'])
+        self.pushedLongest.update(message['longest'])
+        if 'wpm' in message['stats']:
+            self.CurrentWPM.setText(f"{message['stats']['wpm']:.0f}")
+        for kind in ('clicks', 'keys'):
+            if message[kind] and kind in self.todayCounts:
+                count, syncedAt = self.todayCounts[kind]
+                self.todayCounts[kind] = (count + message[kind], syncedAt)
+
+        # Pushes can arrive ten times a second, so redraws are throttled
+        if not self.pushTotalsTimer.isActive():
+            self.pushTotalsTimer.start(250)
+        if (message['clicks'] or message['keys']) and not self.pushLiveTimer.isActive():
+            self.pushLiveTimer.start(1000)
+
+    # Returns the input totals and longest durations. These come from the collector's pushes when connected,
+    # then from the collector's shared memory counters while the collector is running, and from the database
+    # otherwise (the counters file stays behind when the collector exits)
+    def getCurrentTotals(self):
+        if not self.showingLocal:
+            return getTotalCounts(self.conn), getLifetimeLongestDurations(self.conn)
+        if self.pushConnected and self.pushedTotals:
+            return self.pushedTotals, self.pushedLongest
+        snapshot = self.liveCounters.snapshot()
+        if snapshot:
+            return snapshot
+        return getTotalCounts(self.conn), getLifetimeLongestDurations(self.conn)
+
+    # Returns the clicks or key inputs of the last 24 hours. While connected, pushed inputs are added to a
+    # count that is re-read from the database every minute so that old inputs still expire
+    def getTodayCount(self, kind):
+        count, syncedAt = self.todayCounts.get(kind, (0, None))
+        if not self.pushConnected or not self.showingLocal or syncedAt is None or time.monotonic() - syncedAt > 60:
+            if kind == 'clicks':
+                count = getMouseClicksLast24Hours(self.conn)
+            else:
+                count = getKeyInputsLast24Hours(self.conn)
+            self.todayCounts[kind] = (count, time.monotonic())
+        return count
+
+    # Adds a container styled like the designer-made ones below the others on a page, and returns its layout
+    def addPageContainer(self, gridLayout, name, title):
+        container = QWidget()
+        container.setObjectName(name)
+        container.setStyleSheet(f"#{name} {{ background-color: rgba(0, 0, 0, 0.5); border-radius: 5px; }}")
+        container.setMinimumSize(840, 585)
+        layout = QVBoxLayout(container)
+
+        titleLabel = QLabel(title, container)
+        titleLabel.setFont(self.KeyboardSummaryText.font())
+        titleLabel.setAlignment(Qt.AlignCenter)
+        layout.addWidget(titleLabel)
+
+        gridLayout.addWidget(container, gridLayout.rowCount(), 0, 1, 1)
+        return layout
+
+    # Adds a selector of the HISTORY_PERIODS to a layout that refreshes the given task when changed
+    def addPeriodSelector(self, layout, taskName):
+        periodSelector = QComboBox()
+        periodSelector.addItems([name for name, _ in HISTORY_PERIODS])
+        periodSelector.setCurrentIndex(1)
+        periodSelector.setStyleSheet("color: #F0F0F0; background-color: #2D2D2D;")
+        periodSelector.currentIndexChanged.connect(lambda: self.requestRefresh(taskName))
+        layout.addWidget(periodSelector, 0, Qt.AlignCenter)
+        return periodSelector
+
+    # Returns the first and last day ('YYYY-mm-dd') of the period picked in a period selector
+    def getSelectedDays(self, periodSelector):
+        days = HISTORY_PERIODS[periodSelector.currentIndex()][1]
+        now = datetime.now()
+        startDay = (now - timedelta(days=days - 1)).strftime('%Y-%m-%d') if days else '0000-00-00'
+        return startDay, now.strftime('%Y-%m-%d')
+
+    # Adds a row of captioned values (like the keyboard summary) to a layout, and returns the value labels
+    def addStatLabels(self, layout, captions):
+        rowLayout = QHBoxLayout()
+        valueLabels = []
+        for caption in captions:
+            statLayout = QVBoxLayout()
+            statLayout.setSpacing(0)
+            captionLabel = QLabel(caption)
+            captionLabel.setFont(self.ITText.font())
+            captionLabel.setAlignment(Qt.AlignCenter)
+            valueLabel = QLabel("-")
+            valueLabel.setFont(self.InputsToday.font())
+            valueLabel.setAlignment(Qt.AlignCenter)
+            statLayout.addWidget(captionLabel)
+            statLayout.addWidget(valueLabel)
+            rowLayout.addLayout(statLayout)
+            valueLabels.append(valueLabel)
+        layout.addLayout(rowLayout)
+        return valueLabels
+
+    # Applies the app's chart look to a canvas's axes
+    def styleChart(self, canvas, xlabel, ylabel, title):
+        canvas.axes.set_xlabel(xlabel, color='#F0F0F0', fontsize=12, labelpad=8)
+        canvas.axes.set_ylabel(ylabel, color='#F0F0F0', fontsize=12, labelpad=8)
+        canvas.axes.set_title(title, color='#F0F0F0', fontsize=15, fontweight='bold', pad=12)
+        canvas.axes.tick_params(axis='x', colors='white')
+        canvas.axes.tick_params(axis='y', colors='white')
+
+        canvas.axes.spines['bottom'].set_color('#F0F0F0')
+        canvas.axes.spines['top'].set_color('#263556')
+        canvas.axes.spines['right'].set_color('#263556')
+        canvas.axes.spines['left'].set_color('#F0F0F0')
+
+    # Shows "No data available" in the middle of a canvas
+    def showNoData(self, canvas):
+        canvas.axes.text(0.5, 0.5, "No data available", horizontalalignment='center', verticalalignment='center',
+                         transform=canvas.axes.transAxes, color='#F0F0F0', fontsize=15, fontweight='bold')
+
+    # Updates the typing speed stats and charts of the last 30 days from the typing rollups
+    def updateTypingSpeed(self):
+        now = datetime.now()
+        startTime = now - timedelta(days=30)
+        days = getTypingSpeedByDay(self.conn, startTime)
+
+        today = now.strftime('%Y-%m-%d')
+        todaySpeed = [(averageWPM, peakWPM) for day, averageWPM, peakWPM in days if day == today]
+        if todaySpeed:
+            self.AverageWPMToday.setText(f"{todaySpeed[0][0]:.0f}")
+            self.PeakWPMToday.setText(f"{todaySpeed[0][1]:.0f}")
+        else:
+            self.AverageWPMToday.setText("0")
+            self.PeakWPMToday.setText("0")
+
+        self.typingSpeedCanvas.axes.cla()
+        if days:
+            dates = [datetime.strptime(day, '%Y-%m-%d') for day, _, _ in days]
+            self.typingSpeedCanvas.axes.plot(dates, [averageWPM for _, averageWPM, _ in days], label="Average WPM", color='#0FFF7D', marker='o', markersize=4)
+            self.typingSpeedCanvas.axes.plot(dates, [peakWPM for _, _, peakWPM in days], label="Peak WPM", color='#FFD60F', marker='o', markersize=4)
+            self.typingSpeedCanvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
+            self.typingSpeedCanvas.axes.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
+        else:
+            self.showNoData(self.typingSpeedCanvas)
+        self.styleChart(self.typingSpeedCanvas, "Day", "Words Per Minute", "Typing Speed")
+        self.typingSpeedCanvas.axes.grid(color='#354B6A', linestyle='-', linewidth=0.5)
+        self.typingSpeedCanvas.figure.subplots_adjust(top=0.85, bottom=0.2)
+        self.typingSpeedCanvas.draw()
+
+        intervalCharts = [
+            (self.burstCanvas, 'burst', BURST_BINS, str, "Keys", "Typing Bursts"),
+            (self.pauseCanvas, 'pause', PAUSE_BINS, formatPause, "Length", "Pauses Between Bursts"),
+        ]
+        for canvas, kind, bins, formatEdge, xlabel, title in intervalCharts:
+            counts = getTypingIntervalHistogram(self.conn, kind, startTime, bins)
+            canvas.axes.cla()
+            if any(counts):
+                canvas.axes.bar(range(len(counts)), counts, color='#0FFF7D', width=0.75)
+                canvas.axes.set_xticks(range(len(counts)))
+                canvas.axes.set_xticklabels(getBinLabels(bins, formatEdge), rotation=45)
+            else:
+                self.showNoData(canvas)
+            self.styleChart(canvas, xlabel, "Count", title)
+            canvas.figure.subplots_adjust(top=0.85, bottom=0.3)
+            canvas.draw()
+
+    # Updates the most common key sequences and layout stats for the selected period
+    def updateKeySequences(self):
+        matrix = getKeyTransitions(self.conn, *self.getSelectedDays(self.SequencePeriod))
+
+        topSequences = getTopSequences(matrix, 10)
+        handAlternation, sameFinger = getLayoutStats(matrix)
+        self.HandAlternation.setText(f"{handAlternation:.1f}%")
+        self.SameFingerSequences.setText(f"{sameFinger:.1f}%")
+
+        self.keySequencesCanvas.axes.cla()
+        if topSequences:
+            labels = [f"{self.formatKeyName(fromKey)} → {self.formatKeyName(toKey)}" for fromKey, toKey, _ in topSequences]
+            self.TopSequence.setText(labels[0])
+            self.keySequencesCanvas.axes.barh(labels[::-1], [count for _, _, count in topSequences][::-1], color='#0FFF7D')
+        else:
+            self.TopSequence.setText("-")
+            self.showNoData(self.keySequencesCanvas)
+        self.styleChart(self.keySequencesCanvas, "Times Typed", "", "Most Common Key Sequences")
+        self.keySequencesCanvas.figure.subplots_adjust(top=0.88, bottom=0.12, left=0.2)
+        self.keySequencesCanvas.draw()
+
+    # Updates the hold time stats and the median/99th percentile chart of the most pressed keys
+    def updateHoldTimes(self):
+        now = datetime.now()
+        startDay = (now - timedelta(days=HOLD_TIME_DAYS - 1)).strftime('%Y-%m-%d')
+        self.holdHistograms = getHoldHistograms(self.conn, startDay, now.strftime('%Y-%m-%d'))
+
+        mouseButtons = {'mouseleft', 'mouseright', 'mousemiddle'}
+        keyHistograms = {key: histogram for key, histogram in self.holdHistograms.items() if key not in mouseButtons}
+        keyTotal = mergeHistograms(keyHistograms.values())
+        clickTotal = mergeHistograms(histogram for button, histogram in self.holdHistograms.items() if button in mouseButtons)
+
+        for label, histogram, fraction in [(self.MedianKeyHold, keyTotal, 0.5), (self.P99KeyHold, keyTotal, 0.99), (self.MedianClickHold, clickTotal, 0.5)]:
+            holdTime = getPercentile(histogram, fraction)
+            label.setText(f"{holdTime:.3f}s" if holdTime is not None else "-")
+
+        # The 15 keys with the most holds, in keyboard order
+        topKeys = sorted(keyHistograms, key=lambda key: sum(keyHistograms[key]), reverse=True)[:15]
+        topKeys.sort()
+
+        self.holdTimesCanvas.axes.cla()
+        if topKeys:
+            positions = range(len(topKeys))
+            medians = [getPercentile(keyHistograms[key], 0.5) * 1000 for key in topKeys]
+            p99s = [getPercentile(keyHistograms[key], 0.99) * 1000 for key in topKeys]
+            self.holdTimesCanvas.axes.bar([p - 0.2 for p in positions], medians, width=0.4, label="Median", color='#0FFF7D')
+            self.holdTimesCanvas.axes.bar([p + 0.2 for p in positions], p99s, width=0.4, label="99th Percentile", color='#FFD60F')
+            self.holdTimesCanvas.axes.set_xticks(list(positions))
+            self.holdTimesCanvas.axes.set_xticklabels([self.formatKeyName(key) for key in topKeys], rotation=45)
+            self.holdTimesCanvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
+        else:
+            self.showNoData(self.holdTimesCanvas)
+        self.styleChart(self.holdTimesCanvas, "Key", "Hold Time (ms)", f"Hold Times of the Most Used Keys ({HOLD_TIME_DAYS} Days)")
+        self.holdTimesCanvas.figure.subplots_adjust(top=0.88, bottom=0.22)
+        self.holdTimesCanvas.draw()
+
+    # Updates the keys and clicks per foreground app for the selected period
+    def updateAppUsage(self):
+        appUsage = getAppUsage(self.conn, *self.getSelectedDays(self.AppUsagePeriod))
+        totalInputs = sum(keys + clicks for _, keys, clicks in appUsage)
+
+        self.appUsageCanvas.axes.cla()
+        if appUsage:
+            topApp, topKeys, topClicks = appUsage[0]
+            self.TopApp.setText(topApp)
+            self.AppsUsed.setText(f"{len(appUsage)}")
+            self.TopAppShare.setText(f"{(topKeys + topClicks) / totalInputs * 100:.1f}%" if totalInputs else "-")
+
+            topApps = appUsage[:10][::-1]
+            names = [app for app, _, _ in topApps]
+            keys = [keyCount for _, keyCount, _ in topApps]
+            clicks = [clickCount for _, _, clickCount in topApps]
+            self.appUsageCanvas.axes.barh(names, keys, label="Key Inputs", color='#0FFF7D')
+            self.appUsageCanvas.axes.barh(names, clicks, left=keys, label="Mouse Clicks", color='#FFD60F')
+            self.appUsageCanvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
+        else:
+            self.TopApp.setText("-")
+            self.AppsUsed.setText("0")
+            self.TopAppShare.setText("-")
+            self.showNoData(self.appUsageCanvas)
+        self.styleChart(self.appUsageCanvas, "Inputs", "", "Inputs Per App")
+        self.appUsageCanvas.figure.subplots_adjust(top=0.88, bottom=0.12, left=0.22)
+        self.appUsageCanvas.draw()
+
+    # Charts the keys and clicks of the visible span of the whole history. The resolution is the finest
+    # one that keeps the number of buckets under HISTORY_OVERSAMPLING points per pixel, and each series
+    # is then downsampled to the width of the chart
+    def updateHistoryChart(self):
+        now = toEventTime(datetime.now())
+        firstTime = getFirstActivityTime(self.conn)
+        self.historyBounds = (min(firstTime, now - HISTORY_MIN_SPAN) if firstTime else now - 86400000, now)
+        startTime, endTime = self.historyRange or self.historyBounds
+
+        canvas = self.historyCanvas
+        maxPoints = max(int(canvas.axes.bbox.width), 50)
+        level = getLevelForSpan(endTime - startTime, maxPoints * HISTORY_OVERSAMPLING)
+        levelSize = dict(LEVEL_SIZES)[level]
+        data = getActivityCounts(self.conn, level, startTime - levelSize, endTime)
+
+        canvas.axes.cla()
+        if data:
+            bucketStarts = [bucketStart for bucketStart, _, _ in data]
+            for column, label, color in ((1, "Keyboard Inputs", '#0FFF7D'), (2, "Mouse Clicks", '#FFD60F')):
+                times, counts = downsampleLTTB(bucketStarts, [row[column] for row in data], maxPoints)
+                canvas.axes.plot([fromEventTime(int(bucketStart)) for bucketStart in times], counts, label=label, color=color, linewidth=1)
+            canvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
+        else:
+            self.showNoData(canvas)
+        canvas.axes.set_xlim(fromEventTime(startTime), fromEventTime(endTime))
+        canvas.axes.xaxis.set_major_locator(mdates.AutoDateLocator())
+        canvas.axes.xaxis.set_major_formatter(mdates.ConciseDateFormatter(canvas.axes.xaxis.get_major_locator()))
+        self.styleChart(canvas, "Date", f"Inputs Per {level.capitalize()}", "Input History")
+        canvas.axes.grid(color='#354B6A', linestyle='-', linewidth=0.5)
+        canvas.figure.subplots_adjust(top=0.88, bottom=0.15)
+        canvas.draw()
+
+        self.HistoryResolution.setText(level.capitalize())
+        self.HistorySpan.setText(self.formatSpan(endTime - startTime))
+
+    # Formats a span in ms in the largest unit it has at least one of
+    def formatSpan(self, span):
+        for unit, size in reversed([('minutes', 60000), ('hours', 3600000), ('days', 86400000), ('years', 31556952000)]):
+            if span >= size:
+                return f"{span / size:.1f} {unit}"
+        return f"{span / 60000:.1f} minutes"
+
+    # Moves the history chart to a new range, kept inside the recorded history. The axes follow right
+    # away, and the data is read again once the range stops changing
+    def setHistoryRange(self, startTime, endTime):
+        if self.historyBounds is None:
+            return
+        firstTime, lastTime = self.historyBounds
+        span = min(max(endTime - startTime, HISTORY_MIN_SPAN), lastTime - firstTime)
+        startTime = min(max(startTime, firstTime), lastTime - span)
+        self.historyRange = None if span >= lastTime - firstTime else (startTime, startTime + span)
+
+        startTime, endTime = self.historyRange or self.historyBounds
+        self.historyCanvas.axes.set_xlim(fromEventTime(startTime), fromEventTime(endTime))
+        self.historyCanvas.draw_idle()
+        self.historyRefreshTimer.start(150)
+
+    # Zooms the history chart around xFraction (0 to 1 across the chart) by the scrolled steps
+    def zoomHistory(self, steps, xFraction):
+        if self.historyBounds is None:
+            return
+        startTime, endTime = self.historyRange or self.historyBounds
+        anchorTime = startTime + (endTime - startTime) * xFraction
+        span = (endTime - startTime) * HISTORY_ZOOM_STEP ** steps
+        self.setHistoryRange(int(anchorTime - span * xFraction), int(anchorTime + span * (1 - xFraction)))
+
+    # Starts dragging the history chart, or shows everything again on a double-click
+    def onHistoryPress(self, event):
+        if event.inaxes is not self.historyCanvas.axes or event.button != 1 or self.historyBounds is None:
+            return
+        if event.dblclick:
+            self.historyRange = None
+            self.requestRefresh('history')
+        else:
+            self.historyDrag = (event.x, self.historyRange or self.historyBounds)
+
+    def onHistoryDrag(self, event):
+        if self.historyDrag is None or event.x is None:
+            return
+        pressX, (startTime, endTime) = self.historyDrag
+        shift = int((pressX - event.x) / self.historyCanvas.axes.bbox.width * (endTime - startTime))
+        self.setHistoryRange(startTime + shift, endTime + shift)
+
+    def onHistoryRelease(self, event):
+        self.historyDrag = None
+
+    # Charts the average and maximum of the selected collector metric over the last COLLECTOR_HEALTH_HOURS
+    def updateCollectorHealth(self):
+        name = list(METRICS)[self.CollectorMetric.currentIndex()]
+        caption, unit = METRICS[name]
+        startTime = toEventTime(datetime.now() - timedelta(hours=COLLECTOR_HEALTH_HOURS))
+        samples = getCollectorMetrics(self.conn, name, startTime)
+
+        canvas = self.collectorHealthCanvas
+        canvas.axes.cla()
+        if samples:
+            times = [fromEventTime(sampleTime) for sampleTime, _, _ in samples]
+            canvas.axes.plot(times, [average for _, average, _ in samples], color='#0FFF7D', label="Average")
+            canvas.axes.plot(times, [maximum for _, _, maximum in samples], color='#FF5C5C', linewidth=0.8, label="Maximum")
+            canvas.axes.xaxis.set_major_formatter(mdates.DateFormatter('%I%p'))
+            canvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30', fontsize=8)
+        else:
+            self.showNoData(canvas)
+        self.styleChart(canvas, "", unit, caption)
+        canvas.figure.subplots_adjust(top=0.86, bottom=0.12, left=0.16)
+        canvas.draw()
+
     # Function for helping resize the homepage
     def resizeEvent(self, event):
         super(MainWindow, self).resizeEvent(event)
@@ -672,20 +1630,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     # Handles updating the timeline chart based on the date selected
     def updateTimelineChart(self, selectedDate):
-        cursor = self.conn.cursor()
         startDate = datetime(selectedDate.year(), selectedDate.month(), selectedDate.day())
         endDate = startDate + timedelta(days=1)
+        startTime, endTime = toEventTime(startDate), toEventTime(endDate)
 
-        cursor.execute('''
-            SELECT timestamp
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
+        data = sorted(queryEvents(self.conn, '''
+            SELECT time
+            FROM {events}
+            WHERE time BETWEEN ? AND ?
             AND (eventTypeID = 1 OR eventTypeID = 3)
-            ORDER BY timestamp
-        ''', (startDate.strftime('%Y-%m-%d %H:%M:%S'), endDate.strftime('%Y-%m-%d %H:%M:%S')))
-
-        data = cursor.fetchall()
-        cursor.close()
+        ''', (startTime, endTime), startTime, endTime))
 
         if not data:
             self.clearASDayChart()
@@ -694,7 +1648,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.ASDayChart.addWidget(noDataLabel)
             self.DATotalLabel.setText(f"On {selectedDate.toString('MMMM d')}, you were\nactive for a total of 0h 0m")
         else:
-            timestamps = [datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S') for row in data]
+            timestamps = [fromEventTime(row[0]) for row in data]
             sessions = self.calculateActiveSessions(timestamps)
             self.plotTimelineChart(sessions)
 
@@ -847,8 +1801,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     # Updates the information of the random key
     def updateRandomKeyStats(self, key):
-        totalCounts = getTotalCounts(self.conn)
-        longestDurations = getLifetimeLongestDurations(self.conn)
+        totalCounts, longestDurations = self.getCurrentTotals()
         keyCount = totalCounts.get(key, 0)
         longestDuration = longestDurations.get(key, 0)
 
@@ -865,103 +1818,36 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Sets the labels
         self.TotalPresses.setText(f"{keyCount}")
         self.LongestTimeHeld.setText(f"{longestDuration:.2f} seconds")
+        histogram = self.holdHistograms.get(key)
+        if histogram:
+            self.RandomKeyHoldTimes.setText(f"{getPercentile(histogram, 0.5):.3f}s / {getPercentile(histogram, 0.99):.3f}s")
+        else:
+            self.RandomKeyHoldTimes.setText("-")
         self.PercentOfTotal.setText(f"{percentOfTotal:.2f}%")
         self.RandomKeyRank.setText(f"#{keyRank}")
         
-    # Handles the key heatmap colors
-    def getColorFromScheme(self, scheme, intensity):
-        color = QColor()
-        if scheme == 'greenToRedScheme':
-            color.setHsvF(0.33 - 0.33 * intensity, 1, 1)  # Green to Red
-        elif scheme == 'greenScheme':
-            hue = 0.40 - 0.10 * intensity  # Adjust hue for the desired range
-            saturation = 1  # Adjust saturation for the desired range
-            value = 0.3 + 0.7 * intensity  # Adjust value for the desired range
-            color.setHsvF(hue, saturation, value)
-        return color
-        
     # Updates the key heatmap
     def updateKeyHeatmap(self, totalCounts):
-        keyWidgetMap = {
-            'a': self.AKey, 'b': self.BKey, 'c': self.CKey, 'd': self.DKey,
-            'e': self.EKey, 'f': self.FKey, 'g': self.GKey, 'h': self.HKey,
-            'i': self.IKey, 'j': self.JKey, 'k': self.KKey, 'l': self.LKey,
-            'm': self.MKey, 'n': self.NKey, 'o': self.OKey, 'p': self.PKey,
-            'q': self.QKey, 'r': self.RKey, 's': self.SKey, 't': self.TKey,
-            'u': self.UKey, 'v': self.VKey, 'w': self.WKey, 'x': self.XKey,
-            'y': self.YKey, 'z': self.ZKey, '1': self.OneKey, '2': self.TwoKey,
-            '3': self.ThreeKey, '4': self.FourKey, '5': self.FiveKey, '6': self.SixKey,
-            '7': self.SevenKey, '8': self.EightKey, '9': self.NineKey, '0': self.ZeroKey,
-            'enter': self.EnterKey, 'space': self.SpaceKey, 'backspace': self.BackspaceKey,
-            'tab': self.TabKey, 'capslock': self.CapslockKey, 'lshift': self.LShiftKey,
-            'rshift': self.RShiftKey, 'ctrl': self.CtrlKey, 'alt': self.AltKey, 'win': self.WinKey,
-            'left': self.LeftArrowKey, 'up': self.UpArrowKey, 'right': self.RightArrowKey,
-            'down': self.DownArrowKey, 'esc': self.EscKey, ';': self.SemicolonKey,
-            '=': self.EqualsKey, ',': self.CommaKey, '-': self.MinusKey,
-            '.': self.PeriodKey, '/': self.ForwardslashKey, '\\': self.BackslashKey,
-            "'": self.ApostropheKey, '[': self.LBracketKey, ']': self.RBracketKey
-        }
-
-        keyCounts = {}
-        for key in keyWidgetMap.keys():
-            if key in ['lshift', 'rshift']:
-                keyCounts[key] = totalCounts.get('shift', 0)
-            else:
-                keyCounts[key] = totalCounts.get(key, 0)
-
-        # Apply logarithmic scale to key counts
-        logKeyCounts = {key: math.log(count + 1) for key, count in keyCounts.items()}
-
-        minLogCount = min(logKeyCounts.values())
-        maxLogCount = max(logKeyCounts.values())
-
-        for key, widget in keyWidgetMap.items():
-            logCount = logKeyCounts[key]
-            if maxLogCount > minLogCount:
-                intensity = (logCount - minLogCount) / (maxLogCount - minLogCount)
-            else:
-                intensity = 0
-
-            # Calculate the color based on intensity
-            color = self.getColorFromScheme(self.colorScheme, intensity)
-
-            # Convert QColor to RGBA with opacity 0.85
-            r, g, b, _ = color.getRgb()
-            rgbaColor = f'rgba({r}, {g}, {b}, 0.85)'
-
-            # Preserve the existing styles and add background-color
-            newStyle = f'background-color: {rgbaColor};'
-            widget.setStyleSheet(f'{newStyle}')
+        self.keyboardHeatmap.setCounts(totalCounts)
 
     # Changes the color scheme of the keyboard heatmap when the button is pressed
     def toggleColorScheme(self, checked):
         stylesheet = self.styleSheet()
         if checked:
-            self.colorScheme = 'greenToRedScheme'
+            self.keyboardHeatmap.setColorScheme('greenToRedScheme')
             stylesheet = stylesheet.replace('background-color: qlineargradient(spread:pad, x1:0, y1:0.477682, x2:1, y2:0.472, stop:0 rgba(2, 67, 28, 255), stop:0.366086 rgba(1, 102, 0, 255), stop:0.692552 rgba(25, 157, 5, 255), stop:1 rgba(39, 219, 4, 255));', 'background-color: qlineargradient(spread:pad, x1:0.028, y1:0, x2:1, y2:0, stop:0 rgba(0, 255, 21, 255), stop:0.361111 rgba(249, 255, 0, 255), stop:0.638889 rgba(255, 255, 0, 255), stop:1 rgba(255, 0, 0, 255));')
         else:
-            self.colorScheme = 'greenScheme'
+            self.keyboardHeatmap.setColorScheme('greenScheme')
             stylesheet = stylesheet.replace('background-color: qlineargradient(spread:pad, x1:0.028, y1:0, x2:1, y2:0, stop:0 rgba(0, 255, 21, 255), stop:0.361111 rgba(249, 255, 0, 255), stop:0.638889 rgba(255, 255, 0, 255), stop:1 rgba(255, 0, 0, 255));', 'background-color: qlineargradient(spread:pad, x1:0, y1:0.477682, x2:1, y2:0.472, stop:0 rgba(2, 67, 28, 255), stop:0.366086 rgba(1, 102, 0, 255), stop:0.692552 rgba(25, 157, 5, 255), stop:1 rgba(39, 219, 4, 255));')
         self.HeatLegend.setStyleSheet(stylesheet)
-        self.updateKeyHeatmap(getTotalCounts(self.conn))
 
     # Changes the border radius on the keyboard heatmap when the button is pressed
     def toggleRoundedBorders(self, checked):
-        stylesheet = self.HeatmapContainer.styleSheet()
-        if checked:
-            stylesheet = stylesheet.replace('border-radius: 0px;', 'border-radius: 5px;')
-        else:
-            stylesheet = stylesheet.replace('border-radius: 5px;', 'border-radius: 0px;')
-        self.HeatmapContainer.setStyleSheet(stylesheet)
+        self.keyboardHeatmap.setRoundedCorners(checked)
 
     # Toggles letter visibility on the keyboard heatmap when the button is pressed
     def toggleKeyTextVisibility(self, checked):
-        stylesheet = self.HeatmapContainer.styleSheet()
-        if checked:
-            stylesheet = stylesheet.replace('color: transparent;', 'color: white;')
-        else:
-            stylesheet = stylesheet.replace('color: white;', 'color: transparent;')
-        self.HeatmapContainer.setStyleSheet(stylesheet)
+        self.keyboardHeatmap.setShowLetters(checked)
 
     # Toggles a darker overlay when the button is pressed
     def toggleHighContrast(self, checked):
@@ -1044,6 +1930,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     # Handles highlighting and changing the current index of the app's pages
     def eventFilter(self, source, event):
+        # Starts the second startup stage once the home page has painted
+        if event.type() == QEvent.Paint and source is self.centralWidget() and self.firstPaintTime is None:
+            self.firstPaintTime = time.perf_counter()
+            source.removeEventFilter(self)
+            QTimer.singleShot(0, self.finishStartup)
+            return False
         if event.type() == QEvent.MouseButtonPress and source is self.HomeMouseButton:
             self.Pages.setCurrentIndex(1)
             self.highlightButton(1)
@@ -1063,63 +1955,229 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         return super(MainWindow, self).eventFilter(source, event)
     
+    # Opens a database connection, profiled when profiling is on. URIs are allowed so old event
+    # partitions can be attached read-only
+    def connectDatabase(self, database):
+        if self.profiler:
+            conn = sqlite3.connect(database, factory=ProfilingConnection, uri=True)
+            conn.profiler = self.profiler
+            return conn
+        return sqlite3.connect(database, uri=True)
+
+    # Fills the machine selector with this PC, the other merged machines and all of them together
+    def loadMachines(self):
+        machines = [(LOCAL_SOURCE_NAME, DATABASE)]
+        if os.path.exists(MERGED_DATABASE):
+            setupMergedDatabase(MERGED_DATABASE)
+            with sqlite3.connect(MERGED_DATABASE) as conn:
+                machines += [(name, path) for _, name, path in getSources(conn) if name != LOCAL_SOURCE_NAME]
+        machines.append(("All Machines", MERGED_DATABASE))
+
+        self.MachineSelector.blockSignals(True)
+        self.MachineSelector.clear()
+        self.MachineSelector.addItems([name for name, _ in machines])
+        self.machineDatabases = [path for _, path in machines]
+        self.MachineSelector.blockSignals(False)
+
+    # Switches every page to the database of the machine picked in the selector
+    def showMachine(self, index):
+        database = self.machineDatabases[index]
+        if self.conn is not self.localConn:
+            self.conn.close()
+        self.removeViewedCopy()
+        if database == DATABASE:
+            self.conn = self.localConn
+        else:
+            # Other machines' databases are only read. An older layout is read from a set up copy
+            if database == MERGED_DATABASE:
+                setupMergedDatabase(database)
+                readableDatabase = database
+            elif os.path.exists(database):
+                readableDatabase = getReadableDatabase(database, VIEWED_COPY)
+            else:
+                self.MergeStatus.setText(f"Database not found: {database}")
+                self.MachineSelector.setCurrentIndex(0)
+                return
+            self.conn = self.connectDatabase(readableDatabase)
+        self.showingLocal = database == DATABASE
+
+        # Everything cached from the last database is dropped. The journal is only read with the local
+        # database: compacted segments are recorded in its journalSegments table, and the ids in the
+        # journal are its input ids
+        self.todayCounts = {}
+        self.historyRange = None
+        if not self.startupComplete:
+            return
+        for series in (self.liveMouseSeries, self.liveKeyboardSeries):
+            series.reset(self.showingLocal)
+        for series in self.bucketSeries:
+            series.clear()
+        self.requestRefresh(*self.refreshTasks)
+
+    # Deletes the copy of an older database made to view it, if there is one
+    def removeViewedCopy(self):
+        if os.path.exists(VIEWED_COPY):
+            os.remove(VIEWED_COPY)
+
+    # Adds the database of another machine to the merged databases and merges it in
+    def addMachineDatabase(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Add Database", "", "Databases (*.db)")
+        if not path:
+            return
+        name, accepted = QInputDialog.getText(self, "Add Database", "Machine name:", text=os.path.splitext(os.path.basename(path))[0])
+        if not accepted or not name.strip() or name.strip() in (LOCAL_SOURCE_NAME, "All Machines"):
+            return
+        setupMergedDatabase(MERGED_DATABASE)
+        with sqlite3.connect(MERGED_DATABASE) as conn:
+            addSource(conn, name.strip(), path)
+        self.startMerge()
+
+    # Merges the databases in the background, so the dashboard stays responsive
+    def startMerge(self):
+        self.MergeButton.setEnabled(False)
+        self.AddDatabaseButton.setEnabled(False)
+        self.MergeStatus.setText("Merging...")
+        threading.Thread(target=self.runMerge, daemon=True).start()
+
+    def runMerge(self):
+        try:
+            addedEvents, seconds = mergeDatabases(MERGED_DATABASE, DATABASE)
+            self.mergeBridge.mergeFinished.emit(f"Merged {addedEvents:,} new events in {seconds:.1f}s")
+        except (sqlite3.Error, OSError) as e:
+            self.mergeBridge.mergeFinished.emit(f"Merge failed: {e}")
+
+    def onMergeFinished(self, status):
+        self.MergeStatus.setText(status)
+        self.MergeButton.setEnabled(True)
+        self.AddDatabaseButton.setEnabled(True)
+        selected = self.machineDatabases[self.MachineSelector.currentIndex()]
+        self.loadMachines()
+        self.MachineSelector.blockSignals(True)
+        self.MachineSelector.setCurrentIndex(self.machineDatabases.index(selected) if selected in self.machineDatabases else 0)
+        self.MachineSelector.blockSignals(False)
+        if selected == MERGED_DATABASE:
+            for series in self.bucketSeries:
+                series.clear()
+            self.requestRefresh(*self.refreshTasks)
+
+    # Fills the backup selector with the backups, newest first
+    def loadBackups(self):
+        backups = getBackups(BACKUP_DIRECTORY)
+        self.BackupSelector.clear()
+        self.BackupSelector.addItems([backupTime.strftime("Backup of %b %d, %Y %I:%M %p") for _, backupTime, _ in backups] or ["No Backups"])
+        self.backupPaths = [path for _, _, path in backups]
+        self.RestoreButton.setEnabled(bool(backups))
+
+    # Runs a backup task in the background, so the dashboard stays responsive
+    def runBackupTask(self, status, task):
+        self.BackUpButton.setEnabled(False)
+        self.RestoreButton.setEnabled(False)
+        self.BackupStatus.setText(status)
+        threading.Thread(target=task, daemon=True).start()
+
+    def startBackup(self):
+        self.runBackupTask("Backing up...", self.runBackup)
+
+    def runBackup(self):
+        try:
+            _, storedChunks, totalChunks = createBackup(DATABASE, BACKUP_DIRECTORY)
+            rotateBackups(BACKUP_DIRECTORY, BACKUP_COUNT)
+            self.backupBridge.backupFinished.emit(f"Backed up ({storedChunks} of {totalChunks} MB changed)", False)
+        except (sqlite3.Error, OSError) as e:
+            self.backupBridge.backupFinished.emit(f"Backup failed: {e}", False)
+
+    # Restores the picked backup after asking. The current database is backed up first, so a restore can be undone
+    # The collector would keep writing its own state over a restored database, so it has to be stopped first
+    def isCollectorRunning(self):
+        return self.pushConnected or self.liveCounters.isAlive()
+
+    def startRestore(self):
+        if not self.backupPaths:
+            return
+        if self.isCollectorRunning():
+            self.BackupStatus.setText("Stop the collector before restoring a backup")
+            return
+        answer = QMessageBox.question(self, "Restore Backup", f"Replace this PC's stats with the {self.BackupSelector.currentText().lower()}?\n"
+                                      "A backup of the current stats is made first. Start the collector again afterwards.")
+        if answer != QMessageBox.Yes:
+            return
+        manifestPath = self.backupPaths[self.BackupSelector.currentIndex()]
+
+        # Partitions the dashboard has attached could not be replaced or deleted
+        detachPartitions(self.localConn)
+        self.runBackupTask("Restoring...", lambda: self.runRestore(manifestPath))
+
+    def runRestore(self, manifestPath):
+        try:
+            if self.isCollectorRunning():
+                self.backupBridge.backupFinished.emit("Stop the collector before restoring a backup", False)
+                return
+            createBackup(DATABASE, BACKUP_DIRECTORY)
+            restoreBackup(manifestPath, DATABASE)
+
+            # The journal holds events of the replaced stats, which must not be added to the restored ones
+            for _, path in getSegments(JOURNAL_DIRECTORY):
+                os.remove(path)
+            self.backupBridge.backupFinished.emit("Restored. Start the collector to continue from the backup", True)
+        except (sqlite3.Error, OSError, zlib.error) as e:
+            self.backupBridge.backupFinished.emit(f"Restore failed: {e}", False)
+
+    def onBackupFinished(self, status, restored):
+        self.BackupStatus.setText(status)
+        self.BackUpButton.setEnabled(True)
+        self.loadBackups()
+        if restored and self.showingLocal and self.startupComplete:
+            for series in (self.liveMouseSeries, self.liveKeyboardSeries):
+                series.reset(True)
+            for series in self.bucketSeries:
+                series.clear()
+            self.requestRefresh(*self.refreshTasks)
+
     # Handler for manual refreshes
     def handleManualRefresh(self):
-        self.updateAllPlots()
+        for series in self.bucketSeries:
+            series.clear()
+        self.requestRefresh(*self.refreshTasks)
         self.ManualRefreshButton.setEnabled(False)
         self.manualRefreshTimer.start(5000)  # Disable the button for 5 seconds
 
-    # Updates a ton of mouse stats
-    def updateMouseCounts(self, totalCounts, longestDurations):
-        # Updates total clicks
-        totalClicks = sum(totalCounts.get(name, 0) for name in ['mouseleft', 'mouseright', 'mousemiddle'])
-        self.TotalClicks.setText(f"{totalClicks}")
-        
-        # Updates total left clicks
-        totalLeftClicks = totalCounts.get('mouseleft', 0)
-        self.LCQS.setText(f"{totalLeftClicks}")
-        
-        # Updates total right clicks
-        totalRightClicks = totalCounts.get('mouseright', 0)
-        self.RCQS.setText(f"{totalRightClicks}")
-        
-        # Updates total middle clicks
-        totalMiddleClicks = totalCounts.get('mousemiddle', 0)
-        self.MMiddleQS.setText(f"{totalMiddleClicks}")
-        
-        # Updates total scrolls down
-        totalScrollsDown = totalCounts.get('scrolldown', 0)
-        self.SDQS.setText(f"{totalScrollsDown}")
-        
-        # Updates total scrolls up
-        totalScrollsUp = totalCounts.get('scrollup', 0)
-        self.SUQS.setText(f"{totalScrollsUp}")
-        
-        # Updates total scrolls
-        totalScrolls = totalScrollsDown + totalScrollsUp
-        self.ScrollTotal.setText(f"{totalScrolls} times.")
-        self.ScrollPixels.setText(f"{totalScrolls * 80} Pixels")
-        self.ScrollMiles.setText(f"{totalScrolls * 0.000621371:.3f} Miles")
-        
-        # Updates total mouse movements
-        totalMoves = totalCounts.get('mouseposition', 0)
-        self.MMoveQS.setText(f"{totalMoves}")
-
-        # Updates total clicks in the last 24 hours
-        clicksToday = getMouseClicksLast24Hours(self.conn)
-        self.ClicksToday.setText(f"{clicksToday}")
-        
-        # Updates longest clicks
-        longestClick = getLongestMouseClick(longestDurations)
-        self.LongestClick.setText(f" {longestClick} Seconds ")
-        
-        # Updates most used mouse button
-        favoriteMB = getMostUsedMouseButton(totalCounts)
-        self.FavoriteMouseButton.setText(f"{favoriteMB}")
-        
-        # Updates mouse distances
-        mouseDistanceMeters = totalCounts.get('mousedistance', 0)
-        mouseDistances = (
+    # Binds the mouse summary labels to the stats they show, computed from the totals and longest durations
+    def bindMouseLabels(self):
+        bind = self.labelBindings.bind
+
+        # Total clicks
+        bind(MOUSE_PAGE, [self.TotalClicks], lambda totalCounts, longestDurations: [
+            f"{sum(totalCounts.get(name, 0) for name in ['mouseleft', 'mouseright', 'mousemiddle'])}"])
+
+        # Total left, right and middle clicks, scrolls down and up and mouse movements
+        quickStats = [('mouseleft', self.LCQS), ('mouseright', self.RCQS), ('mousemiddle', self.MMiddleQS),
+                      ('scrolldown', self.SDQS), ('scrollup', self.SUQS), ('mouseposition', self.MMoveQS)]
+        bind(MOUSE_PAGE, [label for _, label in quickStats], lambda totalCounts, longestDurations: [
+            f"{totalCounts.get(name, 0)}" for name, _ in quickStats])
+
+        # Total scrolls
+        bind(MOUSE_PAGE, [self.ScrollTotal, self.ScrollPixels, self.ScrollMiles], lambda totalCounts, longestDurations: self.getScrollTexts(
+            totalCounts.get('scrolldown', 0) + totalCounts.get('scrollup', 0)))
+
+        # Total clicks in the last 24 hours
+        bind(MOUSE_PAGE, [self.ClicksToday], lambda totalCounts, longestDurations: [f"{self.getTodayCount('clicks')}"])
+
+        # Longest click
+        bind(MOUSE_PAGE, [self.LongestClick], lambda totalCounts, longestDurations: [f" {getLongestMouseClick(longestDurations)} Seconds "])
+
+        # Most used mouse button
+        bind(MOUSE_PAGE, [self.FavoriteMouseButton], lambda totalCounts, longestDurations: [f"{getMostUsedMouseButton(totalCounts)}"])
+
+        # Mouse distances
+        bind(MOUSE_PAGE, [self.MouseDistanceQS], lambda totalCounts, longestDurations: [self.getMouseDistanceText(totalCounts.get('mousedistance', 0))])
+
+    # Returns the texts of the total scrolls
+    def getScrollTexts(self, totalScrolls):
+        return [f"{totalScrolls} times.", f"{totalScrolls * 80} Pixels", f"{totalScrolls * 0.000621371:.3f} Miles"]
+
+    # Returns the mouse distance in every unit, one per line
+    def getMouseDistanceText(self, mouseDistanceMeters):
+        return (
             f"{mouseDistanceMeters * 3779.53:.0f}<br>"
             f"{mouseDistanceMeters * 3.28084:.2f}<br>"
             f"{mouseDistanceMeters * 0.000621371:.3f}<br>"
@@ -1127,54 +2185,64 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             f"{mouseDistanceMeters * 0.001:.2f}<br>"
             f"{mouseDistanceMeters * 1.057e-16:.7f}<br>"
         )
-        self.MouseDistanceQS.setText(mouseDistances)
-        
+
+    # Binds the keyboard summary labels to the stats they show, computed from the totals
+    def bindKeyboardLabels(self):
+        bind = self.labelBindings.bind
+
+        # Total inputs in the last 24 hours
+        bind(KEYBOARD_PAGE, [self.InputsToday], lambda totalCounts: [f"{self.getTodayCount('keys')}"])
+
+        # Most used special key
+        bind(KEYBOARD_PAGE, [self.FavoriteSpecialKey], lambda totalCounts: [f"{getFavoriteSpecialKey(totalCounts)}"])
+
+        # Least used key
+        bind(KEYBOARD_PAGE, [self.LeastUsedKey], lambda totalCounts: [f"{getLeastUsedKey(totalCounts)}"])
+
+        # Total keyboard inputs
+        bind(KEYBOARD_PAGE, [self.TotalInputs], lambda totalCounts: [f"{getTotalKeyInputs(totalCounts)}"])
+
+        # The 5 most and 5 least used letters, each as a letter and its count
+        for prefix, getLetters in (("KeyRank", getTop5Letters), ("BottomKeyRank", getBottom5Letters)):
+            labels = [getattr(self, f"{prefix}{i}{suffix}") for i in range(1, 6) for suffix in ("", "Count")]
+            bind(KEYBOARD_PAGE, labels, lambda totalCounts, getLetters=getLetters: [
+                text for letter, count in getLetters(totalCounts) for text in (f"{letter}", f"{count}")])
+
+        # Total number of number inputs and their real total
+        bind(KEYBOARD_PAGE, [self.NumberKeyInputs, self.RealNumberKeyTotal], lambda totalCounts: [
+            f"{value}" for value in getNumberKeyInputs(totalCounts)])
+
+    # Updates a ton of mouse stats
+    def updateMouseCounts(self, totalCounts, longestDurations):
+        self.labelBindings.update(MOUSE_PAGE, totalCounts, longestDurations)
+
     # Updates a ton of keyboard stats
     def updateKeyboardCounts(self, totalCounts):
-        # Updates the total inputs in the last 24 hours
-        inputsToday = getKeyInputsLast24Hours(self.conn)
-        self.InputsToday.setText(f"{inputsToday}")
-        
-        # Updates the most used special key
-        favoriteSpecialKey = getFavoriteSpecialKey(totalCounts)
-        self.FavoriteSpecialKey.setText(f"{favoriteSpecialKey}")
-        
-        # Updates the least used key
-        leastUsedKey = getLeastUsedKey(totalCounts)
-        self.LeastUsedKey.setText(f"{leastUsedKey}")
+        self.labelBindings.update(KEYBOARD_PAGE, totalCounts)
 
-        # Updates the total keyboard inputs
-        totalInputs = getTotalKeyInputs(totalCounts)
-        self.TotalInputs.setText(f"{totalInputs}")
-                
-        # Updates the 5 most used letters
-        top5Letters = getTop5Letters(totalCounts)
-        for i, (letter, count) in enumerate(top5Letters, start=1):
-            getattr(self, f"KeyRank{i}").setText(f"{letter}")
-            getattr(self, f"KeyRank{i}Count").setText(f"{count}")
-            
-        # Updates the 5 least used letters
-        bottom5Letters = getBottom5Letters(totalCounts)
-        for i, (letter, count) in enumerate(bottom5Letters, start=1):
-            getattr(self, f"BottomKeyRank{i}").setText(f"{letter}")
-            getattr(self, f"BottomKeyRank{i}Count").setText(f"{count}")
-
-        # Updates the total number of number inputs and their real total
-        numberKeyInputs, realNumberKeyTotal = getNumberKeyInputs(totalCounts)
-        self.NumberKeyInputs.setText(f"{numberKeyInputs}")
-        self.RealNumberKeyTotal.setText(f"{realNumberKeyTotal}")
-        
         # Updates the key heatmap
         self.updateKeyHeatmap(totalCounts)
 
-    # Calls the functions that use total counts
-    def updateAllTotals(self):
-        totalCounts = getTotalCounts(self.conn)
-        longestDurations = getLifetimeLongestDurations(self.conn)
+    # Calls the functions that use total counts on the mouse page
+    def updateMouseTotals(self):
+        totalCounts, longestDurations = self.getCurrentTotals()
         self.updateMouseCounts(totalCounts, longestDurations)
-        self.updatePieChart(totalCounts)
+
+        # Most pushes only change the mouse movement and distance, so the pie chart is only redrawn when
+        # the scrolls changed
+        pieInputs = (totalCounts.get('scrollup', 0), totalCounts.get('scrolldown', 0))
+        if self.drawnPieInputs.get('mouse') != pieInputs:
+            self.drawnPieInputs['mouse'] = pieInputs
+            self.updatePieChart(totalCounts)
+
+    # Calls the functions that use total counts on the keyboard page
+    def updateKeyboardTotals(self):
+        totalCounts, _ = self.getCurrentTotals()
         self.updateKeyboardCounts(totalCounts)
-        self.updateKBPieChart(totalCounts)
+        pieInputs = (totalCounts.get('space', 0), totalCounts.get('backspace', 0))
+        if self.drawnPieInputs.get('keyboard') != pieInputs:
+            self.drawnPieInputs['keyboard'] = pieInputs
+            self.updateKBPieChart(totalCounts)
         
     # Calls the functions that need to update plots more frequently
     def updateLivePlots(self):
@@ -1185,21 +2253,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def updateActiveInfo(self):
         self.updateActiveSessionInfo()
 
-    # Calls all of the functions that update plots
-    def updateAllPlots(self):
-        self.updateLivePlot()
-        self.updateDayPlot()
-        self.updateWeekPlot()
-        self.updateMonthPlot()
-        self.updateYearPlot()
-        self.updateLiveKeyboardPlot()
-        self.updateDayKeyboardPlot()
-        self.updateWeekKeyboardPlot()
-        self.updateMonthKeyboardPlot()
-        self.updateYearKeyboardPlot()
-        self.updateAvgDayInputsPlot()
-        self.updateActiveSessionInfo()
-        
     # Calls all of the functions that need to update plots less frequently
     def updateOtherPlots(self):
         self.updateDayPlot()
@@ -1214,56 +2267,61 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     # Updates a plot that shows mouse activity in the last hour
     def updateLivePlot(self):
+        if self.liveLine is None:
+            self.liveLine, self.liveNoDataText = self.setupLivePlot(self.liveCanvas, "Mouse Clicks", "Number of Clicks", "Live Mouse Clicks")
+        self.drawLivePlot(self.liveCanvas, self.liveLine, self.liveNoDataText, self.liveMouseSeries)
+
+    # Draws the axes, labels and an empty line of a live plot. Later updates only change the line's data
+    def setupLivePlot(self, canvas, label, ylabel, title):
+        canvas.axes.cla()
+
+        line, = canvas.axes.plot([], [], label=label, color='#0FFF7D', marker='o', markersize=6)
+        noDataText = canvas.axes.text(0.5, 0.5, "No data available", horizontalalignment='center', verticalalignment='center',
+                                      transform=canvas.axes.transAxes, color='#F0F0F0', fontsize=15, fontweight='bold')
+        canvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
+
+        canvas.axes.set_xlabel("Time", color='#F0F0F0', fontsize=12, labelpad=8)
+        canvas.axes.set_ylabel(ylabel, color='#F0F0F0', fontsize=12, labelpad=8)
+        canvas.axes.set_title(title, color='#F0F0F0', fontsize=15, fontweight='bold', pad=12)
+        canvas.axes.xaxis.set_major_formatter(mdates.DateFormatter('%I:%M %p'))
+        canvas.axes.xaxis.set_major_locator(mdates.MinuteLocator(interval=10))
+        canvas.axes.tick_params(axis='x', colors='white')
+        canvas.axes.tick_params(axis='y', colors='white')
+
+        canvas.axes.spines['bottom'].set_color('#F0F0F0')
+        canvas.axes.spines['top'].set_color('#263556')
+        canvas.axes.spines['right'].set_color('#263556')
+        canvas.axes.spines['left'].set_color('#F0F0F0')
+
+        canvas.axes.grid(color='#354B6A', linestyle='-', linewidth=0.5)
+        canvas.figure.subplots_adjust(top=0.88, bottom=0.15)
+        return line, noDataText
+
+    # Pulls new events into a live series and moves its existing line in place
+    def drawLivePlot(self, canvas, line, noDataText, series):
         now = datetime.now()
-        startTime = now - timedelta(hours=1)
-        data = getMouseClicksBetweenTimes(self.conn, startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S'))
-        
-        self.liveCanvas.axes.cla()
-        
-        if data:
-            timestamps, counts = zip(*data)
-            dates = [datetime.strptime(ts, '%Y-%m-%d %H:%M:%S') for ts in timestamps]
-            
-            self.liveCanvas.axes.plot(dates, counts, label="Mouse Clicks", color='#0FFF7D', marker='o', markersize=6, markevery=[-1])
-            self.liveCanvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
+        series.update(self.conn, now)
+        dates, counts = series.points()
+
+        line.set_data(dates, counts)
+        line.set_markevery([-1] if dates else None)
+        noDataText.set_visible(not dates)
+        canvas.axes.get_legend().set_visible(bool(dates))
+
+        if dates:
+            canvas.axes.relim()
+            canvas.axes.autoscale_view()
         else:
-            self.liveCanvas.axes.text(0.5, 0.5, "No data available", horizontalalignment='center', verticalalignment='center',
-                                    transform=self.liveCanvas.axes.transAxes, color='#F0F0F0', fontsize=15, fontweight='bold')
-            self.liveCanvas.axes.set_xlim(startTime, now)
-        
-        self.liveCanvas.axes.set_xlabel("Time", color='#F0F0F0', fontsize=12, labelpad=8)
-        self.liveCanvas.axes.set_ylabel("Number of Clicks", color='#F0F0F0', fontsize=12, labelpad=8)
-        self.liveCanvas.axes.set_title("Live Mouse Clicks", color='#F0F0F0', fontsize=15, fontweight='bold', pad=12)
-        self.liveCanvas.axes.xaxis.set_major_formatter(mdates.DateFormatter('%I:%M %p'))
-        self.liveCanvas.axes.xaxis.set_major_locator(mdates.MinuteLocator(interval=10))
-        self.liveCanvas.axes.tick_params(axis='x', colors='white')
-        self.liveCanvas.axes.tick_params(axis='y', colors='white')
-        
-        self.liveCanvas.axes.spines['bottom'].set_color('#F0F0F0')
-        self.liveCanvas.axes.spines['top'].set_color('#263556')
-        self.liveCanvas.axes.spines['right'].set_color('#263556')
-        self.liveCanvas.axes.spines['left'].set_color('#F0F0F0')
-        
-        self.liveCanvas.axes.grid(color='#354B6A', linestyle='-', linewidth=0.5)
-        self.liveCanvas.figure.subplots_adjust(top=0.88, bottom=0.15)
-        
-        self.liveCanvas.draw()
+            canvas.axes.set_xlim(now - series.window, now)
+
+        canvas.draw_idle()
 
     # Updates a plot that shows mouse activity in the last 24 hours
     def updateDayPlot(self):
         now = datetime.now()
         startTime = now - timedelta(days=1)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d %H', timestamp) as hour, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND button IN ('mouseright', 'mouseleft', 'mousemiddle')
-            GROUP BY hour
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.daySeries.getCounts(self.conn, startTime, now)
         self.dayCanvas.axes.cla()
         
         if data:
@@ -1300,16 +2358,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         now = datetime.now()
         startTime = now - timedelta(weeks=1)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d', timestamp) as day, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND button IN ('mouseright', 'mouseleft', 'mousemiddle')
-            GROUP BY day
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.weekSeries.getCounts(self.conn, startTime, now)
         self.weekCanvas.axes.cla()
         
         if data:
@@ -1346,16 +2395,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         now = datetime.now()
         startTime = now - timedelta(days=30)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d', timestamp) as day, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND button IN ('mouseright', 'mouseleft', 'mousemiddle')
-            GROUP BY day
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.monthSeries.getCounts(self.conn, startTime, now)
         self.monthCanvas.axes.cla()
         
         if data:
@@ -1392,16 +2432,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         now = datetime.now()
         startTime = now - timedelta(days=365)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m', timestamp) as month, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND button IN ('mouseright', 'mouseleft', 'mousemiddle')
-            GROUP BY month
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.yearSeries.getCounts(self.conn, startTime, now)
         self.yearCanvas.axes.cla()
         
         if data:
@@ -1435,58 +2466,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             
     # Updates a plot that shows keyboard activity in the last hour
     def updateLiveKeyboardPlot(self):
-        now = datetime.now()
-        startTime = now - timedelta(hours=1)
-        data = getKeyboardInputsBetweenTimes(self.conn, startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S'))
-        
-        self.keyboardLiveCanvas.axes.cla()
-
-        if data:
-            timestamps, counts = zip(*data)
-            dates = [datetime.strptime(ts, '%Y-%m-%d %H:%M:%S') for ts in timestamps]
-            
-            self.keyboardLiveCanvas.axes.plot(dates, counts, label="Keyboard Inputs", color='#0FFF7D', marker='o', markersize=6, markevery=[-1])
-            self.keyboardLiveCanvas.axes.legend(facecolor='#F0F0F0', edgecolor='#171C30')
-        else:
-            self.keyboardLiveCanvas.axes.text(0.5, 0.5, "No data available", horizontalalignment='center', verticalalignment='center',
-                                            transform=self.keyboardLiveCanvas.axes.transAxes, color='#F0F0F0', fontsize=15, fontweight='bold')
-            self.keyboardLiveCanvas.axes.set_xlim(startTime, now)
-        
-        self.keyboardLiveCanvas.axes.set_xlabel("Time", color='#F0F0F0', fontsize=12, labelpad=8)
-        self.keyboardLiveCanvas.axes.set_ylabel("Number of Inputs", color='#F0F0F0', fontsize=12, labelpad=8)
-        self.keyboardLiveCanvas.axes.set_title("Live Keyboard Inputs", color='#F0F0F0', fontsize=15, fontweight='bold', pad=12)
-        
-        self.keyboardLiveCanvas.axes.xaxis.set_major_formatter(mdates.DateFormatter('%I:%M %p'))
-        self.keyboardLiveCanvas.axes.xaxis.set_major_locator(mdates.MinuteLocator(interval=10))
-        
-        self.keyboardLiveCanvas.axes.tick_params(axis='x', colors='white')
-        self.keyboardLiveCanvas.axes.tick_params(axis='y', colors='white')
-        
-        self.keyboardLiveCanvas.axes.spines['bottom'].set_color('#F0F0F0')
-        self.keyboardLiveCanvas.axes.spines['top'].set_color('#263556')
-        self.keyboardLiveCanvas.axes.spines['right'].set_color('#263556')
-        self.keyboardLiveCanvas.axes.spines['left'].set_color('#F0F0F0')
-        
-        self.keyboardLiveCanvas.axes.grid(color='#354B6A', linestyle='-', linewidth=0.5)
-        self.keyboardLiveCanvas.figure.subplots_adjust(top=0.88, bottom=0.15)
-        
-        self.keyboardLiveCanvas.draw()
+        if self.keyboardLiveLine is None:
+            self.keyboardLiveLine, self.keyboardLiveNoDataText = self.setupLivePlot(self.keyboardLiveCanvas, "Keyboard Inputs", "Number of Inputs", "Live Keyboard Inputs")
+        self.drawLivePlot(self.keyboardLiveCanvas, self.keyboardLiveLine, self.keyboardLiveNoDataText, self.liveKeyboardSeries)
 
     # Updates a plot that shows keyboard activity in the last 24 hours
     def updateDayKeyboardPlot(self):
         now = datetime.now()
         startTime = now - timedelta(days=1)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d %H', timestamp) as hour, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND eventTypeID = 1
-            GROUP BY hour
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.keyboardDaySeries.getCounts(self.conn, startTime, now)
         self.keyboardDayCanvas.axes.cla()
         
         if data:
@@ -1525,16 +2514,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         now = datetime.now()
         startTime = now - timedelta(weeks=1)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d', timestamp) as day, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND eventTypeID = 1
-            GROUP BY day
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.keyboardWeekSeries.getCounts(self.conn, startTime, now)
         self.keyboardWeekCanvas.axes.cla()
         
         if data:
@@ -1571,16 +2551,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         now = datetime.now()
         startTime = now - timedelta(days=30)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d', timestamp) as day, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND eventTypeID = 1
-            GROUP BY day
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.keyboardMonthSeries.getCounts(self.conn, startTime, now)
         self.keyboardMonthCanvas.axes.cla()
         
         if data:
@@ -1617,16 +2588,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         now = datetime.now()
         startTime = now - timedelta(days=365)
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT strftime('%Y-%m', timestamp) as month, COUNT(*)
-            FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND eventTypeID = 1
-            GROUP BY month
-        ''', (startTime.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S')))
-        
-        data = cursor.fetchall()
+        data = self.keyboardYearSeries.getCounts(self.conn, startTime, now)
         self.keyboardYearCanvas.axes.cla()
         
         if data:
@@ -1778,27 +2740,19 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     # Handles updating the time of a current active session and the last active session
     def updateActiveSessionInfo(self):
-        cursor = self.conn.cursor()
-        
         # Get the latest keyboard or mouse event
-        cursor.execute('''
-            SELECT timestamp
-            FROM events
-            WHERE eventTypeID IN (1, 3)
-            ORDER BY timestamp DESC
-            LIMIT 1
-        ''')
-        latestEvent = cursor.fetchone()
+        latestTime = getLatestInputTime(self.conn)
+        sessions = getActiveSessions(self.conn) if latestTime is not None else []
 
         # Calculate the time difference from now to the latest event
-        if latestEvent:
-            latestEventTime = datetime.strptime(latestEvent[0], '%Y-%m-%d %H:%M:%S')
+        if latestTime is not None:
+            latestEventTime = fromEventTime(latestTime)
             now = datetime.now()
             timeDifference = now - latestEventTime
 
             # Finds the start time of the current active session
             if timeDifference <= timedelta(minutes=15):
-                sessionStartTime = self.findSessionStartTime(cursor, latestEventTime)
+                sessionStartTime = self.findSessionStartTime(sessions)
                 sessionDuration = now - sessionStartTime
                 minsAgo = int(sessionDuration.total_seconds() // 60)
                 self.CASText.setText(f"Your current active session started <b>{minsAgo} minutes ago</b>.")
@@ -1807,95 +2761,46 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         else:
             self.CASText.setText("You are not currently in an active session.")
 
-        self.updateLastActiveSession(cursor, latestEventTime if latestEvent else None)
+        self.updateLastActiveSession(sessions)
 
-        cursor.close()
+    # Finds when the user's current session started: the start of the latest session
+    def findSessionStartTime(self, sessions):
+        return fromEventTime(sessions[-1][0])
 
-    # Finds how long ago the user's current session started
-    def findSessionStartTime(self, cursor, latestEventTime):
-        cursor.execute('''
-            SELECT timestamp
-            FROM events
-            WHERE eventTypeID IN (1, 3)
-            AND timestamp <= ?
-            ORDER BY timestamp DESC
-        ''', (latestEventTime.strftime('%Y-%m-%d %H:%M:%S'),))
-        events = cursor.fetchall()
+    # Finds the start and end time of the previous active session
+    def updateLastActiveSession(self, sessions):
+        if not sessions:
+            self.LASText.setText("Your last active session was not found.")
+            return
 
-        sessionStartTime = latestEventTime
-        for i in range(len(events) - 1):
-            currentEventTime = datetime.strptime(events[i][0], '%Y-%m-%d %H:%M:%S')
-            previousEventTime = datetime.strptime(events[i+1][0], '%Y-%m-%d %H:%M:%S')
-            if (currentEventTime - previousEventTime) > timedelta(minutes=15):
-                break
-            sessionStartTime = previousEventTime
+        # The last session ends with the last input before the current session
+        currentSessionStart, previousTime = sessions[-1]
+        if previousTime is None:
+            previousTime = getLatestInputTime(self.conn, endTime=currentSessionStart)
+        if previousTime is None:
+            self.LASText.setText("Your last active session was not found.")
+            return
 
-        return sessionStartTime
+        lastSessionEnd = fromEventTime(previousTime)
+        lastSessionStart = fromEventTime(max(sessionStart for sessionStart, _ in sessions if sessionStart <= previousTime))
 
-    # Finds the start and end time of the previous active session
-    def updateLastActiveSession(self, cursor, latestEventTime):
-        if latestEventTime:
-            cursor.execute('''
-                SELECT timestamp
-                FROM events
-                WHERE eventTypeID IN (1, 3)
-                AND timestamp <= ?
-                ORDER BY timestamp DESC
-            ''', (latestEventTime.strftime('%Y-%m-%d %H:%M:%S'),))
-            events = cursor.fetchall()
-            if events:
-                for i in range(len(events) - 1):
-                    currentEventTime = datetime.strptime(events[i][0], '%Y-%m-%d %H:%M:%S')
-                    previousEventTime = datetime.strptime(events[i+1][0], '%Y-%m-%d %H:%M:%S')
-                    if (currentEventTime - previousEventTime) > timedelta(minutes=15):
-                        currentSessionStart = datetime.strptime(events[i][0], '%Y-%m-%d %H:%M:%S')
-                        break
-                else:
-                    currentSessionStart = datetime.strptime(events[-1][0], '%Y-%m-%d %H:%M:%S')
-
-                # Finds the last session before the current session
-                cursor.execute('''
-                    SELECT timestamp
-                    FROM events
-                    WHERE eventTypeID IN (1, 3)
-                    AND timestamp < ?
-                    ORDER BY timestamp DESC
-                ''', (currentSessionStart.strftime('%Y-%m-%d %H:%M:%S'),))
-                previousEvent = cursor.fetchall()
-
-                if not previousEvent:
-                    self.LASText.setText("Your last active session was not found.")
-                    return
-
-                lastSessionEnd = datetime.strptime(previousEvent[0][0], '%Y-%m-%d %H:%M:%S')
-                for i in range(len(previousEvent) - 1):
-                    currentEventTime = datetime.strptime(previousEvent[i][0], '%Y-%m-%d %H:%M:%S')
-                    previousEventTime = datetime.strptime(previousEvent[i+1][0], '%Y-%m-%d %H:%M:%S')
-                    if (currentEventTime - previousEventTime) > timedelta(minutes=15):
-                        lastSessionStart = datetime.strptime(previousEvent[i][0], '%Y-%m-%d %H:%M:%S')
-                        break
-                else:
-                    lastSessionStart = datetime.strptime(previousEvent[-1][0], '%Y-%m-%d %H:%M:%S')
+        # Formats the times
+        startDateStr = lastSessionStart.strftime('%b-%d')
+        startTimeStr = lastSessionStart.strftime('%I:%M%p').lower().lstrip('0')
+        endDateStr = lastSessionEnd.strftime('%b-%d')
+        endTimeStr = lastSessionEnd.strftime('%I:%M%p').lower().lstrip('0')
 
-                # Formats the times
-                startDateStr = lastSessionStart.strftime('%b-%d')
-                startTimeStr = lastSessionStart.strftime('%I:%M%p').lower().lstrip('0')
-                endDateStr = lastSessionEnd.strftime('%b-%d')
-                endTimeStr = lastSessionEnd.strftime('%I:%M%p').lower().lstrip('0')
-
-                if startDateStr == endDateStr:
-                    self.LASText.setText(f"Your last active session was from <b>{startDateStr} at {startTimeStr} to {endTimeStr}</b>.")
-                else:
-                    self.LASText.setText(f"Your last active session was from <b>{startDateStr} at {startTimeStr} to {endDateStr} at {endTimeStr}.</b>")
-            else:
-                self.LASText.setText("Your last active session was not found.")
+        if startDateStr == endDateStr:
+            self.LASText.setText(f"Your last active session was from <b>{startDateStr} at {startTimeStr} to {endTimeStr}</b>.")
         else:
-            self.LASText.setText("Your last active session was not found.")
-            
+            self.LASText.setText(f"Your last active session was from <b>{startDateStr} at {startTimeStr} to {endDateStr} at {endTimeStr}.</b>")
+
     # Close database when the app closes
     def closeDatabaseConnection(self):
+        shutdownExecutor()
         if self.conn:
             self.conn.close()
+        self.removeViewedCopy()
 
 if __name__ == '__main__':
     app = QApplication([])
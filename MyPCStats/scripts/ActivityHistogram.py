@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import threading
+
+# Inputs are counted in 168 hour-of-week slots: slot = weekday * 24 + hour, with Monday as weekday 0 (local time).
+# The days that had any input are kept as well, so averages are divided by the days that were really recorded
+HOURS_PER_WEEK = 7 * 24
+
+# Hour-of-week input counter used by the collector. Counts build up in memory and flush() adds them
+# to the activityHourOfWeek and activeDays tables
+class ActivityHistogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slot = None
+        self.nextHourStart = None
+        self.pendingCounts = {}
+        self.pendingDays = set()
+
+    # Counts an input at eventTime (in ms)
+    def addInput(self, eventTime):
+        with self.lock:
+            # The slot is only worked out again once an input crosses into the next hour
+            if self.nextHourStart is None or eventTime >= self.nextHourStart:
+                date = datetime.fromtimestamp(eventTime / 1000)
+                hourStart = date.replace(minute=0, second=0, microsecond=0)
+                self.slot = date.weekday() * 24 + date.hour
+                self.nextHourStart = int((hourStart + timedelta(hours=1)).timestamp() * 1000)
+                self.pendingDays.add((date.strftime('%Y-%m-%d'), date.weekday()))
+            self.pendingCounts[self.slot] = self.pendingCounts.get(self.slot, 0) + 1
+
+    # Adds the pending counts and days to the database
+    def flush(self, conn):
+        with self.lock:
+            pendingCounts, pendingDays = self.pendingCounts, self.pendingDays
+            self.pendingCounts, self.pendingDays = {}, set()
+
+        if not pendingCounts:
+            return
+        conn.executemany('''
+            INSERT INTO activityHourOfWeek (slot, count) VALUES (?, ?)
+            ON CONFLICT(slot) DO UPDATE SET count = count + excluded.count
+        ''', pendingCounts.items())
+        conn.executemany('INSERT OR IGNORE INTO activeDays (day, weekday) VALUES (?, ?)', pendingDays)
+        conn.commit()
+
+    # Fills empty tables from the key and click events already in the database
+    def backfill(self, conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM activityHourOfWeek')
+        if cursor.fetchone()[0]:
+            return
+        # strftime('%w') counts from Sunday, so it is moved to start on Monday like datetime.weekday()
+        cursor.execute('''
+            INSERT INTO activityHourOfWeek (slot, count)
+            SELECT ((CAST(strftime('%w', time / 1000, 'unixepoch', 'localtime') AS INTEGER) + 6) % 7) * 24
+                   + CAST(strftime('%H', time / 1000, 'unixepoch', 'localtime') AS INTEGER) AS slot, COUNT(*)
+            FROM events
+            WHERE eventTypeID IN (1, 3)
+            GROUP BY slot
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO activeDays (day, weekday)
+            SELECT DISTINCT strftime('%Y-%m-%d', time / 1000, 'unixepoch', 'localtime'),
+                   (CAST(strftime('%w', time / 1000, 'unixepoch', 'localtime') AS INTEGER) + 6) % 7
+            FROM events
+            WHERE eventTypeID IN (1, 3)
+        ''')
+        conn.commit()
+
+# Reads the 168 hour-of-week counts and the number of recorded days of each weekday
+def getHourOfWeekCounts(conn):
+    cursor = conn.cursor()
+    counts = [0] * HOURS_PER_WEEK
+    cursor.execute('SELECT slot, count FROM activityHourOfWeek')
+    for slot, count in cursor.fetchall():
+        counts[slot] = count
+    dayCounts = [0] * 7
+    cursor.execute('SELECT weekday, COUNT(*) FROM activeDays GROUP BY weekday')
+    for weekday, dayCount in cursor.fetchall():
+        dayCounts[weekday] = dayCount
+    cursor.close()
+    return counts, dayCounts
+
+# Finds the average inputs of every hour of the day over the days that had any input
+def getAverageInputsPerHour(conn):
+    counts, dayCounts = getHourOfWeekCounts(conn)
+    totalDays = sum(dayCounts)
+    if not totalDays:
+        return [(hour, 0) for hour in range(24)]
+    return [(hour, sum(counts[weekday * 24 + hour] for weekday in range(7)) / totalDays) for hour in range(24)]
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from EventPartitions import queryEvents
+import threading
+
+# Key and click counts are kept at three resolutions (the levels of the pyramid), each bucket keyed by
+# the ms time of its local start. Minutes are not stored, they are counted from the events table when
+# a short enough span is shown
+LEVELS = ('hour', 'day', 'month')
+
+# Approximate length in ms of a bucket of each resolution, from finest to coarsest
+LEVEL_SIZES = [('minute', 60000), ('hour', 3600000), ('day', 86400000), ('month', 2629746000)]
+
+# strftime format of the local start of a bucket of each level, used to backfill from the events table
+LEVEL_START_FORMATS = {'hour': '%Y-%m-%d %H:00:00', 'day': '%Y-%m-%d 00:00:00', 'month': '%Y-%m-01 00:00:00'}
+
+# Returns the finest resolution that fits a span (in ms) in at most maxPoints buckets
+def getLevelForSpan(span, maxPoints):
+    for level, size in LEVEL_SIZES:
+        if span / size <= maxPoints:
+            return level
+    return LEVEL_SIZES[-1][0]
+
+# Hour, day and month counter used by the collector. Counts build up in memory and flush() adds them
+# to the activityPyramid table
+class ActivityPyramid:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bucketStarts = None
+        self.nextHourStart = None
+        self.pendingCounts = {}
+
+    # Counts an input of the given kind (0 for keys, 1 for clicks) at eventTime (in ms)
+    def addInput(self, kind, eventTime):
+        with self.lock:
+            # Day and month starts can only change with the hour, so they are worked out together
+            if self.nextHourStart is None or eventTime >= self.nextHourStart:
+                hourStart = datetime.fromtimestamp(eventTime / 1000).replace(minute=0, second=0, microsecond=0)
+                dayStart = hourStart.replace(hour=0)
+                monthStart = dayStart.replace(day=1)
+                self.bucketStarts = [int(start.timestamp() * 1000) for start in (hourStart, dayStart, monthStart)]
+                self.nextHourStart = int((hourStart + timedelta(hours=1)).timestamp() * 1000)
+
+            for level, bucketStart in zip(LEVELS, self.bucketStarts):
+                key = (level, bucketStart)
+                if key not in self.pendingCounts:
+                    self.pendingCounts[key] = [0, 0]
+                self.pendingCounts[key][kind] += 1
+
+    # Adds the pending counts to the database
+    def flush(self, conn):
+        with self.lock:
+            pendingCounts = self.pendingCounts
+            self.pendingCounts = {}
+
+        if not pendingCounts:
+            return
+        conn.executemany('''
+            INSERT INTO activityPyramid (level, bucketStart, keyCount, clickCount)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(level, bucketStart) DO UPDATE SET
+                keyCount = keyCount + excluded.keyCount,
+                clickCount = clickCount + excluded.clickCount
+        ''', [(level, bucketStart, keys, clicks) for (level, bucketStart), (keys, clicks) in pendingCounts.items()])
+        conn.commit()
+
+    # Fills an empty table from the key and click events already in the database
+    def backfill(self, conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM activityPyramid')
+        if cursor.fetchone()[0]:
+            return
+        # The local start of each bucket is turned back into epoch ms with the 'utc' modifier
+        for level in LEVELS:
+            cursor.execute(f'''
+                INSERT INTO activityPyramid (level, bucketStart, keyCount, clickCount)
+                SELECT ?, CAST(strftime('%s', strftime('{LEVEL_START_FORMATS[level]}', time / 1000, 'unixepoch', 'localtime'), 'utc') AS INTEGER) * 1000 AS bucketStart,
+                       SUM(eventTypeID = 1), SUM(eventTypeID = 3)
+                FROM events
+                WHERE eventTypeID IN (1, 3)
+                GROUP BY bucketStart
+            ''', (level,))
+        conn.commit()
+
+# Finds the (bucket start, keys, clicks) of every bucket of a level with inputs from startTime to endTime (in ms)
+def getActivityCounts(conn, level, startTime, endTime):
+    # A minute never spans two monthly partitions, so the minutes of each partition are simply put together
+    if level == 'minute':
+        return sorted(queryEvents(conn, '''
+            SELECT time / 60000 * 60000 as bucketStart, SUM(eventTypeID = 1), SUM(eventTypeID = 3)
+            FROM {events}
+            WHERE eventTypeID IN (1, 3)
+            AND time BETWEEN ? AND ?
+            GROUP BY bucketStart
+        ''', (startTime, endTime), startTime, endTime))
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT bucketStart, keyCount, clickCount
+        FROM activityPyramid
+        WHERE level = ?
+        AND bucketStart BETWEEN ? AND ?
+        ORDER BY bucketStart
+    ''', (level, startTime, endTime))
+    data = cursor.fetchall()
+    cursor.close()
+    return data
+
+# Returns the ms time of the first recorded input, or None if there are none
+def getFirstActivityTime(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(bucketStart) FROM activityPyramid WHERE level = 'hour'")
+    firstTime = cursor.fetchone()[0]
+    cursor.close()
+    return firstTime
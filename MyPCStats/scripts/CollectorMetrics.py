@@ -0,0 +1,99 @@
+import threading
+import time
+
+# Metrics are sampled into the collectorMetrics table every METRICS_INTERVAL seconds and kept for METRICS_RETENTION_DAYS
+METRICS_INTERVAL = 60
+METRICS_RETENTION_DAYS = 30
+
+# Metrics recorded by the collector, with the caption and unit the dashboard shows them with
+METRICS = {
+    'callbackLatency': ("Input Callback Time", 'ms'),
+    'writeLatency': ("Database Write Time", 'ms'),
+    'rollupFlushTime': ("Rollup Flush Time", 'ms'),
+    'rollupBatchSize': ("Rollup Rows Per Flush", 'rows'),
+    'compactionTime': ("Journal Compaction Time", 'ms'),
+    'compactedEvents': ("Events Per Compaction", 'events'),
+    'journalBacklog': ("Journal Segments Waiting", 'segments'),
+    'queueDepth': ("Event Queue Depth", 'items'),
+    'queueHighWater': ("Event Queue High Water", 'items'),
+    'droppedEvents': ("Dropped Events", 'events'),
+    'collapsedMoves': ("Collapsed Mouse Moves", 'moves'),
+    'spilledEvents': ("Events Spilled To Journal", 'events'),
+    'backupTime': ("Backup Time", 'ms'),
+    'undeletedPartitions': ("Old Event Months Not Deleted", 'months'),
+    'databaseSize': ("Database Size", 'MB'),
+    'cpuPercent': ("Collector CPU", '%'),
+    'memoryRSS': ("Collector Memory", 'MB'),
+}
+
+# Collector self-telemetry. Recorded values (like timings) are summed up between samples as a count,
+# total and maximum, and gauges are functions that are read once per sample. sample() writes one row
+# per metric to the collectorMetrics table
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.gauges = {}
+
+    # Records one value of a metric
+    def record(self, name, value):
+        with self.lock:
+            summary = self.pending.get(name)
+            if summary is None:
+                self.pending[name] = [1, value, value]
+            else:
+                summary[0] += 1
+                summary[1] += value
+                if value > summary[2]:
+                    summary[2] = value
+
+    # Wraps a function so the ms it takes is recorded under name
+    def timed(self, name, function):
+        def timedFunction(*args, **kwargs):
+            startTime = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter_ns() - startTime) / 1e6)
+        return timedFunction
+
+    # Adds a metric that is read by calling readValue() when sampling
+    def addGauge(self, name, readValue):
+        self.gauges[name] = readValue
+
+    # Writes the values recorded since the last sample and the current gauges at sampleTime (in ms)
+    def sample(self, conn, sampleTime):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+
+        rows = [(sampleTime, name, count, total, maximum) for name, (count, total, maximum) in pending.items()]
+        for name, readValue in self.gauges.items():
+            try:
+                value = readValue()
+            except Exception:
+                continue
+            rows.append((sampleTime, name, 1, value, value))
+
+        conn.executemany('''
+            INSERT OR REPLACE INTO collectorMetrics (time, name, count, total, maximum)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+
+        # Old samples are removed per metric, so the delete can use the (name, time) key
+        oldestTime = sampleTime - METRICS_RETENTION_DAYS * 86400000
+        conn.executemany('DELETE FROM collectorMetrics WHERE name = ? AND time < ?', [(row[1], oldestTime) for row in rows])
+        conn.commit()
+
+# Finds the (time, average, maximum) samples of a metric since startTime (in ms)
+def getCollectorMetrics(conn, name, startTime):
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT time, total / count, maximum
+        FROM collectorMetrics
+        WHERE name = ? AND time >= ?
+        ORDER BY time
+    ''', (name, startTime))
+    data = cursor.fetchall()
+    cursor.close()
+    return data
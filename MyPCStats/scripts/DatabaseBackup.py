@@ -0,0 +1,199 @@
+from datetime import datetime
+from EventPartitions import getPartitionDirectory, getPartitionMonths, getPartitionPath, syncNextEventID
+import hashlib
+import sqlite3
+import zlib
+import time
+import os
+
+# The collector backs the database up every BACKUP_INTERVAL seconds and keeps the newest BACKUP_COUNT backups
+BACKUP_INTERVAL = 86400
+BACKUP_COUNT = 7
+
+# The database is copied BACKUP_STEP_PAGES pages at a time, letting the collector write in between.
+# A write from another connection restarts the copy, so after MAX_BACKUP_RESTARTS restarts the rest is
+# copied in one step. The collector's writes then wait on the lock, with the event queue holding the inputs
+BACKUP_STEP_PAGES = 1024
+BACKUP_STEP_SLEEP = 0.005
+MAX_BACKUP_RESTARTS = 5
+
+# Backups are stored as a manifest listing the chunks of the database file. Chunks are compressed and
+# named by their hash, so a chunk that did not change since the last backup is stored only once
+CHUNK_SIZE = 1048576
+CHUNK_DIRECTORY = 'chunks'
+MANIFEST_EXTENSION = '.backup'
+BACKUP_NAME_FORMAT = 'InputDB-%Y%m%d-%H%M%S'
+
+# Chunks that no manifest lists are only deleted once they are this many seconds old, so a backup that
+# is being written at the same time keeps the chunks it reuses
+CHUNK_GRACE_PERIOD = 3600
+
+class BackupRestarted(Exception):
+    pass
+
+# Copies one open database into another with the backup API
+def copyDatabase(source, target):
+    progressState = {'remaining': None, 'restarts': 0}
+
+    def onProgress(status, remaining, total):
+        if progressState['remaining'] is not None and remaining > progressState['remaining']:
+            progressState['restarts'] += 1
+            if progressState['restarts'] > MAX_BACKUP_RESTARTS:
+                raise BackupRestarted()
+        progressState['remaining'] = remaining
+
+    try:
+        source.backup(target, pages=BACKUP_STEP_PAGES, progress=onProgress, sleep=BACKUP_STEP_SLEEP)
+    except BackupRestarted:
+        source.backup(target)
+
+# Returns the path of a chunk
+def getChunkPath(directory, chunkHash):
+    return os.path.join(directory, CHUNK_DIRECTORY, chunkHash)
+
+# Returns the (name, time, path) of every backup in a directory, newest first
+def getBackups(directory):
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for fileName in os.listdir(directory):
+        name, extension = os.path.splitext(fileName)
+        if extension != MANIFEST_EXTENSION:
+            continue
+        try:
+            backupTime = datetime.strptime(name, BACKUP_NAME_FORMAT)
+        except ValueError:
+            continue
+        backups.append((name, backupTime, os.path.join(directory, fileName)))
+    return sorted(backups, key=lambda backup: backup[1], reverse=True)
+
+# Returns the files of a database, relative to its folder: its event partitions, then the database. The
+# database comes last so a backup's next event id is past the ids of every partition copied before it
+def getDatabaseFiles(database):
+    partitionDirectory = getPartitionDirectory(database)
+    partitionFolder = os.path.basename(partitionDirectory)
+    return [os.path.join(partitionFolder, os.path.basename(getPartitionPath(partitionDirectory, month)))
+            for month in getPartitionMonths(partitionDirectory)] + [os.path.basename(database)]
+
+# Copies a database file into the backup directory while it is in use and stores its chunks.
+# Returns the chunk hashes and the number of chunks that were not stored yet
+def backUpFile(path, directory):
+    snapshotPath = os.path.join(directory, f'snapshot-{os.getpid()}.tmp')
+    source = sqlite3.connect(path)
+    snapshot = sqlite3.connect(snapshotPath)
+    try:
+        copyDatabase(source, snapshot)
+    finally:
+        source.close()
+        snapshot.close()
+
+    chunkHashes = []
+    storedChunks = 0
+    try:
+        with open(snapshotPath, 'rb') as file:
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunkHash = hashlib.sha1(chunk).hexdigest()
+                chunkPath = getChunkPath(directory, chunkHash)
+                if os.path.exists(chunkPath):
+                    os.utime(chunkPath)
+                else:
+                    with open(chunkPath + '.tmp', 'wb') as chunkFile:
+                        chunkFile.write(zlib.compress(chunk))
+                    os.replace(chunkPath + '.tmp', chunkPath)
+                    storedChunks += 1
+                chunkHashes.append(chunkHash)
+    finally:
+        os.remove(snapshotPath)
+    return chunkHashes, storedChunks
+
+# Backs a database and its event partitions up into a directory while they are in use. The manifest
+# has a line per file: its path relative to the database folder, then its chunk hashes. Returns the
+# manifest path, the number of chunks that were stored and the number of chunks of the backup
+def createBackup(database, directory):
+    os.makedirs(os.path.join(directory, CHUNK_DIRECTORY), exist_ok=True)
+    manifestLines = []
+    storedChunks = 0
+    totalChunks = 0
+    for fileName in getDatabaseFiles(database):
+        chunkHashes, fileStoredChunks = backUpFile(os.path.join(os.path.dirname(database), fileName), directory)
+        manifestLines.append(' '.join([fileName.replace(os.sep, '/')] + chunkHashes))
+        storedChunks += fileStoredChunks
+        totalChunks += len(chunkHashes)
+
+    manifestPath = os.path.join(directory, datetime.now().strftime(BACKUP_NAME_FORMAT) + MANIFEST_EXTENSION)
+    with open(manifestPath + '.tmp', 'w') as manifest:
+        manifest.write('\n'.join(manifestLines))
+    os.replace(manifestPath + '.tmp', manifestPath)
+    return manifestPath, storedChunks, totalChunks
+
+# Returns the (file, chunk hashes) of every file of a backup
+def readManifest(manifestPath):
+    with open(manifestPath) as manifest:
+        return [(line.split()[0], line.split()[1:]) for line in manifest.read().splitlines() if line]
+
+# Deletes all but the newest keep backups, and the chunks that no remaining backup uses
+def rotateBackups(directory, keep):
+    backups = getBackups(directory)
+    for _, _, manifestPath in backups[keep:]:
+        os.remove(manifestPath)
+
+    usedChunks = set()
+    for _, _, manifestPath in backups[:keep]:
+        for _, chunkHashes in readManifest(manifestPath):
+            usedChunks.update(chunkHashes)
+    chunkDirectory = os.path.join(directory, CHUNK_DIRECTORY)
+    if not os.path.isdir(chunkDirectory):
+        return
+    for chunkHash in os.listdir(chunkDirectory):
+        chunkPath = os.path.join(chunkDirectory, chunkHash)
+        if chunkHash not in usedChunks and time.time() - os.path.getmtime(chunkPath) > CHUNK_GRACE_PERIOD:
+            os.remove(chunkPath)
+
+# Restores a database and its event partitions from a backup. Each file is rebuilt and checked in a
+# separate file first, then copied over the current one with the backup API, so connections that have
+# it open stay valid. Partitions that are not in the backup are deleted, or emptied if they are still
+# open somewhere (Windows does not delete open files). The next event id is then moved past every restored
+# event, as backups made before the database was copied last can have partition ids past it
+def restoreBackup(manifestPath, database):
+    directory = os.path.dirname(manifestPath)
+    restorePath = os.path.join(directory, f'restore-{os.getpid()}.tmp')
+    backedUpFiles = []
+    for fileName, chunkHashes in readManifest(manifestPath):
+        with open(restorePath, 'wb') as file:
+            for chunkHash in chunkHashes:
+                with open(getChunkPath(directory, chunkHash), 'rb') as chunkFile:
+                    file.write(zlib.decompress(chunkFile.read()))
+
+        targetPath = os.path.join(os.path.dirname(database), *fileName.split('/'))
+        backedUpFiles.append(os.path.normpath(targetPath))
+        os.makedirs(os.path.dirname(targetPath), exist_ok=True)
+        restored = sqlite3.connect(restorePath)
+        try:
+            if restored.execute('PRAGMA integrity_check').fetchone()[0] != 'ok':
+                raise sqlite3.DatabaseError(f"Backup is damaged: {manifestPath}")
+            target = sqlite3.connect(targetPath)
+            try:
+                restored.backup(target)
+            finally:
+                target.close()
+        finally:
+            restored.close()
+            os.remove(restorePath)
+
+    for fileName in getDatabaseFiles(database):
+        path = os.path.normpath(os.path.join(os.path.dirname(database), fileName))
+        if path not in backedUpFiles:
+            try:
+                os.remove(path)
+            except OSError:
+                conn = sqlite3.connect(path)
+                try:
+                    conn.execute('DELETE FROM events')
+                    conn.commit()
+                finally:
+                    conn.close()
+
+    syncNextEventID(database)
@@ -0,0 +1,289 @@
+from StatsDatabase import setupDatabase, getColumns, getReadOnlyURI, getReadableDatabase
+from EventPartitions import getPartitionDirectory, getPartitionMonths, getPartitionPath
+import KeyTransitions
+import HoldDurations
+import sqlite3
+import time
+import os
+
+# Events are copied from each source table in chunks of this many ids, committing after each chunk
+MERGE_CHUNK_SIZE = 200000
+
+# Name of the collector's own database among the merged sources
+LOCAL_SOURCE_NAME = "This PC"
+
+# Rollups are rebuilt on every merge. They are first built from every source's rows in temporary copies
+# of the rollup tables, one source at a time, then the combined tables are reset and filled from the
+# copies in one transaction, so the dashboard never sees them half rebuilt. Counts are summed and peaks
+# take the maximum. Input ids go through inputMap, as every database gives its own ids to the inputs it
+# has seen
+ROLLUP_TABLES = ['typingSpeedHourly', 'typingIntervalHistogram', 'appUsage', 'activityHourOfWeek', 'activeDays',
+                 'activityPyramid', 'keyTransitions', 'holdDurations', 'totalCounts', 'lifetimeLongestDurations']
+
+ROLLUP_RESETS = [
+    'DELETE FROM main.typingSpeedHourly',
+    'DELETE FROM main.typingIntervalHistogram',
+    'DELETE FROM main.appUsage',
+    'DELETE FROM main.activityHourOfWeek',
+    'DELETE FROM main.activeDays',
+    'DELETE FROM main.activityPyramid',
+    'DELETE FROM main.keyTransitions',
+    'DELETE FROM main.holdDurations',
+    'UPDATE main.totalCounts SET totalCount = 0',
+    'UPDATE main.lifetimeLongestDurations SET duration = 0',
+]
+
+# 'WHERE true' keeps SQLite from reading ON CONFLICT as part of the SELECT
+ROLLUP_MERGES = [
+    '''
+    INSERT INTO temp.typingSpeedHourly (hourStart, keyCount, typingTime, peakWPM, burstCount)
+    SELECT hourStart, keyCount, typingTime, peakWPM, burstCount FROM source.typingSpeedHourly WHERE true
+    ON CONFLICT(hourStart) DO UPDATE SET
+        keyCount = keyCount + excluded.keyCount,
+        typingTime = typingTime + excluded.typingTime,
+        peakWPM = MAX(peakWPM, excluded.peakWPM),
+        burstCount = burstCount + excluded.burstCount
+    ''',
+    '''
+    INSERT INTO temp.typingIntervalHistogram (hourStart, kind, bin, count)
+    SELECT hourStart, kind, bin, count FROM source.typingIntervalHistogram WHERE true
+    ON CONFLICT(hourStart, kind, bin) DO UPDATE SET count = count + excluded.count
+    ''',
+    '''
+    INSERT INTO temp.appUsage (day, app, keyCount, clickCount)
+    SELECT day, app, keyCount, clickCount FROM source.appUsage WHERE true
+    ON CONFLICT(day, app) DO UPDATE SET
+        keyCount = keyCount + excluded.keyCount,
+        clickCount = clickCount + excluded.clickCount
+    ''',
+    '''
+    INSERT INTO temp.activityHourOfWeek (slot, count)
+    SELECT slot, count FROM source.activityHourOfWeek WHERE true
+    ON CONFLICT(slot) DO UPDATE SET count = count + excluded.count
+    ''',
+    'INSERT OR IGNORE INTO temp.activeDays (day, weekday) SELECT day, weekday FROM source.activeDays',
+    '''
+    INSERT INTO temp.activityPyramid (level, bucketStart, keyCount, clickCount)
+    SELECT level, bucketStart, keyCount, clickCount FROM source.activityPyramid WHERE true
+    ON CONFLICT(level, bucketStart) DO UPDATE SET
+        keyCount = keyCount + excluded.keyCount,
+        clickCount = clickCount + excluded.clickCount
+    ''',
+    '''
+    INSERT INTO temp.totalCounts (inputID, totalCount)
+    SELECT m.inputID, t.totalCount FROM source.totalCounts t JOIN inputMap m ON m.sourceInputID = t.inputID WHERE true
+    ON CONFLICT(inputID) DO UPDATE SET totalCount = totalCount + excluded.totalCount
+    ''',
+    '''
+    INSERT INTO temp.lifetimeLongestDurations (inputID, duration)
+    SELECT m.inputID, l.duration FROM source.lifetimeLongestDurations l JOIN inputMap m ON m.sourceInputID = l.inputID WHERE true
+    ON CONFLICT(inputID) DO UPDATE SET duration = MAX(duration, excluded.duration)
+    ''',
+]
+
+# Sets up a combined database: the normal layout, plus the merged sources and the source of every event
+def setupMergedDatabase(database):
+    setupDatabase(database)
+    with sqlite3.connect(database) as conn:
+        cursor = conn.cursor()
+
+        # The dashboard keeps reading the combined database while a merge writes to it
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mergeSources (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            path TEXT NOT NULL,
+            lastEventID INTEGER DEFAULT 0,
+            mergedAt INTEGER
+        )
+        ''')
+        if 'sourceID' not in getColumns(cursor, 'events'):
+            cursor.execute('ALTER TABLE events ADD COLUMN sourceID INTEGER')
+            cursor.execute('ALTER TABLE events ADD COLUMN sourceEventID INTEGER')
+
+        # An event is only ever copied once from its source
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS eventsBySource ON events (sourceID, sourceEventID)')
+        conn.commit()
+
+# Adds a database to the sources of a combined database, or moves an existing source to a new path
+def addSource(conn, name, path):
+    conn.execute('''
+        INSERT INTO mergeSources (name, path) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET path = excluded.path
+    ''', (name, path))
+    conn.commit()
+
+# Returns the (id, name, path) of every source of a combined database
+def getSources(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name, path FROM mergeSources ORDER BY id')
+    data = cursor.fetchall()
+    cursor.close()
+    return data
+
+# Attaches a source database as 'source', with a temporary map from its input ids to the combined ones.
+# path can be a read-only URI (see getReadableDatabase)
+def attachSource(conn, path):
+    conn.execute('ATTACH DATABASE ? AS source', (path,))
+    conn.execute('INSERT OR IGNORE INTO main.inputs (name) SELECT name FROM source.inputs')
+    conn.execute('CREATE TEMP TABLE inputMap (sourceInputID INTEGER PRIMARY KEY, inputID INTEGER NOT NULL)')
+    conn.execute('''
+        INSERT INTO inputMap (sourceInputID, inputID)
+        SELECT s.id, i.id FROM source.inputs s JOIN main.inputs i ON i.name = s.name
+    ''')
+    conn.commit()
+
+def detachSource(conn):
+    conn.execute('DROP TABLE temp.inputMap')
+    conn.commit()
+    conn.execute('DETACH DATABASE source')
+
+# Copies the events of a source that are newer than the last merge, one id range at a time. The events
+# are in the attached source's own table and in its monthly partitions, if it has any. Event ids are
+# unique over all of them. Returns the number of events added
+def mergeEvents(conn, sourceID, path):
+    cursor = conn.cursor()
+    cursor.execute('SELECT lastEventID FROM mergeSources WHERE id = ?', (sourceID,))
+    lastEventID = cursor.fetchone()[0]
+    partitionDirectory = getPartitionDirectory(path)
+    partitionPaths = [getPartitionPath(partitionDirectory, month) for month in getPartitionMonths(partitionDirectory)]
+
+    # The newest id of each table, so tables without new events are skipped
+    tables = []
+    for tablePath in [None] + partitionPaths:
+        if tablePath is not None:
+            conn.execute('ATTACH DATABASE ? AS sourcePartition', (getReadOnlyURI(tablePath),))
+        table = 'source.events' if tablePath is None else 'sourcePartition.events'
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+        tables.append((tablePath, cursor.fetchone()[0]))
+        if tablePath is not None:
+            conn.execute('DETACH DATABASE sourcePartition')
+    maxEventID = max(tableMaxID for _, tableMaxID in tables)
+
+    # A source that was replaced by a new database starts over, copied events are skipped by the unique index
+    if maxEventID < lastEventID:
+        lastEventID = 0
+
+    addedEvents = 0
+    for tablePath, tableMaxID in tables:
+        if tableMaxID <= lastEventID:
+            continue
+        if tablePath is not None:
+            conn.execute('ATTACH DATABASE ? AS sourcePartition', (getReadOnlyURI(tablePath),))
+        table = 'source.events' if tablePath is None else 'sourcePartition.events'
+        for chunkStart in range(lastEventID, tableMaxID, MERGE_CHUNK_SIZE):
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO main.events (eventTypeID, time, inputID, positionX, positionY, duration, sourceID, sourceEventID)
+                SELECT e.eventTypeID, e.time, m.inputID, e.positionX, e.positionY, e.duration, ?, e.id
+                FROM {table} e
+                JOIN inputMap m ON m.sourceInputID = e.inputID
+                WHERE e.id > ? AND e.id <= ?
+            ''', (sourceID, chunkStart, min(chunkStart + MERGE_CHUNK_SIZE, tableMaxID)))
+            addedEvents += cursor.rowcount
+            conn.commit()
+        if tablePath is not None:
+            conn.execute('DETACH DATABASE sourcePartition')
+
+    cursor.execute('UPDATE mergeSources SET lastEventID = ?, mergedAt = ? WHERE id = ?', (maxEventID, time.time_ns() // 1000000, sourceID))
+    conn.commit()
+    cursor.close()
+    return addedEvents
+
+# Creates empty temporary copies of the rollup tables, which the rollups of every source are added to
+def createRollupStaging(conn):
+    for table in ROLLUP_TABLES:
+        tableSQL = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+        conn.execute(tableSQL.replace('CREATE TABLE', 'CREATE TEMP TABLE', 1))
+
+def dropRollupStaging(conn):
+    for table in ROLLUP_TABLES:
+        conn.execute(f'DROP TABLE IF EXISTS temp.{table}')
+
+# Replaces the combined rollups with the temporary copies in one transaction
+def publishRollups(conn):
+    for query in ROLLUP_RESETS:
+        conn.execute(query)
+    for table in ROLLUP_TABLES:
+        conn.execute(f'INSERT OR REPLACE INTO main.{table} SELECT * FROM temp.{table}')
+    conn.commit()
+
+# Adds the rollups of the attached source to the temporary copies. The key transition matrices and hold
+# duration histograms are blobs, so they are added together in Python
+def mergeSourceRollups(conn):
+    cursor = conn.cursor()
+    for query in ROLLUP_MERGES:
+        cursor.execute(query)
+
+    cursor.execute('SELECT day, counts FROM source.keyTransitions')
+    for day, counts in cursor.fetchall():
+        matrix = KeyTransitions.fromBlob(counts)
+        cursor.execute('SELECT counts FROM temp.keyTransitions WHERE day = ?', (day,))
+        row = cursor.fetchone()
+        if row:
+            KeyTransitions.addMatrix(matrix, KeyTransitions.fromBlob(row[0]))
+        cursor.execute('INSERT OR REPLACE INTO temp.keyTransitions (day, counts) VALUES (?, ?)', (day, matrix.tobytes()))
+
+    cursor.execute('''
+        SELECT h.day, m.inputID, h.counts
+        FROM source.holdDurations h
+        JOIN inputMap m ON m.sourceInputID = h.inputID
+    ''')
+    for day, inputID, counts in cursor.fetchall():
+        histogram = HoldDurations.fromBlob(counts)
+        cursor.execute('SELECT counts FROM temp.holdDurations WHERE day = ? AND inputID = ?', (day, inputID))
+        row = cursor.fetchone()
+        if row:
+            HoldDurations.addHistogram(histogram, HoldDurations.fromBlob(row[0]))
+        cursor.execute('INSERT OR REPLACE INTO temp.holdDurations (day, inputID, counts) VALUES (?, ?, ?)',
+                       (day, inputID, histogram.tobytes()))
+    conn.commit()
+    cursor.close()
+
+# Merges the local database and every other source into a combined database. New events are copied
+# and the rollups are rebuilt from the sources' own rollups, so every source has to be there.
+# Returns the number of events added and the seconds the merge took
+def mergeDatabases(database, localDatabase):
+    startTime = time.perf_counter()
+    setupMergedDatabase(database)
+    conn = sqlite3.connect(database, uri=True)
+    addedEvents = 0
+    copyPaths = []
+    try:
+        addSource(conn, LOCAL_SOURCE_NAME, localDatabase)
+        sources = [(sourceID, path) for sourceID, name, path in getSources(conn)]
+        for sourceID, path in sources:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Database not found: {path}")
+
+        # Sources are only read. One with an older layout is read from a copy moved to the current layout
+        readablePaths = {}
+        for sourceID, path in sources:
+            copyPath = os.path.join(os.path.dirname(database), f'mergeSource{sourceID}-{os.getpid()}.tmp')
+            copyPaths.append(copyPath)
+            readablePaths[sourceID] = getReadableDatabase(path, copyPath)
+
+        for sourceID, path in sources:
+            attachSource(conn, readablePaths[sourceID])
+            try:
+                addedEvents += mergeEvents(conn, sourceID, path)
+            finally:
+                detachSource(conn)
+
+        createRollupStaging(conn)
+        try:
+            for sourceID, path in sources:
+                attachSource(conn, readablePaths[sourceID])
+                try:
+                    mergeSourceRollups(conn)
+                finally:
+                    detachSource(conn)
+            publishRollups(conn)
+        finally:
+            dropRollupStaging(conn)
+    finally:
+        conn.close()
+        for copyPath in copyPaths:
+            if os.path.exists(copyPath):
+                os.remove(copyPath)
+    return addedEvents, time.perf_counter() - startTime
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from EventPartitions import getPartitionDirectory, getMonthsInRange, getPartitionURI, getDatabasePath, queryEvents
+import threading
+import operator
+import pathlib
+import sqlite3
+import os
+
+# Aggregations over many monthly partitions run one partition per task on a pool of threads, so long
+# ranges (like the year plots) use every core: sqlite3 lets go of the GIL while a query runs. Each task
+# opens its own read-only connection, and the partial results are merged in the calling thread. Ranges
+# with fewer partitions than this are queried in the calling thread, as handing them out costs more
+# than it saves
+PARALLEL_MIN_PARTITIONS = 3
+MAX_WORKERS = os.cpu_count() or 1
+
+# How the values of a group from different partitions are combined. Histograms are counts grouped by bin
+MERGE_FUNCTIONS = {
+    'sum': operator.add,
+    'max': max,
+    'min': min,
+}
+
+executor = None
+executorLock = threading.Lock()
+
+# Returns the thread pool, starting it the first time
+def getExecutor():
+    global executor
+    with executorLock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='aggregation')
+        return executor
+
+# Stops the thread pool, for when the app closes
+def shutdownExecutor():
+    global executor
+    with executorLock:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+            executor = None
+
+# Runs a query on one events table in a worker thread and returns its rows. The partition is opened
+# read-only, with the main database attached read-only as 'stats' so queries can still look up inputs
+def queryPartition(uri, databaseURI, query, params):
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        if databaseURI is not None:
+            conn.execute('ATTACH DATABASE ? AS stats', (databaseURI,))
+        return conn.execute(query.format(events='events'), params).fetchall()
+    finally:
+        conn.close()
+
+# Adds the (group..., value) rows of one table to the merged values. Groups of more than one column
+# are keyed by a tuple
+def mergeRows(values, rows, mergeValues):
+    for row in rows:
+        group = row[0] if len(row) == 2 else row[:-1]
+        value = row[-1]
+        if value is None:
+            continue
+        values[group] = mergeValues(values[group], value) if group in values else value
+
+# Runs a grouped aggregate on every events table of a time range and merges the value of each group,
+# like countEvents but with the partitions queried in parallel. The query names the table as {events}
+# and returns (group..., value) rows. merge is 'sum', 'max' or 'min'
+def aggregateEvents(conn, query, params=(), startTime=None, endTime=None, merge='sum'):
+    database = getDatabasePath(conn)
+    directory = getPartitionDirectory(database)
+    months = getMonthsInRange(directory, startTime, endTime)
+    values = {}
+    if len(months) < PARALLEL_MIN_PARTITIONS:
+        mergeRows(values, queryEvents(conn, query, params, startTime, endTime), MERGE_FUNCTIONS[merge])
+        return values
+
+    # The main database's own table is read here while the workers read the partitions
+    databaseURI = pathlib.Path(database).as_uri() + '?mode=ro'
+    futures = [getExecutor().submit(queryPartition, getPartitionURI(directory, month), databaseURI, query, params) for month in months]
+    cursor = conn.cursor()
+    cursor.execute(query.format(events='main.events'), params)
+    mergeRows(values, cursor.fetchall(), MERGE_FUNCTIONS[merge])
+    cursor.close()
+    for future in futures:
+        mergeRows(values, future.result(), MERGE_FUNCTIONS[merge])
+    return values
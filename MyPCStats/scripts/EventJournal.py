@@ -0,0 +1,138 @@
+from EventPartitions import insertEvents, detachPartitions
+import threading
+import struct
+import mmap
+import math
+import time
+import os
+import re
+
+# Fixed-size event record: time (ms), input id, event type, x, y and duration (seconds). A missing
+# position is stored as NO_POSITION and a missing duration as NaN
+RECORD = struct.Struct('<qIB3xiid')
+NO_POSITION = -2 ** 31
+
+# Every segment starts with a header: magic, version, record size and the number of records written.
+# The count is updated after each record, so readers never see a half-written record
+HEADER = struct.Struct('<4sHHQ')
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 8
+JOURNAL_MAGIC = b'MPCJ'
+JOURNAL_VERSION = 1
+
+# A segment holds up to SEGMENT_RECORDS records (2 MB) and is closed once it is full or SEGMENT_MAX_AGE
+# seconds old. Closed segments are moved into the events table every COMPACT_INTERVAL seconds
+SEGMENT_RECORDS = 65536
+SEGMENT_MAX_AGE = 60
+COMPACT_INTERVAL = 15
+SEGMENT_PATTERN = re.compile(r'segment-(\d{8})\.bin$')
+
+# Returns the path of a segment
+def getSegmentPath(directory, sequence):
+    return os.path.join(directory, f'segment-{sequence:08d}.bin')
+
+# Returns the (sequence, path) of every segment in the journal directory, oldest first
+def getSegments(directory):
+    if not os.path.isdir(directory):
+        return []
+    segments = []
+    for fileName in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(fileName)
+        if match:
+            segments.append((int(match.group(1)), os.path.join(directory, fileName)))
+    return sorted(segments)
+
+# Reads the events of a segment as rows for the events table
+def readSegment(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return []
+    magic, version, recordSize, recordCount = HEADER.unpack_from(data)
+    if magic != JOURNAL_MAGIC or recordSize != RECORD.size:
+        return []
+    records = data[HEADER.size:HEADER.size + recordCount * RECORD.size]
+    rows = []
+    for eventTime, inputID, eventTypeID, positionX, positionY, duration in RECORD.iter_unpack(records):
+        rows.append((eventTypeID, eventTime, inputID,
+                     None if positionX == NO_POSITION else positionX,
+                     None if positionY == NO_POSITION else positionY,
+                     None if math.isnan(duration) else duration))
+    return rows
+
+# Append-only event journal used by the collector. Events are packed into a memory-mapped segment
+# file, which is all the input hooks have to do, and compactSegments() later adds the closed segments
+# to the database in bulk. Every run starts a new segment, so segments left by an earlier run are closed
+class EventJournal:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.lock = threading.Lock()
+        segments = getSegments(directory)
+        self.sequence = segments[-1][0] if segments else 0
+        self.openSegment()
+
+    # Creates and maps the next segment
+    def openSegment(self):
+        self.sequence += 1
+        size = HEADER.size + SEGMENT_RECORDS * RECORD.size
+        with open(getSegmentPath(self.directory, self.sequence), 'w+b') as file:
+            file.truncate(size)
+            self.map = mmap.mmap(file.fileno(), size)
+        HEADER.pack_into(self.map, 0, JOURNAL_MAGIC, JOURNAL_VERSION, RECORD.size, 0)
+        self.recordCount = 0
+        self.openedAt = time.monotonic()
+
+    # Closes the open segment and starts the next one
+    def rotate(self):
+        self.map.flush()
+        self.map.close()
+        self.openSegment()
+
+    # Writes an event to the open segment
+    def append(self, eventTypeID, eventTime, inputID, positionX=None, positionY=None, duration=None):
+        with self.lock:
+            if self.recordCount == SEGMENT_RECORDS:
+                self.rotate()
+            RECORD.pack_into(self.map, HEADER.size + self.recordCount * RECORD.size, eventTime, inputID, eventTypeID,
+                             NO_POSITION if positionX is None else positionX,
+                             NO_POSITION if positionY is None else positionY,
+                             math.nan if duration is None else duration)
+            self.recordCount += 1
+            COUNT.pack_into(self.map, COUNT_OFFSET, self.recordCount)
+
+    # Closes the open segment if it has events and is older than maxAge seconds. Returns the sequence
+    # of the segment that is open afterwards, every segment before it is closed
+    def rotateIfOlderThan(self, maxAge):
+        with self.lock:
+            if self.recordCount and time.monotonic() - self.openedAt >= maxAge:
+                self.rotate()
+            return self.sequence
+
+# Adds the closed segments (those before openSequence) to the event partitions and deletes their files.
+# Each segment is added in one transaction together with its row in journalSegments, so a segment that
+# was added but not deleted (like when a dashboard still has it mapped) is never added twice.
+# Returns the number of events added
+def compactSegments(conn, directory, openSequence, partitionDirectory):
+    addedEvents = 0
+    for sequence, path in getSegments(directory):
+        if sequence >= openSequence:
+            break
+        if not conn.execute('SELECT 1 FROM journalSegments WHERE sequence = ?', (sequence,)).fetchone():
+            rows = readSegment(path)
+            insertEvents(conn, partitionDirectory, rows)
+            conn.execute('INSERT INTO journalSegments (sequence, recordCount, compactedAt) VALUES (?, ?, ?)',
+                         (sequence, len(rows), time.time_ns() // 1000000))
+            conn.commit()
+            detachPartitions(conn)
+            addedEvents += len(rows)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Only the segments still on disk need their row
+    segments = getSegments(directory)
+    conn.execute('DELETE FROM journalSegments WHERE sequence < ?', (segments[0][0] if segments else openSequence,))
+    conn.commit()
+    return addedEvents
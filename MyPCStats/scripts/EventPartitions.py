@@ -0,0 +1,236 @@
+from datetime import datetime
+import pathlib
+import sqlite3
+import os
+import re
+
+# Raw events are stored in one database file per local month (events-YYYY-mm.db), in a folder next to
+# the main database. Queries attach only the months their time range needs. The main database's own
+# events table is always read as well, so databases that were never partitioned work the same way
+PARTITION_PATTERN = re.compile(r'events-(\d{4}-\d{2})\.db$')
+
+# SQLite attaches at most 10 databases to a connection, so older partitions are detached past this many
+MAX_ATTACHED_PARTITIONS = 8
+
+# Months of events to keep, or None to keep them all. Older months are removed by deleting their file
+EVENT_RETENTION_MONTHS = None
+
+# Returns the partition folder of a database
+def getPartitionDirectory(database):
+    return os.path.splitext(database)[0] + '-events'
+
+def getPartitionPath(directory, month):
+    return os.path.join(directory, f'events-{month}.db')
+
+# Returns the months ('YYYY-mm') that have a partition, oldest first
+def getPartitionMonths(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(match.group(1) for match in map(PARTITION_PATTERN.match, os.listdir(directory)) if match)
+
+# Returns the local month of a ms time
+def getMonth(eventTime):
+    return datetime.fromtimestamp(eventTime / 1000).strftime('%Y-%m')
+
+# Returns the ms times that a month starts and the next month starts
+def getMonthBounds(month):
+    monthStart = datetime.strptime(month, '%Y-%m')
+    nextMonthStart = monthStart.replace(year=monthStart.year + monthStart.month // 12, month=monthStart.month % 12 + 1)
+    return int(monthStart.timestamp() * 1000), int(nextMonthStart.timestamp() * 1000)
+
+def getSchemaName(month):
+    return 'events_' + month.replace('-', '_')
+
+# Creates a partition with the layout of the events table
+def createPartition(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            eventTypeID INTEGER NOT NULL,
+            time INTEGER NOT NULL,
+            inputID INTEGER NOT NULL,
+            positionX INTEGER,
+            positionY INTEGER,
+            duration REAL
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS eventsByTypeAndTime ON events (eventTypeID, time)')
+
+# Returns the URI a partition is opened read-only with. Even old months can still be written (by a journal
+# segment left from before the month ended, or by a restore), so they keep SQLite's locking and are never
+# opened as immutable
+def getPartitionURI(directory, month):
+    return pathlib.Path(getPartitionPath(directory, month)).as_uri() + '?mode=ro'
+
+# Returns the months with a partition that can hold events from startTime to endTime (in ms, None for no limit)
+def getMonthsInRange(directory, startTime=None, endTime=None):
+    months = []
+    for month in getPartitionMonths(directory):
+        monthStart, nextMonthStart = getMonthBounds(month)
+        if (startTime is None or nextMonthStart > startTime) and (endTime is None or monthStart <= endTime):
+            months.append(month)
+    return months
+
+# Returns the file of a connection's main database
+def getDatabasePath(conn):
+    for _, name, path in conn.execute('PRAGMA database_list').fetchall():
+        if name == 'main':
+            return path
+
+# Attaches the partition of a month if it is not attached yet, and returns its schema name. Read-only
+# partitions are attached with a URI, so the connection has to be opened with uri=True. A partition that
+# is attached already is attached again for writing, as it may have been attached read-only
+def attachPartition(conn, directory, month, readOnly):
+    schema = getSchemaName(month)
+    attached = [name for _, name, _ in conn.execute('PRAGMA database_list').fetchall() if name.startswith('events_')]
+    if schema in attached:
+        if readOnly:
+            return schema
+        conn.execute(f'DETACH DATABASE {schema}')
+        attached.remove(schema)
+    for name in sorted(attached)[:max(len(attached) - MAX_ATTACHED_PARTITIONS + 1, 0)]:
+        conn.execute(f'DETACH DATABASE {name}')
+
+    if readOnly:
+        conn.execute(f'ATTACH DATABASE ? AS {schema}', (getPartitionURI(directory, month),))
+    else:
+        path = getPartitionPath(directory, month)
+        os.makedirs(directory, exist_ok=True)
+        createPartition(path)
+        conn.execute(f'ATTACH DATABASE ? AS {schema}', (path,))
+    return schema
+
+# Detaches every attached partition
+def detachPartitions(conn):
+    for _, name, _ in conn.execute('PRAGMA database_list').fetchall():
+        if name.startswith('events_'):
+            conn.execute(f'DETACH DATABASE {name}')
+
+# Returns the events tables that can hold events from startTime to endTime (in ms, None for no limit):
+# the main one and the partitions of the months in the range, attached when the table is reached
+def getEventTables(conn, startTime=None, endTime=None, newestFirst=False):
+    directory = getPartitionDirectory(getDatabasePath(conn))
+    months = getMonthsInRange(directory, startTime, endTime)
+    if newestFirst:
+        months.reverse()
+
+    # Events that were never moved into a partition are in the main table, which is read first
+    yield 'main.events'
+    for month in months:
+        yield attachPartition(conn, directory, month, readOnly=True) + '.events'
+
+# Runs a query on every events table of a time range and returns all rows. The query names the table
+# as {events}. Rows come table by table, the partitions in time order (newest first if asked)
+def queryEvents(conn, query, params=(), startTime=None, endTime=None, newestFirst=False):
+    rows = []
+    cursor = conn.cursor()
+    for table in getEventTables(conn, startTime, endTime, newestFirst):
+        cursor.execute(query.format(events=table), params)
+        rows.extend(cursor.fetchall())
+    cursor.close()
+    return rows
+
+# Runs a grouped count on every events table of a time range and adds the counts of each group together.
+# The query returns (group, count) rows
+def countEvents(conn, query, params=(), startTime=None, endTime=None):
+    counts = {}
+    for group, count in queryEvents(conn, query, params, startTime, endTime):
+        counts[group] = counts.get(group, 0) + count
+    return counts
+
+# Returns the id the next event gets. Ids are unique over all partitions, so events can be followed by id
+def getNextEventID(conn):
+    return conn.execute('SELECT nextID FROM main.eventIDs').fetchone()[0]
+
+# Moves the next event id of a database past the largest id in its main events table and partitions,
+# in case a partition has events newer than the database's next id (like after a restore)
+def syncNextEventID(database):
+    directory = getPartitionDirectory(database)
+    largestID = 0
+    for month in getPartitionMonths(directory):
+        partition = sqlite3.connect(getPartitionURI(directory, month), uri=True)
+        try:
+            largestID = max(largestID, partition.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0])
+        finally:
+            partition.close()
+    conn = sqlite3.connect(database)
+    try:
+        conn.execute('''
+            UPDATE eventIDs SET nextID = MAX(nextID, ?, (SELECT COALESCE(MAX(id), 0) + 1 FROM events))
+        ''', (largestID + 1,))
+        conn.commit()
+    finally:
+        conn.close()
+
+# Adds events (rows of eventTypeID, time, inputID, positionX, positionY, duration) to the partitions of
+# their months, giving them the next ids. The caller commits, and detaches the partitions afterwards.
+# All the months are attached together, so the rows can span at most MAX_ATTACHED_PARTITIONS months
+# (a journal segment spans about a minute)
+def insertEvents(conn, directory, rows):
+    nextID = getNextEventID(conn)
+    rowsByMonth = {}
+    for index, row in enumerate(rows):
+        rowsByMonth.setdefault(getMonth(row[1]), []).append((nextID + index,) + tuple(row))
+    if len(rowsByMonth) > MAX_ATTACHED_PARTITIONS:
+        raise ValueError(f"Events span {len(rowsByMonth)} months, at most {MAX_ATTACHED_PARTITIONS} can be added at once")
+    schemas = {month: attachPartition(conn, directory, month, readOnly=False) for month in rowsByMonth}
+
+    # The rows and the next id are committed together, so an id that is taken already means the next id
+    # went back (see syncNextEventID) and the insert fails rather than replacing the older event
+    for month, monthRows in rowsByMonth.items():
+        conn.executemany(f'''
+            INSERT INTO {schemas[month]}.events (id, eventTypeID, time, inputID, positionX, positionY, duration)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', monthRows)
+    conn.execute('UPDATE main.eventIDs SET nextID = ?', (nextID + len(rows),))
+
+# Moves the events in the main table of a database into monthly partitions, one month per transaction
+def migrateToPartitions(database):
+    directory = getPartitionDirectory(database)
+    conn = sqlite3.connect(database)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT strftime('%Y-%m', time / 1000, 'unixepoch', 'localtime') FROM main.events")
+        months = [row[0] for row in cursor.fetchall()]
+        if not months:
+            return
+
+        # A temporary index on time keeps each month from scanning the whole table
+        cursor.execute('CREATE INDEX IF NOT EXISTS eventsByTime ON events (time)')
+        conn.commit()
+        for month in months:
+            monthStart, nextMonthStart = getMonthBounds(month)
+            schema = attachPartition(conn, directory, month, readOnly=False)
+            cursor.execute(f'''
+                INSERT INTO {schema}.events (id, eventTypeID, time, inputID, positionX, positionY, duration)
+                SELECT id, eventTypeID, time, inputID, positionX, positionY, duration
+                FROM main.events
+                WHERE time >= ? AND time < ?
+            ''', (monthStart, nextMonthStart))
+            cursor.execute('DELETE FROM main.events WHERE time >= ? AND time < ?', (monthStart, nextMonthStart))
+            conn.commit()
+            detachPartitions(conn)
+        cursor.execute('DROP INDEX eventsByTime')
+        conn.commit()
+
+        # Give the space of the moved rows back to the file system
+        cursor.execute('VACUUM')
+    finally:
+        conn.close()
+
+# Deletes the partitions of the months before the newest keepMonths months (the current one included).
+# A partition that is open somewhere (like attached by the dashboard on Windows) can not be deleted yet,
+# and is tried again on the next call. Returns the number of partitions that could not be deleted
+def deleteOldPartitions(directory, keepMonths):
+    now = datetime.now()
+    monthIndex = now.year * 12 + now.month - keepMonths
+    firstKeptMonth = f'{monthIndex // 12:04d}-{monthIndex % 12 + 1:02d}'
+    failedDeletes = 0
+    for month in getPartitionMonths(directory):
+        if month < firstKeptMonth:
+            try:
+                os.remove(getPartitionPath(directory, month))
+            except OSError:
+                failedDeletes += 1
+    return failedDeletes
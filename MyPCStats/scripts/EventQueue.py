@@ -0,0 +1,79 @@
+from collections import deque
+import threading
+
+# Kinds of items handed from the input listeners to the writer thread
+EVENT = 0
+MOUSE_MOVE = 1
+
+# Items the queue holds before overflowing, and what happens to an item that arrives when it is full:
+#   drop     - the item is dropped and counted
+#   collapse - mouse moves are collapsed into the newest one, which is kept aside until the next batch.
+#              Other items are dropped
+#   spill    - events are written straight to the journal by the caller, mouse moves are collapsed
+EVENT_QUEUE_SIZE = 10000
+OVERFLOW_POLICIES = ('drop', 'collapse', 'spill')
+DEFAULT_OVERFLOW_POLICY = 'spill'
+
+# Bounded hand-off queue between the input listeners and persistence. put() never waits on the disk,
+# so a stalled writer can only make the queue overflow, and the overflow counts are kept for the
+# collector metrics
+class EventQueue:
+    def __init__(self, maxSize, policy, spill):
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.maxSize = maxSize
+        self.policy = policy
+        self.spill = spill
+        self.collapsedMove = None
+        self.overflowCounts = {'dropped': 0, 'collapsed': 0, 'spilled': 0}
+        self.highWater = 0
+
+    # Hands an item of a kind to the writer thread
+    def put(self, kind, item):
+        with self.condition:
+            if len(self.items) < self.maxSize:
+                self.items.append((kind, item))
+                self.highWater = max(self.highWater, len(self.items))
+                self.condition.notify()
+                return
+            if kind == MOUSE_MOVE and self.policy != 'drop':
+                self.collapsedMove = item
+                self.overflowCounts['collapsed'] += 1
+                return
+            if self.policy != 'spill':
+                self.overflowCounts['dropped'] += 1
+                return
+            self.overflowCounts['spilled'] += 1
+        # Spilling happens outside the lock, so the writer thread is not held up by it
+        self.spill(kind, item)
+
+    # Waits for items and takes all of them, the collapsed mouse move last
+    def takeBatch(self):
+        with self.condition:
+            while not self.items and self.collapsedMove is None:
+                self.condition.wait()
+            batch = list(self.items)
+            self.items.clear()
+            if self.collapsedMove is not None:
+                batch.append((MOUSE_MOVE, self.collapsedMove))
+                self.collapsedMove = None
+        return batch
+
+    # Returns the number of items
+    def getDepth(self):
+        with self.condition:
+            return len(self.items)
+
+    # Returns and resets an overflow count ('dropped', 'collapsed' or 'spilled')
+    def takeOverflowCount(self, name):
+        with self.condition:
+            count = self.overflowCounts[name]
+            self.overflowCounts[name] = 0
+            return count
+
+    # Returns the most items held since the last call
+    def takeHighWater(self):
+        with self.condition:
+            highWater = self.highWater
+            self.highWater = len(self.items)
+            return highWater
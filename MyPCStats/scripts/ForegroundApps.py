@@ -0,0 +1,132 @@
+from StatsDatabase import getDayBounds
+from collections import OrderedDict
+import threading
+import ctypes
+import psutil
+import time
+import sys
+
+# Name used when the foreground app can not be found (no focus query, lock screen, closed process)
+UNKNOWN_APP = 'Unknown'
+
+# Process names are cached by PID. Entries expire so a reused PID is looked up again
+APP_CACHE_SIZE = 64
+APP_CACHE_TTL = 300
+
+# Focus queries return (window, pid) of the foreground window, or (None, None) if there is none.
+# Windows asks user32 directly, which is cheap enough to run on every input
+def getForegroundWindowsProcess():
+    user32 = ctypes.windll.user32
+    window = user32.GetForegroundWindow()
+    if not window:
+        return None, None
+    pid = ctypes.c_ulong()
+    user32.GetWindowThreadProcessId(window, ctypes.byref(pid))
+    return window, pid.value
+
+# Used where there is no supported way to ask for the focused window (like headless Linux)
+def getNoForegroundProcess():
+    return None, None
+
+# Returns the focus query for this platform
+def getFocusQuery():
+    if sys.platform == 'win32':
+        return getForegroundWindowsProcess
+    return getNoForegroundProcess
+
+# Counts keys and clicks per foreground app. The process name is only looked up again when the
+# focused window changes, and then through a small PID cache. Counts build up per day and app in
+# memory, and flush() adds them to the appUsage table
+class ForegroundAppTracker:
+    def __init__(self, focusQuery=None):
+        self.focusQuery = focusQuery or getFocusQuery()
+        self.lock = threading.Lock()
+        self.appCache = OrderedDict()
+        self.lastWindow = None
+        self.lastApp = UNKNOWN_APP
+        self.day = None
+        self.nextDayStart = None
+        self.pendingCounts = {}
+
+    # Returns the process name of a PID from the cache, looking it up with psutil when missing or expired
+    def getAppName(self, pid):
+        now = time.monotonic()
+        cached = self.appCache.get(pid)
+        if cached and now - cached[1] < APP_CACHE_TTL:
+            self.appCache.move_to_end(pid)
+            return cached[0]
+
+        try:
+            appName = psutil.Process(pid).name()
+        except (psutil.Error, ValueError):
+            appName = UNKNOWN_APP
+        if appName.lower().endswith('.exe'):
+            appName = appName[:-4]
+
+        self.appCache[pid] = (appName, now)
+        self.appCache.move_to_end(pid)
+        if len(self.appCache) > APP_CACHE_SIZE:
+            self.appCache.popitem(last=False)
+        return appName
+
+    # Returns the name of the foreground app
+    def getForegroundApp(self):
+        try:
+            window, pid = self.focusQuery()
+        except Exception:
+            window, pid = None, None
+        if window is None or pid is None:
+            self.lastWindow = None
+            return UNKNOWN_APP
+        if window != self.lastWindow:
+            self.lastWindow = window
+            self.lastApp = self.getAppName(pid)
+        return self.lastApp
+
+    # Counts an input of the given kind (0 for keys, 1 for clicks) at eventTime (in ms)
+    def countInput(self, kind, eventTime):
+        with self.lock:
+            appName = self.getForegroundApp()
+            if self.nextDayStart is None or eventTime >= self.nextDayStart:
+                self.day, self.nextDayStart = getDayBounds(eventTime)
+            key = (self.day, appName)
+            if key not in self.pendingCounts:
+                self.pendingCounts[key] = [0, 0]
+            self.pendingCounts[key][kind] += 1
+
+    def countKey(self, eventTime):
+        self.countInput(0, eventTime)
+
+    def countClick(self, eventTime):
+        self.countInput(1, eventTime)
+
+    # Adds the pending counts to the appUsage table
+    def flush(self, conn):
+        with self.lock:
+            pendingCounts = self.pendingCounts
+            self.pendingCounts = {}
+
+        if not pendingCounts:
+            return
+        conn.executemany('''
+            INSERT INTO appUsage (day, app, keyCount, clickCount)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(day, app) DO UPDATE SET
+                keyCount = keyCount + excluded.keyCount,
+                clickCount = clickCount + excluded.clickCount
+        ''', [(day, appName, keys, clicks) for (day, appName), (keys, clicks) in pendingCounts.items()])
+        conn.commit()
+
+# Finds the keys and clicks of each app from startDay to endDay (inclusive, 'YYYY-mm-dd'), most used first
+def getAppUsage(conn, startDay, endDay):
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT app, SUM(keyCount), SUM(clickCount)
+        FROM appUsage
+        WHERE day BETWEEN ? AND ?
+        GROUP BY app
+        ORDER BY SUM(keyCount) + SUM(clickCount) DESC
+    ''', (startDay, endDay))
+    data = cursor.fetchall()
+    cursor.close()
+    return data
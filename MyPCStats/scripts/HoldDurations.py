@@ -0,0 +1,135 @@
+from StatsDatabase import getDayBounds
+from array import array
+import threading
+import math
+
+# Hold durations are counted in log buckets: SUB_BUCKETS buckets per doubling from 1 ms up to 2^MAX_DOUBLINGS ms
+# (about 2 minutes), so every bucket is within ~4.5% of its values. Bucket 0 is under 1 ms and the last
+# bucket is everything longer. Histograms are fixed arrays, so they merge by adding them together
+SUB_BUCKETS = 8
+MAX_DOUBLINGS = 17
+BUCKET_COUNT = SUB_BUCKETS * MAX_DOUBLINGS + 2
+
+# Returns the bucket of a duration in seconds
+def getBucket(duration):
+    milliseconds = duration * 1000
+    if milliseconds < 1:
+        return 0
+    return min(int(math.log2(milliseconds) * SUB_BUCKETS) + 1, BUCKET_COUNT - 1)
+
+# Returns the duration in seconds a bucket stands for (the middle of its range)
+def getBucketDuration(bucket):
+    if bucket == 0:
+        return 0.0005
+    return 2 ** ((bucket - 0.5) / SUB_BUCKETS) / 1000
+
+# Returns an empty histogram
+def newHistogram():
+    return array('I', bytes(4 * BUCKET_COUNT))
+
+# Reads a histogram saved as a blob
+def fromBlob(blob):
+    histogram = array('I')
+    histogram.frombytes(blob)
+    return histogram
+
+# Adds one histogram into another
+def addHistogram(total, histogram):
+    for i, count in enumerate(histogram):
+        if count:
+            total[i] += count
+
+# Adds several histograms into a new one
+def mergeHistograms(histograms):
+    total = newHistogram()
+    for histogram in histograms:
+        addHistogram(total, histogram)
+    return total
+
+# Returns the duration in seconds below which the given fraction of the holds fall, or None without data
+def getPercentile(histogram, fraction):
+    total = sum(histogram)
+    if not total:
+        return None
+    target = fraction * total
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return getBucketDuration(bucket)
+    return getBucketDuration(BUCKET_COUNT - 1)
+
+# Hold duration histograms used by the collector. Holds build up in one histogram per input and day
+# in memory, and flush() adds them to the holdDurations table
+class HoldDurationHistograms:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.day = None
+        self.nextDayStart = None
+        self.pendingDays = {}
+
+    # Counts a hold of an input, in seconds, that ended at eventTime (in ms)
+    def addDuration(self, inputName, duration, eventTime):
+        bucket = getBucket(duration)
+        with self.lock:
+            if self.nextDayStart is None or eventTime >= self.nextDayStart:
+                self.day, self.nextDayStart = getDayBounds(eventTime)
+            pendingInputs = self.pendingDays.setdefault(self.day, {})
+            if inputName not in pendingInputs:
+                pendingInputs[inputName] = newHistogram()
+            pendingInputs[inputName][bucket] += 1
+
+    # Adds the pending histograms to the database. getInputID turns input names into inputs ids
+    def flush(self, conn, getInputID):
+        with self.lock:
+            pendingDays = self.pendingDays
+            self.pendingDays = {}
+
+        if not pendingDays:
+            return
+        cursor = conn.cursor()
+        for day, pendingInputs in pendingDays.items():
+            for inputName, histogram in pendingInputs.items():
+                inputID = getInputID(inputName)
+                cursor.execute('SELECT counts FROM holdDurations WHERE day = ? AND inputID = ?', (day, inputID))
+                row = cursor.fetchone()
+                if row:
+                    addHistogram(histogram, fromBlob(row[0]))
+                cursor.execute('INSERT OR REPLACE INTO holdDurations (day, inputID, counts) VALUES (?, ?, ?)',
+                               (day, inputID, histogram.tobytes()))
+        conn.commit()
+
+    # Fills an empty table from the durations of the key and click events already in the database
+    def backfill(self, conn, getInputID):
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM holdDurations')
+        if cursor.fetchone()[0]:
+            return
+        cursor.execute('''
+            SELECT i.name, e.duration, e.time
+            FROM events e
+            JOIN inputs i ON i.id = e.inputID
+            WHERE e.eventTypeID IN (1, 3)
+            AND e.duration IS NOT NULL
+            ORDER BY e.time
+        ''')
+        for inputName, duration, eventTime in cursor:
+            self.addDuration(inputName, duration, eventTime)
+        self.flush(conn, getInputID)
+
+# Merges the daily histograms from startDay to endDay (inclusive, 'YYYY-mm-dd') into one histogram per input name
+def getHoldHistograms(conn, startDay, endDay):
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT i.name, h.counts
+        FROM holdDurations h
+        JOIN inputs i ON i.id = h.inputID
+        WHERE h.day BETWEEN ? AND ?
+    ''', (startDay, endDay))
+    histograms = {}
+    for inputName, counts in cursor.fetchall():
+        if inputName not in histograms:
+            histograms[inputName] = newHistogram()
+        addHistogram(histograms[inputName], fromBlob(counts))
+    cursor.close()
+    return histograms
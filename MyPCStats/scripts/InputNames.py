@@ -0,0 +1,10 @@
+# All letters, numbers, special characters, and mouse inputs that will be tracked
+ALL_KEYS = list('abcdefghijklmnopqrstuvwxyz0123456789-=[]\\;\',./!@#$%^&*()_+{}|:"<>?') + \
+        ['space', 'tab', 'capslock', 'shift', 'ctrl', 'alt', 'win', 'enter', 'backspace', 'esc', 'up', 'down', 'left', 'right'] + \
+        ['mouseleft', 'mouseright', 'mousemiddle', 'scrollup', 'scrolldown']
+
+# Everything kept in totalCounts: the tracked inputs plus the mouse movement totals
+COUNTER_NAMES = ALL_KEYS + ['mouseposition', 'mousedistance']
+
+# Totals that are not whole numbers
+FRACTIONAL_COUNTERS = {'mousedistance'}
@@ -0,0 +1,101 @@
+from InputNames import ALL_KEYS
+from StatsDatabase import getDayBounds
+from array import array
+import threading
+
+# Dense key-to-key matrix over ALL_KEYS: the count of "from" followed by "to" is at index from * SIZE + to.
+# ALL_KEYS may only be appended to, older snapshots are read with the size they were saved with
+SIZE = len(ALL_KEYS)
+KEY_INDEX = {key: index for index, key in enumerate(ALL_KEYS)}
+
+# Finger that types each character on a QWERTY keyboard, from 0 (left pinky) to 7 (right pinky).
+# Shifted characters use the finger of their unshifted key
+FINGER_KEYS = ['1qaz!', '2wsx@', '3edc#', '45rtfgvb$%', '67yuhjnm^&', '8ik,*<', '9ol.(>', '0-=p[]\\;\'/)_+{}|:"?']
+KEY_FINGERS = {key: finger for finger, keys in enumerate(FINGER_KEYS) for key in keys}
+
+# Two keys only count as a sequence when the second is pressed within this many ms of the first
+SEQUENCE_GAP = 2000
+
+# Returns an empty matrix of 4-byte counts
+def newMatrix():
+    return array('I', bytes(4 * SIZE * SIZE))
+
+# Reads a snapshot saved as a blob, moving it to the current layout if it was saved with fewer keys
+def fromBlob(blob):
+    saved = array('I')
+    saved.frombytes(blob)
+    if len(saved) == SIZE * SIZE:
+        return saved
+    savedSize = int(len(saved) ** 0.5)
+    matrix = newMatrix()
+    for fromIndex in range(savedSize):
+        for toIndex in range(savedSize):
+            matrix[fromIndex * SIZE + toIndex] = saved[fromIndex * savedSize + toIndex]
+    return matrix
+
+# Adds one matrix into another
+def addMatrix(total, matrix):
+    for i, count in enumerate(matrix):
+        if count:
+            total[i] += count
+
+# Key transition counter used by the collector. Counts build up in one matrix per day in memory,
+# and flush() adds them to that day's snapshot in the keyTransitions table
+class KeyTransitionCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lastIndex = None
+        self.lastKeyTime = None
+        self.day = None
+        self.nextDayStart = None
+        self.pendingDays = {}
+
+    # Feeds a key press with its time in ms. Keys must arrive in time order
+    def addKey(self, inputName, eventTime):
+        index = KEY_INDEX.get(inputName)
+        with self.lock:
+            # The day is only worked out again once a key crosses midnight
+            if self.nextDayStart is None or eventTime >= self.nextDayStart:
+                self.day, self.nextDayStart = getDayBounds(eventTime)
+
+            if index is not None and self.lastIndex is not None and eventTime - self.lastKeyTime <= SEQUENCE_GAP:
+                if self.day not in self.pendingDays:
+                    self.pendingDays[self.day] = newMatrix()
+                self.pendingDays[self.day][self.lastIndex * SIZE + index] += 1
+
+            self.lastIndex = index
+            self.lastKeyTime = eventTime
+
+    # Adds the pending counts to the per-day snapshots
+    def flush(self, conn):
+        with self.lock:
+            pendingDays = self.pendingDays
+            self.pendingDays = {}
+
+        if not pendingDays:
+            return
+        cursor = conn.cursor()
+        for day, matrix in pendingDays.items():
+            cursor.execute('SELECT counts FROM keyTransitions WHERE day = ?', (day,))
+            row = cursor.fetchone()
+            if row:
+                addMatrix(matrix, fromBlob(row[0]))
+            cursor.execute('INSERT OR REPLACE INTO keyTransitions (day, counts) VALUES (?, ?)', (day, matrix.tobytes()))
+        conn.commit()
+
+    # Fills an empty table from the key events already in the database
+    def backfill(self, conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM keyTransitions')
+        if cursor.fetchone()[0]:
+            return
+        cursor.execute('''
+            SELECT i.name, e.time
+            FROM events e
+            JOIN inputs i ON i.id = e.inputID
+            WHERE e.eventTypeID = 1
+            ORDER BY e.time
+        ''')
+        for inputName, eventTime in cursor:
+            self.addKey(inputName, eventTime)
+        self.flush(conn)
@@ -0,0 +1,165 @@
+from multiprocessing.connection import Listener, Client
+import threading
+import time
+import sys
+import os
+
+# Files kept next to the database for the live channel
+CHANNEL_KEY_FILE = 'liveChannel.key'
+CHANNEL_SOCKET_FILE = 'liveChannel.sock'
+
+# How often the collector pushes batched updates to the dashboard (in seconds)
+PUBLISH_INTERVAL = 0.1
+
+# Returns the address and family of the local channel (a named pipe on Windows, a Unix socket elsewhere)
+def getChannelAddress(directory):
+    if sys.platform == 'win32':
+        return r'\\.\pipe\MyPCStatsLive', 'AF_PIPE'
+    return os.path.join(directory, CHANNEL_SOCKET_FILE), 'AF_UNIX'
+
+# Creates a new key for this collector run, so only processes that can read the app folder can connect
+def createChannelKey(directory):
+    key = os.urandom(32)
+    keyPath = os.path.join(directory, CHANNEL_KEY_FILE)
+    with open(keyPath, 'wb') as keyFile:
+        keyFile.write(key)
+    os.chmod(keyPath, 0o600)
+    return key
+
+# Reads the key of the running collector, or None if the collector has never started
+def readChannelKey(directory):
+    try:
+        with open(os.path.join(directory, CHANNEL_KEY_FILE), 'rb') as keyFile:
+            return keyFile.read()
+    except OSError:
+        return None
+
+# Collector side of the channel. Input hooks record changes here, and a background thread
+# sends them as one batched message to every connected dashboard
+class LivePublisher:
+    def __init__(self, directory, getSnapshot):
+        self.directory = directory
+        self.getSnapshot = getSnapshot
+        self.clients = []
+        self.lock = threading.Lock()
+
+        # Held while a batch is taken and sent, so no batch goes out between a new dashboard's snapshot
+        # and it being added to the clients. The input hooks take self.lock while holding the collector's
+        # own lock, which getSnapshot takes too, so self.lock can not be held around the snapshot instead
+        self.publishLock = threading.Lock()
+        self.resetPending()
+
+    def resetPending(self):
+        self.pendingTotals = {}
+        self.pendingLongest = {}
+        self.pendingClicks = 0
+        self.pendingKeys = 0
+        self.pendingStats = {}
+
+    # Starts listening for dashboards and pushing updates
+    def start(self):
+        address, family = getChannelAddress(self.directory)
+        if family == 'AF_UNIX' and os.path.exists(address):
+            os.remove(address)
+        self.listener = Listener(address, family, authkey=createChannelKey(self.directory))
+        threading.Thread(target=self.acceptClients, daemon=True).start()
+        threading.Thread(target=self.publishLoop, daemon=True).start()
+
+    # Functions called by the input hooks
+    def updateTotal(self, inputName, totalCount):
+        with self.lock:
+            self.pendingTotals[inputName] = totalCount
+
+    def updateLongest(self, inputName, duration):
+        with self.lock:
+            self.pendingLongest[inputName] = duration
+
+    def countClick(self):
+        with self.lock:
+            self.pendingClicks += 1
+
+    def countKey(self):
+        with self.lock:
+            self.pendingKeys += 1
+
+    # Other live values computed by the collector, like the current typing speed
+    def updateStat(self, name, value):
+        with self.lock:
+            self.pendingStats[name] = value
+
+    # Accepts dashboards and sends each one the full current state first. Changes made after the snapshot
+    # stay pending until the dashboard is added, and go out with the next batch
+    def acceptClients(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+                with self.publishLock:
+                    totals, longest = self.getSnapshot()
+                    conn.send({'totals': totals, 'longest': longest, 'clicks': 0, 'keys': 0, 'stats': {}})
+                    with self.lock:
+                        self.clients.append(conn)
+            except Exception:
+                time.sleep(1)
+
+    # Pushes a batch every PUBLISH_INTERVAL seconds
+    def publishLoop(self):
+        while True:
+            time.sleep(PUBLISH_INTERVAL)
+            with self.publishLock:
+                self.publishPending()
+
+    # Sends everything that changed since the last push, dropping dashboards that have gone away
+    def publishPending(self):
+        with self.lock:
+            if not (self.pendingTotals or self.pendingLongest or self.pendingClicks or self.pendingKeys or self.pendingStats):
+                return
+            message = {
+                'totals': self.pendingTotals,
+                'longest': self.pendingLongest,
+                'clicks': self.pendingClicks,
+                'keys': self.pendingKeys,
+                'stats': self.pendingStats
+            }
+            self.resetPending()
+            clients = list(self.clients)
+
+        for conn in clients:
+            try:
+                conn.send(message)
+            except Exception:
+                with self.lock:
+                    self.clients.remove(conn)
+                conn.close()
+
+# Dashboard side of the channel. Keeps reconnecting to the collector in a background thread
+# and hands every message to onMessage. onConnectionChanged is called with True/False
+class LiveSubscriber:
+    def __init__(self, directory, onMessage, onConnectionChanged, retryInterval=5):
+        self.directory = directory
+        self.onMessage = onMessage
+        self.onConnectionChanged = onConnectionChanged
+        self.retryInterval = retryInterval
+
+    def start(self):
+        threading.Thread(target=self.receiveLoop, daemon=True).start()
+
+    def receiveLoop(self):
+        address, family = getChannelAddress(self.directory)
+        while True:
+            key = readChannelKey(self.directory)
+            try:
+                conn = Client(address, family, authkey=key)
+            except Exception:
+                time.sleep(self.retryInterval)
+                continue
+
+            self.onConnectionChanged(True)
+            try:
+                while True:
+                    self.onMessage(conn.recv())
+            except Exception:
+                pass
+            finally:
+                conn.close()
+                self.onConnectionChanged(False)
+            time.sleep(self.retryInterval)
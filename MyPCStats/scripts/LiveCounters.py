@@ -0,0 +1,112 @@
+from InputNames import COUNTER_NAMES, FRACTIONAL_COUNTERS
+import mmap
+import time
+import os
+
+# Memory-mapped file next to the database that holds the live totals and longest durations
+COUNTERS_FILE = 'liveCounters.bin'
+
+# Layout (all 8-byte slots): sequence number, slot count, heartbeat, one total per counter, one longest
+# duration per counter. The heartbeat is the ms time the collector last marked itself alive
+SLOT_COUNT = len(COUNTER_NAMES)
+COUNTER_INDEX = {name: index for index, name in enumerate(COUNTER_NAMES)}
+HEADER_SIZE = 24
+
+# The collector beats every HEARTBEAT_INTERVAL seconds. The file stays behind when the collector exits,
+# so readers ignore it once the last beat is older than HEARTBEAT_TIMEOUT seconds
+HEARTBEAT_INTERVAL = 1
+HEARTBEAT_TIMEOUT = 5
+TOTALS_OFFSET = HEADER_SIZE
+LONGEST_OFFSET = TOTALS_OFFSET + 8 * SLOT_COUNT
+FILE_SIZE = LONGEST_OFFSET + 8 * SLOT_COUNT
+
+# Collector side. Every write is wrapped in an odd/even sequence number bump so readers in other
+# processes can tell when they copied a half-written block. Callers must serialize writes
+class LiveCountersWriter:
+    def __init__(self, directory):
+        path = os.path.join(directory, COUNTERS_FILE)
+
+        # The file is only ever grown, never truncated, so a dashboard that has it mapped stays valid
+        self.file = open(path, 'a+b')
+        if os.path.getsize(path) < FILE_SIZE:
+            self.file.truncate(FILE_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), FILE_SIZE)
+
+        self.header = memoryview(self.map)[:HEADER_SIZE].cast('Q')
+        self.totals = memoryview(self.map)[TOTALS_OFFSET:LONGEST_OFFSET].cast('d')
+        self.longest = memoryview(self.map)[LONGEST_OFFSET:FILE_SIZE].cast('d')
+
+        # A collector that died mid-write leaves an odd sequence number behind
+        if self.header[0] % 2:
+            self.header[0] += 1
+        self.header[1] = SLOT_COUNT
+
+    # Marks the collector as alive. The heartbeat is outside the sequenced block, so it needs no lock
+    def beat(self):
+        self.header[2] = time.time_ns() // 1000000
+
+    # Writes every total and longest duration at once
+    def load(self, totals, longest):
+        self.header[0] += 1
+        for name, index in COUNTER_INDEX.items():
+            self.totals[index] = totals.get(name, 0)
+            self.longest[index] = longest.get(name, 0)
+        self.header[0] += 1
+
+    def setTotal(self, inputName, totalCount):
+        index = COUNTER_INDEX.get(inputName)
+        if index is not None:
+            self.header[0] += 1
+            self.totals[index] = totalCount
+            self.header[0] += 1
+
+    def setLongest(self, inputName, duration):
+        index = COUNTER_INDEX.get(inputName)
+        if index is not None:
+            self.header[0] += 1
+            self.longest[index] = duration
+            self.header[0] += 1
+
+# Dashboard side. Copies the whole block in one go and retries if the collector was writing meanwhile
+class LiveCountersReader:
+    def __init__(self, directory):
+        self.path = os.path.join(directory, COUNTERS_FILE)
+        self.map = None
+
+    # Maps the file once the collector has created it
+    def open(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < FILE_SIZE:
+            return False
+        with open(self.path, 'rb') as countersFile:
+            self.map = mmap.mmap(countersFile.fileno(), FILE_SIZE, access=mmap.ACCESS_READ)
+        self.header = memoryview(self.map)[:HEADER_SIZE].cast('Q')
+        return True
+
+    # Returns whether the collector beat recently, so the counters are live
+    def isAlive(self):
+        if self.map is None and not self.open():
+            return False
+        return abs(time.time_ns() // 1000000 - self.header[2]) <= HEARTBEAT_TIMEOUT * 1000
+
+    # Returns the totals and longest durations as dictionaries, or None if they are not available or
+    # the collector is not running
+    def snapshot(self, retries=100):
+        if not self.isAlive():
+            return None
+        if self.header[1] != SLOT_COUNT:
+            return None
+
+        for _ in range(retries):
+            sequence = self.header[0]
+            if sequence == 0 or sequence % 2:
+                continue
+            block = self.map[TOTALS_OFFSET:FILE_SIZE]
+            if self.header[0] == sequence:
+                break
+        else:
+            return None
+
+        values = memoryview(block).cast('d')
+        totals = {name: values[index] if name in FRACTIONAL_COUNTERS else int(values[index]) for name, index in COUNTER_INDEX.items()}
+        longest = {name: values[SLOT_COUNT + index] for name, index in COUNTER_INDEX.items()}
+        return totals, longest
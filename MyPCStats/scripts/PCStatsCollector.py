@@ -1,4 +1,18 @@
 from datetime import datetime, timedelta
+from LiveCounters import LiveCountersWriter, HEARTBEAT_INTERVAL
+from LiveChannel import LivePublisher
+from StatsDatabase import setupDatabase, InputDictionary
+from TypingSpeed import TypingSpeedTracker
+from KeyTransitions import KeyTransitionCounter
+from HoldDurations import HoldDurationHistograms
+from ForegroundApps import ForegroundAppTracker
+from ActivityHistogram import ActivityHistogram
+from ActivityPyramid import ActivityPyramid
+from CollectorMetrics import MetricsRegistry, METRICS_INTERVAL
+from EventJournal import EventJournal, compactSegments, getSegments, SEGMENT_MAX_AGE, COMPACT_INTERVAL
+from DatabaseBackup import createBackup, rotateBackups, getBackups, BACKUP_INTERVAL, BACKUP_COUNT
+from EventPartitions import getPartitionDirectory, migrateToPartitions, syncNextEventID, deleteOldPartitions, EVENT_RETENTION_MONTHS
+from EventQueue import EventQueue, EVENT, MOUSE_MOVE, EVENT_QUEUE_SIZE, OVERFLOW_POLICIES, DEFAULT_OVERFLOW_POLICY
 from pynput import keyboard, mouse
 import threading
 import sqlite3
@@ -41,11 +55,35 @@ try:
 
     # Path to the database
     DATABASE = os.path.join(scriptDirectory, 'InputDB.db')    
+
+    # What happens to inputs when the event queue is full, set with --overflow=drop|collapse|spill
+    OVERFLOW_FLAG = '--overflow='
+    overflowPolicy = DEFAULT_OVERFLOW_POLICY
+    for arg in sys.argv:
+        if arg.startswith(OVERFLOW_FLAG) and arg[len(OVERFLOW_FLAG):] in OVERFLOW_POLICIES:
+            overflowPolicy = arg[len(OVERFLOW_FLAG):]
     
-    # Dictionaries to keep track of inputs and timestamps
+    # Dictionaries to keep track of inputs and their perf_counter_ns press times
     pressedKeys = {}
     pressedButtons = {}
 
+    # Event times come from the monotonic perf_counter_ns, placed on the wall clock by an anchor taken
+    # at the same moment. The anchor is retaken every so often so the times follow clock changes
+    CLOCK_ANCHOR_INTERVAL = 600
+    clockAnchor = (time.time_ns(), time.perf_counter_ns())
+
+    # Converts a perf_counter_ns reading to the millisecond time stored in the events table
+    def toEventTime(perfNs):
+        wallNs, anchorPerfNs = clockAnchor
+        return (wallNs + perfNs - anchorPerfNs) // 1000000
+
+    # Background loop that retakes the anchor
+    def reanchorClock():
+        global clockAnchor
+        while True:
+            time.sleep(CLOCK_ANCHOR_INTERVAL)
+            clockAnchor = (time.time_ns(), time.perf_counter_ns())
+
     # Conversion factor for calculations
     PIXEL_TO_METER_CONVERSION = 0.0002646
 
@@ -79,141 +117,168 @@ try:
         '\x1a': 'ctrl+z'
     }
 
-    # All letters, numbers, special characters, and mouse inputs that will be tracked
-    ALL_KEYS = list('abcdefghijklmnopqrstuvwxyz0123456789-=[]\\;\',./!@#$%^&*()_+{}|:"<>?') + \
-            ['space', 'tab', 'capslock', 'shift', 'ctrl', 'alt', 'win', 'enter', 'backspace', 'esc', 'up', 'down', 'left', 'right'] + \
-            ['mouseleft', 'mouseright', 'mousemiddle', 'scrollup', 'scrolldown']
+    setupDatabase(DATABASE)
+
+    # Input names are stored as small integer ids, resolved through an in-memory map
+    inputDictionary = InputDictionary(DATABASE)
 
-    # Sets up the tables and data in the database, readying for collection
-    def setupDatabase():
+    # Loads totalCounts and lifetimeLongestDurations into memory so they can be pushed to the dashboard
+    def loadLiveState():
         with sqlite3.connect(DATABASE) as conn:
             cursor = conn.cursor()
-
-            # Create tables if they are not made yet
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS eventTypes (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL
-            )
-            ''')
-
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY,
-                eventTypeID INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                key TEXT,
-                button TEXT,
-                positionX INTEGER,
-                positionY INTEGER,
-                duration REAL,
-                FOREIGN KEY (eventTypeID) REFERENCES eventTypes(id)
-            )
-            ''')
-
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mousePositions (
-                id INTEGER PRIMARY KEY,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                positionX INTEGER,
-                positionY INTEGER
-            )
-            ''')
-
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS totalCounts (
-                id INTEGER PRIMARY KEY,
-                inputName TEXT UNIQUE NOT NULL,
-                totalCount INTEGER DEFAULT 0
-            )
-            ''')
-
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS lifetimeLongestDurations (
-                id INTEGER PRIMARY KEY,
-                inputName TEXT UNIQUE NOT NULL,
-                duration REAL DEFAULT 0
-            )
-            ''')
-
-            cursor.execute('''
-            INSERT OR IGNORE INTO eventTypes (id, name) VALUES
-            (1, 'keyPress'),
-            (2, 'keyRelease'),
-            (3, 'mouseClick'),
-            (4, 'mouseRelease'),
-            (5, 'mouseScroll')
-            ''')
-
-            # Insert all inputs into totalCounts and lifetimeLongestDurations
-            for key in ALL_KEYS:
-                cursor.execute('''
-                INSERT OR IGNORE INTO totalCounts (inputName) VALUES (?)
-                ''', (key,))
-                cursor.execute('''
-                INSERT OR IGNORE INTO lifetimeLongestDurations (inputName) VALUES (?)
-                ''', (key,))
-
-            # Insert mouse position tracking total into totalCounts
-            cursor.execute('''
-            INSERT OR IGNORE INTO totalCounts (inputName) VALUES (?)
-            ''', ('mouseposition',))
-
-            # Insert mouse distance traversed into totalCounts
-            cursor.execute('''
-            INSERT OR IGNORE INTO totalCounts (inputName) VALUES (?)
-            ''', ('mousedistance',))
-
-    setupDatabase()
+            cursor.execute('SELECT i.name, t.totalCount FROM totalCounts t JOIN inputs i ON i.id = t.inputID')
+            totals = dict(cursor.fetchall())
+            cursor.execute('SELECT i.name, l.duration FROM lifetimeLongestDurations l JOIN inputs i ON i.id = l.inputID')
+            longest = dict(cursor.fetchall())
+        return totals, longest
+
+    liveTotals, liveLongest = loadLiveState()
+    liveStateLock = threading.Lock()
+
+    # Changes to the live state not yet written to the database, written with each journal compaction
+    pendingTotals = {}
+    pendingLongest = {}
+
+    # Fixed-layout shared memory copy of the live state, read by the dashboard without touching the database
+    liveCounters = LiveCountersWriter(scriptDirectory)
+    liveCounters.load(liveTotals, liveLongest)
+    liveCounters.beat()
+
+    # Copy of the live state, sent to each dashboard when it connects
+    def getLiveSnapshot():
+        with liveStateLock:
+            return dict(liveTotals), dict(liveLongest)
+
+    # Pushes changes to any connected dashboard over a local pipe/socket
+    publisher = LivePublisher(scriptDirectory, getLiveSnapshot)
+
+    # Rollups are built in memory as keys are pressed and added to the database every minute
+    ROLLUP_INTERVAL = 60
+    typingSpeed = TypingSpeedTracker()
+    keyTransitions = KeyTransitionCounter()
+    holdDurations = HoldDurationHistograms()
+    foregroundApps = ForegroundAppTracker()
+    activityHistogram = ActivityHistogram()
+    activityPyramid = ActivityPyramid()
+    with sqlite3.connect(DATABASE) as conn:
+        typingSpeed.backfill(conn, time.time_ns() // 1000000)
+        keyTransitions.backfill(conn)
+        holdDurations.backfill(conn, inputDictionary.getID)
+        activityHistogram.backfill(conn)
+        activityPyramid.backfill(conn)
+
+    # Raw events are kept in monthly partitions. Events of older versions are moved there once the
+    # rollups above have been built from them. The next event id is checked against the partitions, which
+    # may have been restored or copied in from elsewhere
+    partitionDirectory = getPartitionDirectory(DATABASE)
+    migrateToPartitions(DATABASE)
+    syncNextEventID(DATABASE)
+
+    # Self-telemetry of the collector, sampled into the collectorMetrics table
+    metrics = MetricsRegistry()
+    collectorProcess = psutil.Process()
+    metrics.addGauge('cpuPercent', lambda: collectorProcess.cpu_percent(interval=None))
+    metrics.addGauge('memoryRSS', lambda: collectorProcess.memory_info().rss / 1048576)
+    metrics.addGauge('databaseSize', lambda: sum(os.path.getsize(path) for path in (DATABASE, DATABASE + '-wal') if os.path.exists(path)) / 1048576)
+
+    # Events are appended to a memory-mapped journal and moved into the database in bulk by compactJournal()
+    journalDirectory = os.path.join(scriptDirectory, 'journal')
+    journal = EventJournal(journalDirectory)
+    metrics.addGauge('journalBacklog', lambda: len(getSegments(journalDirectory)) - 1)
+
+    # Writes an event to the journal
+    def writeEvent(item):
+        eventTypeID, inputName, eventTime, positionX, positionY, duration = item
+        journal.append(eventTypeID, eventTime, inputDictionary.getID(inputName), positionX, positionY, duration)
+
+    # The listeners only hand events and mouse moves to this queue, persistEvents() writes them out
+    eventQueue = EventQueue(EVENT_QUEUE_SIZE, overflowPolicy, lambda kind, item: writeEvent(item))
+    metrics.addGauge('queueDepth', eventQueue.getDepth)
+    metrics.addGauge('queueHighWater', eventQueue.takeHighWater)
+    metrics.addGauge('droppedEvents', lambda: eventQueue.takeOverflowCount('dropped'))
+    metrics.addGauge('collapsedMoves', lambda: eventQueue.takeOverflowCount('collapsed'))
+    metrics.addGauge('spilledEvents', lambda: eventQueue.takeOverflowCount('spilled'))
 
     # Helper for database queries
     def executeDB(query, params=()):
+        startTime = time.perf_counter_ns()
         with sqlite3.connect(DATABASE) as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             conn.commit()
+        metrics.record('writeLatency', (time.perf_counter_ns() - startTime) / 1e6)
             
     # Functions for logging inputs
-    def logEvent(eventTypeID, key=None, button=None, positionX=None, positionY=None, duration=None):
-        executeDB('''
-            INSERT INTO events (eventTypeID, timestamp, key, button, positionX, positionY, duration)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (eventTypeID, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), key, button, positionX, positionY, duration))
+    def logEvent(eventTypeID, inputName, eventTime, positionX=None, positionY=None, duration=None):
+        eventQueue.put(EVENT, (eventTypeID, inputName, eventTime, positionX, positionY, duration))
 
     def logMousePosition(positionX, positionY):
-        executeDB('''
-            INSERT INTO mousePositions (timestamp, positionX, positionY)
-            VALUES (?, ?, ?)
-        ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), positionX, positionY))
+        eventQueue.put(MOUSE_MOVE, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), positionX, positionY))
 
-    def incrementTotalCount(inputName):
-        executeDB('''
-            UPDATE totalCounts SET totalCount = totalCount + 1 WHERE inputName = ?
-        ''', (inputName.lower(),))
+    # Writes what the listeners queued: events go to the journal and mouse moves to the database in one batch
+    def persistEvents():
+        while True:
+            positions = []
+            for kind, item in eventQueue.takeBatch():
+                if kind == MOUSE_MOVE:
+                    positions.append(item)
+                else:
+                    writeEvent(item)
+            if not positions:
+                continue
+            startTime = time.perf_counter_ns()
+            try:
+                with sqlite3.connect(DATABASE) as conn:
+                    conn.executemany('''
+                        INSERT INTO mousePositions (timestamp, positionX, positionY)
+                        VALUES (?, ?, ?)
+                    ''', positions)
+                    conn.commit()
+            except sqlite3.Error:
+                pass
+            metrics.record('writeLatency', (time.perf_counter_ns() - startTime) / 1e6)
+
+    def incrementTotalCount(inputName, amount=1):
+        inputName = inputName.lower()
+        with liveStateLock:
+            if inputName in liveTotals:
+                pendingTotals[inputName] = pendingTotals.get(inputName, 0) + amount
+                liveTotals[inputName] += amount
+                liveCounters.setTotal(inputName, liveTotals[inputName])
+                publisher.updateTotal(inputName, liveTotals[inputName])
 
     def updateLifetimeLongestDuration(inputName, duration):
-        with sqlite3.connect(DATABASE) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT duration FROM lifetimeLongestDurations WHERE inputName = ?
-            ''', (inputName,))
-            result = cursor.fetchone()
-            if result and duration > result[0]:
-                cursor.execute('''
-                    UPDATE lifetimeLongestDurations SET duration = ? WHERE inputName = ?
-                ''', (duration, inputName))
-                conn.commit()
+        with liveStateLock:
+            if inputName not in liveLongest or duration <= liveLongest[inputName]:
+                return
+            liveLongest[inputName] = duration
+            pendingLongest[inputName] = duration
+            liveCounters.setLongest(inputName, duration)
+            publisher.updateLongest(inputName, duration)
+
+    # Writes the pending totals and longest durations to the database
+    def flushLiveState(conn):
+        with liveStateLock:
+            totals, longest = dict(pendingTotals), dict(pendingLongest)
+            pendingTotals.clear()
+            pendingLongest.clear()
+
+        conn.executemany('UPDATE totalCounts SET totalCount = totalCount + ? WHERE inputID = ?',
+                         [(amount, inputDictionary.getID(name)) for name, amount in totals.items()])
+        conn.executemany('UPDATE lifetimeLongestDurations SET duration = ? WHERE inputID = ?',
+                         [(duration, inputDictionary.getID(name)) for name, duration in longest.items()])
+        conn.commit()
                 
     def updateMouseTraversedDistance(distance):
-        executeDB('''
-            UPDATE totalCounts SET totalCount = totalCount + ? WHERE inputName = 'mousedistance'
-        ''', (distance,))
+        incrementTotalCount('mousedistance', distance)
         
     def updateLifetimeLongestDurations():
         with sqlite3.connect(DATABASE) as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT inputName, duration FROM lifetimeLongestDurations WHERE duration > 0
+                SELECT i.name, l.duration FROM lifetimeLongestDurations l
+                JOIN inputs i ON i.id = l.inputID
+                WHERE l.duration > 0
             ''')
             return cursor.fetchall()
 
@@ -244,26 +309,116 @@ try:
                 return keyStr
             return keyStr
 
+    # Tells readers of the shared counters that the collector is still running
+    def beatLiveCounters():
+        while True:
+            liveCounters.beat()
+            time.sleep(HEARTBEAT_INTERVAL)
+
     # Wipes old data to avoid taking up too much storage
     def wipeOldData():
         while True:
             removeMousePositions = datetime.now() - timedelta(days=7)
             executeDB('DELETE FROM mousePositions WHERE timestamp < ?', (removeMousePositions.strftime('%Y-%m-%d %H:%M:%S'),))
 
+            # Old events go a month at a time by deleting their partition. Partitions still open somewhere
+            # are counted in the metrics and tried again the next day
+            if EVENT_RETENTION_MONTHS is not None:
+                metrics.record('undeletedPartitions', deleteOldPartitions(partitionDirectory, EVENT_RETENTION_MONTHS))
+
             time.sleep(86400)
 
+    # Pushes the current typing speed every second
+    def updateTypingSpeed():
+        lastWPM = None
+        while True:
+            time.sleep(1)
+            currentWPM = typingSpeed.getCurrentWPM(time.time_ns() // 1000000)
+            if currentWPM != lastWPM:
+                publisher.updateStat('wpm', currentWPM)
+                lastWPM = currentWPM
+
+    # Adds the in-memory rollups to the database
+    def flushRollups():
+        while True:
+            time.sleep(ROLLUP_INTERVAL)
+            startTime = time.perf_counter_ns()
+            try:
+                with sqlite3.connect(DATABASE) as conn:
+                    typingSpeed.flush(conn, time.time_ns() // 1000000)
+                    keyTransitions.flush(conn)
+                    holdDurations.flush(conn, inputDictionary.getID)
+                    foregroundApps.flush(conn)
+                    activityHistogram.flush(conn)
+                    activityPyramid.flush(conn)
+                    metrics.record('rollupBatchSize', conn.total_changes)
+            except sqlite3.Error:
+                pass
+            metrics.record('rollupFlushTime', (time.perf_counter_ns() - startTime) / 1e6)
+
+    # Closes the journal segment once it is old enough and adds the closed segments to the database.
+    # The first pass runs right away, adding the segments left by the last run
+    def compactJournal():
+        while True:
+            startTime = time.perf_counter_ns()
+            try:
+                with sqlite3.connect(DATABASE) as conn:
+                    metrics.record('compactedEvents', compactSegments(conn, journalDirectory, journal.rotateIfOlderThan(SEGMENT_MAX_AGE), partitionDirectory))
+                    flushLiveState(conn)
+            except sqlite3.Error:
+                pass
+            metrics.record('compactionTime', (time.perf_counter_ns() - startTime) / 1e6)
+            time.sleep(COMPACT_INTERVAL)
+
+    # Backs the database up once a day, starting with a backup if the newest one is older than that
+    def backUpDatabase():
+        backupDirectory = os.path.join(scriptDirectory, 'backups')
+        while True:
+            backups = getBackups(backupDirectory)
+            if backups:
+                time.sleep(max(0, BACKUP_INTERVAL - (datetime.now() - backups[0][1]).total_seconds()))
+            startTime = time.perf_counter_ns()
+            try:
+                createBackup(DATABASE, backupDirectory)
+                rotateBackups(backupDirectory, BACKUP_COUNT)
+            except (sqlite3.Error, OSError):
+                time.sleep(BACKUP_INTERVAL)
+                continue
+            metrics.record('backupTime', (time.perf_counter_ns() - startTime) / 1e6)
+
+    # Writes the collector's own metrics to the database
+    def sampleMetrics():
+        while True:
+            time.sleep(METRICS_INTERVAL)
+            try:
+                with sqlite3.connect(DATABASE) as conn:
+                    metrics.sample(conn, time.time_ns() // 1000000)
+            except sqlite3.Error:
+                pass
+
     # Input handling functions
     def onKeyPress(key):
         keyStr = formatKey(key)
         if keyStr not in pressedKeys:
-            pressedKeys[keyStr] = datetime.now()
+            pressTime = time.perf_counter_ns()
+            pressedKeys[keyStr] = pressTime
+            eventTime = toEventTime(pressTime)
+            typingSpeed.addKey(keyStr, eventTime)
+            keyTransitions.addKey(keyStr, eventTime)
 
     def onKeyRelease(key):
         keyStr = formatKey(key)
         if keyStr in pressedKeys:
+            releaseTime = time.perf_counter_ns()
             pressTime = pressedKeys.pop(keyStr)
-            duration = (datetime.now() - pressTime).total_seconds()
-            logEvent(1, key=keyStr, duration=duration)
+            duration = (releaseTime - pressTime) / 1e9
+            eventTime = toEventTime(releaseTime)
+            logEvent(1, keyStr, eventTime, duration=duration)
+            holdDurations.addDuration(keyStr, duration, eventTime)
+            foregroundApps.countKey(eventTime)
+            activityHistogram.addInput(eventTime)
+            activityPyramid.addInput(0, eventTime)
+            publisher.countKey()
             incrementTotalCount(keyStr)
             updateLifetimeLongestDuration(keyStr, duration)
 
@@ -271,13 +426,20 @@ try:
         buttonString = f"mouse{str(button).split('.')[1].lower()}"
         if pressed:
             if buttonString not in pressedButtons:
-                pressedButtons[buttonString] = (datetime.now(), x, y)
+                pressedButtons[buttonString] = (time.perf_counter_ns(), x, y)
         else:
             if buttonString in pressedButtons:
+                releaseTime = time.perf_counter_ns()
                 pressTime, posX, posY = pressedButtons.pop(buttonString)
-                duration = (datetime.now() - pressTime).total_seconds()
-                logEvent(3, button=buttonString, positionX=posX, positionY=posY, duration=duration)
-                logEvent(4, button=buttonString, positionX=x, positionY=y)
+                duration = (releaseTime - pressTime) / 1e9
+                eventTime = toEventTime(releaseTime)
+                logEvent(3, buttonString, eventTime, positionX=posX, positionY=posY, duration=duration)
+                logEvent(4, buttonString, eventTime, positionX=x, positionY=y)
+                holdDurations.addDuration(buttonString, duration, eventTime)
+                foregroundApps.countClick(eventTime)
+                activityHistogram.addInput(eventTime)
+                activityPyramid.addInput(1, eventTime)
+                publisher.countClick()
                 incrementTotalCount(buttonString)
                 updateLifetimeLongestDuration(buttonString, duration)
 
@@ -315,11 +477,28 @@ try:
     # Starts the background process for tracking inputs
     def startBGProcess():
         threading.Thread(target=trackMousePosition, daemon=True).start()
+        threading.Thread(target=beatLiveCounters, daemon=True).start()
         threading.Thread(target=wipeOldData, daemon=True).start()
+        threading.Thread(target=reanchorClock, daemon=True).start()
+        threading.Thread(target=updateTypingSpeed, daemon=True).start()
+        threading.Thread(target=flushRollups, daemon=True).start()
+        threading.Thread(target=sampleMetrics, daemon=True).start()
+        threading.Thread(target=compactJournal, daemon=True).start()
+        threading.Thread(target=persistEvents, daemon=True).start()
+        threading.Thread(target=backUpDatabase, daemon=True).start()
+
+        # Without the channel, the dashboard falls back to polling the database
+        try:
+            publisher.start()
+        except OSError:
+            pass
         
     # Start listeners and background processes
-    keyboardListener = keyboard.Listener(on_press=onKeyPress, on_release=onKeyRelease)
-    mouseListener = mouse.Listener(on_click=onMouseClick, on_scroll=onScroll)
+    # The time spent inside the callbacks is recorded, as slow callbacks hold up the input hooks
+    keyboardListener = keyboard.Listener(on_press=metrics.timed('callbackLatency', onKeyPress),
+                                         on_release=metrics.timed('callbackLatency', onKeyRelease))
+    mouseListener = mouse.Listener(on_click=metrics.timed('callbackLatency', onMouseClick),
+                                   on_scroll=metrics.timed('callbackLatency', onScroll))
 
     keyboardListener.start()
     mouseListener.start()
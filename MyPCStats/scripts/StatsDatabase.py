@@ -0,0 +1,362 @@
+from InputNames import ALL_KEYS, COUNTER_NAMES
+from datetime import datetime, timedelta
+import threading
+import pathlib
+import sqlite3
+import sys
+import os
+
+# Version of the database layout, stored in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+# Converts between datetimes and the integer millisecond times stored in the events table
+def toEventTime(date):
+    return int(date.timestamp() * 1000)
+
+def fromEventTime(eventTime):
+    return datetime.fromtimestamp(eventTime / 1000)
+
+# Returns the local day of a ms time as 'YYYY-mm-dd' and the ms time the next day starts
+def getDayBounds(eventTime):
+    day = datetime.fromtimestamp(eventTime / 1000).date()
+    nextDay = datetime.combine(day + timedelta(days=1), datetime.min.time())
+    return day.strftime('%Y-%m-%d'), int(nextDay.timestamp() * 1000)
+
+# Creates the tables of the current layout if they are not made yet
+def createTables(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS eventTypes (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    )
+    ''')
+
+    # Dictionary of every input name, so the other tables only store a small integer id
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inputs (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL
+    )
+    ''')
+
+    # time is in milliseconds since the epoch
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        eventTypeID INTEGER NOT NULL,
+        time INTEGER NOT NULL,
+        inputID INTEGER NOT NULL,
+        positionX INTEGER,
+        positionY INTEGER,
+        duration REAL,
+        FOREIGN KEY (eventTypeID) REFERENCES eventTypes(id),
+        FOREIGN KEY (inputID) REFERENCES inputs(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS eventsByTypeAndTime ON events (eventTypeID, time)
+    ''')
+
+    # Id of the next event. New events go to monthly partitions (see EventPartitions), which take their
+    # ids from here so ids stay unique over all of them
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS eventIDs (
+        nextID INTEGER NOT NULL
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS mousePositions (
+        id INTEGER PRIMARY KEY,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        positionX INTEGER,
+        positionY INTEGER
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS totalCounts (
+        inputID INTEGER PRIMARY KEY,
+        totalCount INTEGER DEFAULT 0,
+        FOREIGN KEY (inputID) REFERENCES inputs(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lifetimeLongestDurations (
+        inputID INTEGER PRIMARY KEY,
+        duration REAL DEFAULT 0,
+        FOREIGN KEY (inputID) REFERENCES inputs(id)
+    )
+    ''')
+
+    # Typing speed rollups, one row per hour. typingTime is the ms spent inside bursts of typing
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS typingSpeedHourly (
+        hourStart INTEGER PRIMARY KEY,
+        keyCount INTEGER DEFAULT 0,
+        typingTime INTEGER DEFAULT 0,
+        peakWPM REAL DEFAULT 0,
+        burstCount INTEGER DEFAULT 0
+    )
+    ''')
+
+    # Hourly histograms of burst lengths and pauses between bursts (kind is 'burst' or 'pause')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS typingIntervalHistogram (
+        hourStart INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        bin INTEGER NOT NULL,
+        count INTEGER DEFAULT 0,
+        PRIMARY KEY (hourStart, kind, bin)
+    )
+    ''')
+
+    # Per-day snapshots of the key-to-key transition matrix (see KeyTransitions)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS keyTransitions (
+        day TEXT PRIMARY KEY,
+        counts BLOB NOT NULL
+    )
+    ''')
+
+    # Per-day, per-input histograms of hold durations in log buckets (see HoldDurations)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS holdDurations (
+        day TEXT NOT NULL,
+        inputID INTEGER NOT NULL,
+        counts BLOB NOT NULL,
+        PRIMARY KEY (day, inputID),
+        FOREIGN KEY (inputID) REFERENCES inputs(id)
+    )
+    ''')
+
+    # Keys and clicks per day and foreground app (see ForegroundApps)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS appUsage (
+        day TEXT NOT NULL,
+        app TEXT NOT NULL,
+        keyCount INTEGER DEFAULT 0,
+        clickCount INTEGER DEFAULT 0,
+        PRIMARY KEY (day, app)
+    )
+    ''')
+
+    # Inputs per hour-of-week slot and the days that had any input (see ActivityHistogram)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS activityHourOfWeek (
+        slot INTEGER PRIMARY KEY,
+        count INTEGER DEFAULT 0
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS activeDays (
+        day TEXT PRIMARY KEY,
+        weekday INTEGER NOT NULL
+    )
+    ''')
+
+    # Keys and clicks per hour, day and month, keyed by the ms time each bucket starts (see ActivityPyramid)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS activityPyramid (
+        level TEXT NOT NULL,
+        bucketStart INTEGER NOT NULL,
+        keyCount INTEGER DEFAULT 0,
+        clickCount INTEGER DEFAULT 0,
+        PRIMARY KEY (level, bucketStart)
+    )
+    ''')
+
+    # Collector self-telemetry, one row per metric and sample (see CollectorMetrics)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS collectorMetrics (
+        time INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        total REAL NOT NULL,
+        maximum REAL NOT NULL,
+        PRIMARY KEY (name, time)
+    )
+    ''')
+
+    # Event journal segments already added to the events table but not yet deleted (see EventJournal)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS journalSegments (
+        sequence INTEGER PRIMARY KEY,
+        recordCount INTEGER NOT NULL,
+        compactedAt INTEGER NOT NULL
+    )
+    ''')
+
+# Inserts the fixed rows: event types, the known inputs and their totals
+def seedTables(cursor):
+    cursor.execute('''
+    INSERT OR IGNORE INTO eventTypes (id, name) VALUES
+    (1, 'keyPress'),
+    (2, 'keyRelease'),
+    (3, 'mouseClick'),
+    (4, 'mouseRelease'),
+    (5, 'mouseScroll')
+    ''')
+
+    # eventIDs holds one row. The guard is outside the aggregate, which returns a row even for no events,
+    # and extra rows seeded by earlier versions are removed
+    cursor.execute('''
+    INSERT INTO eventIDs (nextID)
+    SELECT nextID FROM (SELECT COALESCE(MAX(id), 0) + 1 AS nextID FROM events)
+    WHERE NOT EXISTS (SELECT 1 FROM eventIDs)
+    ''')
+    cursor.execute('''
+    DELETE FROM eventIDs WHERE rowid <> (SELECT rowid FROM eventIDs ORDER BY nextID DESC LIMIT 1)
+    ''')
+
+    # Known inputs are inserted in a fixed order, so they get the same ids in every database
+    cursor.executemany('INSERT OR IGNORE INTO inputs (name) VALUES (?)', [(name,) for name in COUNTER_NAMES])
+
+    # Insert all counters into totalCounts and all inputs into lifetimeLongestDurations
+    cursor.executemany('''
+    INSERT OR IGNORE INTO totalCounts (inputID) SELECT id FROM inputs WHERE name = ?
+    ''', [(name,) for name in COUNTER_NAMES])
+    cursor.executemany('''
+    INSERT OR IGNORE INTO lifetimeLongestDurations (inputID) SELECT id FROM inputs WHERE name = ?
+    ''', [(name,) for name in ALL_KEYS])
+
+# Returns the column names of a table, or an empty list if it does not exist
+def getColumns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+# Moves a database from the original layout (TEXT names and timestamps) to inputs ids and integer times.
+# Event ids are kept so anything that follows the table by id keeps working
+def migrateToInputIDs(cursor):
+    cursor.execute('ALTER TABLE events RENAME TO eventsText')
+    cursor.execute('ALTER TABLE totalCounts RENAME TO totalCountsText')
+    cursor.execute('ALTER TABLE lifetimeLongestDurations RENAME TO lifetimeLongestDurationsText')
+    cursor.execute('DROP INDEX IF EXISTS eventsByTypeAndTime')
+
+    createTables(cursor)
+    seedTables(cursor)
+
+    # Inputs that were recorded but are not in the known list get the next ids
+    cursor.execute('''
+    INSERT OR IGNORE INTO inputs (name)
+    SELECT COALESCE(key, button) FROM eventsText WHERE COALESCE(key, button) IS NOT NULL
+    UNION SELECT inputName FROM totalCountsText
+    UNION SELECT inputName FROM lifetimeLongestDurationsText
+    ''')
+
+    # Old timestamps are local time; strftime with 'utc' converts them to epoch seconds
+    cursor.execute('''
+    INSERT INTO events (id, eventTypeID, time, inputID, positionX, positionY, duration)
+    SELECT e.id, e.eventTypeID, CAST(strftime('%s', e.timestamp, 'utc') AS INTEGER) * 1000, i.id, e.positionX, e.positionY, e.duration
+    FROM eventsText e
+    JOIN inputs i ON i.name = COALESCE(e.key, e.button)
+    ''')
+
+    # eventIDs was seeded above while the events table was still empty
+    cursor.execute('UPDATE eventIDs SET nextID = (SELECT COALESCE(MAX(id), 0) + 1 FROM events)')
+
+    cursor.execute('''
+    INSERT OR REPLACE INTO totalCounts (inputID, totalCount)
+    SELECT i.id, t.totalCount FROM totalCountsText t JOIN inputs i ON i.name = t.inputName
+    ''')
+    cursor.execute('''
+    INSERT OR REPLACE INTO lifetimeLongestDurations (inputID, duration)
+    SELECT i.id, l.duration FROM lifetimeLongestDurationsText l JOIN inputs i ON i.name = l.inputName
+    ''')
+
+    cursor.execute('DROP TABLE eventsText')
+    cursor.execute('DROP TABLE totalCountsText')
+    cursor.execute('DROP TABLE lifetimeLongestDurationsText')
+
+# Sets up the tables and data in the database, migrating older layouts first
+def setupDatabase(database):
+    conn = sqlite3.connect(database, isolation_level=None)
+    cursor = conn.cursor()
+    migrated = False
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
+
+        if version < 1 and 'timestamp' in getColumns(cursor, 'events'):
+            migrateToInputIDs(cursor)
+            migrated = True
+
+        createTables(cursor)
+        seedTables(cursor)
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        cursor.execute('COMMIT')
+
+        # Give the space of the old rows back to the file system
+        if migrated:
+            cursor.execute('VACUUM')
+    except Exception:
+        if conn.in_transaction:
+            cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+# Returns the URI that opens a database read-only. Connections opening it need uri=True
+def getReadOnlyURI(database):
+    return pathlib.Path(os.path.abspath(database)).as_uri() + '?mode=ro'
+
+# Returns whether an open database already has the current layout, so it can be read without setting it up
+def hasCurrentLayout(conn):
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+        return False
+    expected = sqlite3.connect(':memory:')
+    try:
+        createTables(expected.cursor())
+        expectedTables = {row[0] for row in expected.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        expected.close()
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return expectedTables <= tables
+
+# Returns what to open to read a database that is only an input, like another machine's database, without
+# writing to it. A database with the current layout is opened read-only as it is. An older one is copied
+# to copyPath and the copy is set up instead, so it is the caller's to delete
+def getReadableDatabase(database, copyPath):
+    readOnlyURI = getReadOnlyURI(database)
+    source = sqlite3.connect(readOnlyURI, uri=True)
+    try:
+        if hasCurrentLayout(source):
+            return readOnlyURI
+        copy = sqlite3.connect(copyPath)
+        try:
+            source.backup(copy)
+        finally:
+            copy.close()
+    finally:
+        source.close()
+    setupDatabase(copyPath)
+    return copyPath
+
+# In-memory map from input names to their ids in the inputs table. Names are interned, and unknown
+# inputs are added to the table the first time they are seen
+class InputDictionary:
+    def __init__(self, database):
+        self.database = database
+        self.lock = threading.Lock()
+        with sqlite3.connect(database) as conn:
+            rows = conn.execute('SELECT name, id FROM inputs').fetchall()
+        self.ids = {sys.intern(name): inputID for name, inputID in rows}
+        self.names = {inputID: name for name, inputID in self.ids.items()}
+
+    def getID(self, inputName):
+        inputID = self.ids.get(inputName)
+        if inputID is None:
+            with self.lock:
+                with sqlite3.connect(self.database) as conn:
+                    conn.execute('INSERT OR IGNORE INTO inputs (name) VALUES (?)', (inputName,))
+                    inputID = conn.execute('SELECT id FROM inputs WHERE name = ?', (inputName,)).fetchone()[0]
+                self.ids[sys.intern(inputName)] = inputID
+                self.names[inputID] = inputName
+        return inputID
+
+    def getName(self, inputID):
+        return self.names.get(inputID)
@@ -0,0 +1,153 @@
+from collections import deque
+import threading
+
+# Keystrokes counted as one word in words per minute
+CHARACTERS_PER_WORD = 5
+
+# Length of the rolling window used for the current speed (in ms)
+WPM_WINDOW = 60000
+
+# A gap between two keys longer than this ends a burst of typing (in ms)
+BURST_GAP = 2000
+
+# Rollups are kept per hour (in ms)
+HOUR = 3600000
+
+# Upper edges of the histogram bins for burst lengths (in keys) and pauses between bursts (in ms).
+# Anything above the last edge goes into one extra bin
+BURST_BINS = [5, 10, 20, 50, 100, 200, 500]
+PAUSE_BINS = [5000, 10000, 30000, 60000, 300000, 900000, 3600000]
+
+# Keys that do not type a character, so they are left out of the speed
+NON_TYPING_KEYS = {'shift', 'ctrl', 'alt', 'alt_gr', 'win', 'capslock', 'tab', 'esc', 'menu', 'num_lock', 'scroll_lock',
+                   'up', 'down', 'left', 'right', 'home', 'end', 'page_up', 'page_down', 'insert', 'delete', 'print_screen', 'pause',
+                   'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12'}
+
+# Returns the index of the histogram bin a value falls in
+def getBin(value, edges):
+    for i, edge in enumerate(edges):
+        if value <= edge:
+            return i
+    return len(edges)
+
+# Converts a number of keys over some milliseconds to words per minute
+def toWPM(keyCount, milliseconds):
+    if milliseconds <= 0:
+        return 0
+    return keyCount / CHARACTERS_PER_WORD * 60000 / milliseconds
+
+# Streaming typing speed analytics. Every key press is handled in constant (amortized) time: the rolling
+# window drops keys as they age out, and bursts/pauses are counted as they end. Results build up in
+# per-hour deltas that flush() adds to the typingSpeedHourly and typingIntervalHistogram rollups
+class TypingSpeedTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recentKeys = deque()
+        self.lastKeyTime = None
+        self.burstKeys = 0
+        self.resetPending()
+
+    def resetPending(self):
+        # hourStart: [keyCount, typingTime, peakWPM, burstCount]
+        self.pendingHours = {}
+        # (hourStart, kind, bin): count
+        self.pendingHistogram = {}
+
+    def getPendingHour(self, eventTime):
+        hourStart = eventTime - eventTime % HOUR
+        if hourStart not in self.pendingHours:
+            self.pendingHours[hourStart] = [0, 0, 0, 0]
+        return hourStart, self.pendingHours[hourStart]
+
+    def countInterval(self, eventTime, kind, bin):
+        hourStart = eventTime - eventTime % HOUR
+        key = (hourStart, kind, bin)
+        self.pendingHistogram[key] = self.pendingHistogram.get(key, 0) + 1
+
+    # Feeds a key press with its time in ms. Keys must arrive in time order
+    def addKey(self, inputName, eventTime):
+        if inputName in NON_TYPING_KEYS:
+            return
+        with self.lock:
+            self.recentKeys.append(eventTime)
+            while self.recentKeys[0] <= eventTime - WPM_WINDOW:
+                self.recentKeys.popleft()
+
+            _, hour = self.getPendingHour(eventTime)
+            hour[0] += 1
+            hour[2] = max(hour[2], len(self.recentKeys) / CHARACTERS_PER_WORD)
+
+            if self.lastKeyTime is not None:
+                gap = eventTime - self.lastKeyTime
+                if gap <= BURST_GAP:
+                    hour[1] += gap
+                    self.burstKeys += 1
+                else:
+                    self.endBurst()
+                    self.countInterval(eventTime, 'pause', getBin(gap, PAUSE_BINS))
+                    self.burstKeys = 1
+            else:
+                self.burstKeys = 1
+            self.lastKeyTime = eventTime
+
+    # Counts the burst that ended at the last key
+    def endBurst(self):
+        if self.burstKeys > 1:
+            _, hour = self.getPendingHour(self.lastKeyTime)
+            hour[3] += 1
+            self.countInterval(self.lastKeyTime, 'burst', getBin(self.burstKeys, BURST_BINS))
+        self.burstKeys = 0
+
+    # Returns the words per minute of the rolling window at the given time
+    def getCurrentWPM(self, now):
+        with self.lock:
+            while self.recentKeys and self.recentKeys[0] <= now - WPM_WINDOW:
+                self.recentKeys.popleft()
+            return len(self.recentKeys) / CHARACTERS_PER_WORD
+
+    # Adds the pending deltas to the rollup tables. A burst that is still going is counted once it ends
+    def flush(self, conn, now):
+        with self.lock:
+            if self.lastKeyTime is not None and now - self.lastKeyTime > BURST_GAP:
+                self.endBurst()
+            hours = self.pendingHours
+            histogram = self.pendingHistogram
+            self.resetPending()
+
+        if not hours and not histogram:
+            return
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO typingSpeedHourly (hourStart, keyCount, typingTime, peakWPM, burstCount)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hourStart) DO UPDATE SET
+                keyCount = keyCount + excluded.keyCount,
+                typingTime = typingTime + excluded.typingTime,
+                peakWPM = MAX(peakWPM, excluded.peakWPM),
+                burstCount = burstCount + excluded.burstCount
+        ''', [(hourStart, *values) for hourStart, values in hours.items()])
+        cursor.executemany('''
+            INSERT INTO typingIntervalHistogram (hourStart, kind, bin, count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(hourStart, kind, bin) DO UPDATE SET count = count + excluded.count
+        ''', [(*key, count) for key, count in histogram.items()])
+        conn.commit()
+
+    # Fills empty rollups from the key events already in the database, so older history shows up too
+    def backfill(self, conn, now):
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM typingSpeedHourly')
+        if cursor.fetchone()[0]:
+            return
+        cursor.execute('''
+            SELECT i.name, e.time
+            FROM events e
+            JOIN inputs i ON i.id = e.inputID
+            WHERE e.eventTypeID = 1
+            ORDER BY e.time
+        ''')
+        for inputName, eventTime in cursor:
+            self.addKey(inputName, eventTime)
+        with self.lock:
+            self.recentKeys.clear()
+        self.flush(conn, now)
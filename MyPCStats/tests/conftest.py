@@ -0,0 +1,7 @@
+import sys
+import os
+
+# The dashboard modules live in MyPCStats and the shared ones in its scripts folder, like main.py sets up
+appDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, appDirectory)
+sys.path.insert(0, os.path.join(appDirectory, 'scripts'))
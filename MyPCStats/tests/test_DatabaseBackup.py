@@ -0,0 +1,119 @@
+from datetime import datetime
+import sqlite3
+import os
+
+import pytest
+
+import DatabaseBackup
+from StatsDatabase import setupDatabase, toEventTime
+from EventPartitions import getPartitionDirectory, getNextEventID, insertEvents, detachPartitions
+from DatabaseBackup import getDatabaseFiles, getBackups, createBackup, readManifest, rotateBackups, restoreBackup
+
+MARCH = toEventTime(datetime(2024, 3, 5, 12))
+APRIL = toEventTime(datetime(2024, 4, 9, 8))
+
+# Adds key presses at the given ms times the way compaction does, and returns the database's connection
+def addEvents(database, times, conn=None):
+    conn = conn or sqlite3.connect(database)
+    insertEvents(conn, getPartitionDirectory(database), [(1, eventTime, 1, None, None, None) for eventTime in times])
+    conn.commit()
+    detachPartitions(conn)
+    return conn
+
+# Returns the (id, time) of every event in the partitions, in id order
+def getPartitionEvents(database):
+    directory = getPartitionDirectory(database)
+    events = []
+    for fileName in sorted(os.listdir(directory)):
+        partition = sqlite3.connect(os.path.join(directory, fileName))
+        events.extend(partition.execute('SELECT id, time FROM events').fetchall())
+        partition.close()
+    return sorted(events)
+
+@pytest.fixture
+def database(tmp_path):
+    database = str(tmp_path / 'InputDB.db')
+    setupDatabase(database)
+    return database
+
+def test_database_is_backed_up_after_its_partitions(database):
+    addEvents(database, [MARCH, APRIL]).close()
+    assert getDatabaseFiles(database)[-1] == os.path.basename(database)
+
+def test_taken_event_id_is_not_replaced(database):
+    conn = addEvents(database, [MARCH])
+    conn.execute('UPDATE eventIDs SET nextID = 1')
+    with pytest.raises(sqlite3.IntegrityError):
+        addEvents(database, [MARCH + 1000], conn)
+    conn.close()
+    assert getPartitionEvents(database) == [(1, MARCH)]
+
+# A backup whose database was copied before the events that were compacted into a partition after it
+def test_restore_moves_next_event_id_past_restored_events(database, tmp_path):
+    conn = addEvents(database, [MARCH, APRIL, APRIL + 1000])
+    conn.execute('UPDATE eventIDs SET nextID = 2')
+    conn.commit()
+    conn.close()
+    manifestPath, _, _ = createBackup(database, str(tmp_path / 'backups'))
+
+    restoreBackup(manifestPath, database)
+    conn = sqlite3.connect(database)
+    assert getNextEventID(conn) == 4
+    addEvents(database, [APRIL + 2000], conn).close()
+    assert getPartitionEvents(database) == [(1, MARCH), (2, APRIL), (3, APRIL + 1000), (4, APRIL + 2000)]
+
+# Returns the totals and (id, time) events of a database, to compare it before and after
+def readDatabase(database):
+    conn = sqlite3.connect(database)
+    totals = conn.execute('SELECT inputID, totalCount FROM totalCounts ORDER BY inputID').fetchall()
+    conn.close()
+    return totals, getPartitionEvents(database)
+
+def test_restore_brings_back_the_backed_up_database(database, tmp_path):
+    conn = addEvents(database, [MARCH, APRIL])
+    conn.execute('UPDATE totalCounts SET totalCount = 2 WHERE inputID = 1')
+    conn.commit()
+    backedUp = readDatabase(database)
+    manifestPath, _, _ = createBackup(database, str(tmp_path / 'backups'))
+
+    # Changes after the backup, including a month that did not have a partition yet
+    conn.execute('UPDATE totalCounts SET totalCount = 5 WHERE inputID = 1')
+    conn.commit()
+    addEvents(database, [APRIL + 1000, toEventTime(datetime(2024, 5, 1, 10))], conn)
+
+    # The dashboard's connection stays open over the restore and sees the restored data
+    restoreBackup(manifestPath, database)
+    assert readDatabase(database) == backedUp
+    assert conn.execute('SELECT totalCount FROM totalCounts WHERE inputID = 1').fetchone()[0] == 2
+    assert sorted(os.listdir(getPartitionDirectory(database))) == ['events-2024-03.db', 'events-2024-04.db']
+    conn.close()
+
+def test_unchanged_chunks_are_stored_once(database, tmp_path):
+    addEvents(database, [MARCH, APRIL]).close()
+    backupDirectory = str(tmp_path / 'backups')
+    manifestPath, storedChunks, totalChunks = createBackup(database, backupDirectory)
+    assert storedChunks == totalChunks == len(getDatabaseFiles(database))
+    os.rename(manifestPath, os.path.join(backupDirectory, 'InputDB-20240101-000000.backup'))
+
+    _, storedChunks, totalChunks = createBackup(database, backupDirectory)
+    assert storedChunks == 0
+    assert totalChunks == len(getDatabaseFiles(database))
+
+def test_rotation_keeps_the_newest_backups_and_their_chunks(database, tmp_path, monkeypatch):
+    monkeypatch.setattr(DatabaseBackup, 'CHUNK_GRACE_PERIOD', -1)
+    backupDirectory = str(tmp_path / 'backups')
+    conn = addEvents(database, [MARCH])
+    for day in (1, 2, 3):
+        manifestPath, _, _ = createBackup(database, backupDirectory)
+        os.rename(manifestPath, os.path.join(backupDirectory, f'InputDB-202401{day:02d}-000000.backup'))
+        addEvents(database, [MARCH + day * 1000], conn)
+    conn.close()
+
+    rotateBackups(backupDirectory, 2)
+    backups = getBackups(backupDirectory)
+    assert [name for name, _, _ in backups] == ['InputDB-20240103-000000', 'InputDB-20240102-000000']
+    usedChunks = {chunkHash for _, _, manifestPath in backups for _, chunkHashes in readManifest(manifestPath) for chunkHash in chunkHashes}
+    assert set(os.listdir(os.path.join(backupDirectory, 'chunks'))) == usedChunks
+
+    restoreBackup(backups[-1][2], database)
+    assert getPartitionEvents(database) == [(1, MARCH), (2, MARCH + 1000)]
@@ -0,0 +1,124 @@
+from datetime import datetime
+import sqlite3
+
+import pytest
+
+from StatsDatabase import setupDatabase, toEventTime
+from EventPartitions import getPartitionDirectory, insertEvents, detachPartitions
+from DatabaseMerge import setupMergedDatabase, addSource, mergeDatabases
+from test_StatsDatabase import createOriginalDatabase
+
+MARCH = toEventTime(datetime(2024, 3, 5, 12))
+APRIL = toEventTime(datetime(2024, 4, 9, 8))
+
+# Creates a source database with key presses of the named inputs at the given ms times
+def createSource(path, presses):
+    setupDatabase(path)
+    addPresses(path, presses)
+
+# Adds key presses to a source's partitions, and to its totalCounts and activityHourOfWeek rollups
+def addPresses(path, presses):
+    conn = sqlite3.connect(path)
+    for name, _ in presses:
+        conn.execute('INSERT OR IGNORE INTO inputs (name) VALUES (?)', (name,))
+    inputIDs = dict(conn.execute('SELECT name, id FROM inputs').fetchall())
+    insertEvents(conn, getPartitionDirectory(path), [(1, eventTime, inputIDs[name], None, None, None) for name, eventTime in presses])
+    for name, _ in presses:
+        conn.execute('INSERT INTO totalCounts (inputID, totalCount) VALUES (?, 1) ON CONFLICT(inputID) DO UPDATE SET totalCount = totalCount + 1',
+                     (inputIDs[name],))
+    conn.execute('INSERT INTO activityHourOfWeek (slot, count) VALUES (0, ?) ON CONFLICT(slot) DO UPDATE SET count = count + excluded.count',
+                 (len(presses),))
+    conn.commit()
+    detachPartitions(conn)
+    conn.close()
+
+# Returns the merged (source name, input name, time) of every event and the totals by input name
+def readMerged(database):
+    conn = sqlite3.connect(database)
+    events = conn.execute('''
+        SELECT s.name, i.name, e.time FROM events e
+        JOIN mergeSources s ON s.id = e.sourceID
+        JOIN inputs i ON i.id = e.inputID
+        ORDER BY s.name, e.time
+    ''').fetchall()
+    totals = dict(conn.execute('''
+        SELECT i.name, t.totalCount FROM totalCounts t JOIN inputs i ON i.id = t.inputID WHERE t.totalCount > 0
+    ''').fetchall())
+    hourOfWeek = conn.execute('SELECT count FROM activityHourOfWeek WHERE slot = 0').fetchone()[0]
+    conn.close()
+    return events, totals, hourOfWeek
+
+@pytest.fixture
+def databases(tmp_path):
+    local = str(tmp_path / 'InputDB.db')
+    laptop = str(tmp_path / 'Laptop.db')
+    merged = str(tmp_path / 'Merged.db')
+    createSource(local, [('a', MARCH), ('b', MARCH + 1000), ('a', APRIL)])
+
+    # The laptop saw an input the local database does not know, so its ids differ
+    createSource(laptop, [('media_play', MARCH), ('a', MARCH + 500)])
+    setupMergedDatabase(merged)
+    conn = sqlite3.connect(merged)
+    addSource(conn, 'Laptop', laptop)
+    conn.close()
+    return local, laptop, merged
+
+def test_sources_are_combined_by_input_name(databases):
+    local, _, merged = databases
+    addedEvents, _ = mergeDatabases(merged, local)
+    assert addedEvents == 5
+    events, totals, hourOfWeek = readMerged(merged)
+    assert events == [('Laptop', 'media_play', MARCH), ('Laptop', 'a', MARCH + 500),
+                      ('This PC', 'a', MARCH), ('This PC', 'b', MARCH + 1000), ('This PC', 'a', APRIL)]
+    assert totals == {'a': 3, 'b': 1, 'media_play': 1}
+    assert hourOfWeek == 5
+
+def test_merging_again_adds_nothing_twice(databases):
+    local, _, merged = databases
+    mergeDatabases(merged, local)
+    before = readMerged(merged)
+    addedEvents, _ = mergeDatabases(merged, local)
+    assert addedEvents == 0
+    assert readMerged(merged) == before
+
+def test_only_new_events_are_added(databases):
+    local, laptop, merged = databases
+    mergeDatabases(merged, local)
+    addPresses(laptop, [('b', APRIL)])
+    addedEvents, _ = mergeDatabases(merged, local)
+    assert addedEvents == 1
+    events, totals, hourOfWeek = readMerged(merged)
+    assert len(events) == 6
+    assert totals == {'a': 3, 'b': 2, 'media_play': 1}
+    assert hourOfWeek == 6
+
+# A source that starts over with lower ids is read again from the start, without copying its old events twice
+def test_source_with_lower_ids_is_read_from_the_start(databases):
+    local, laptop, merged = databases
+    mergeDatabases(merged, local)
+    conn = sqlite3.connect(merged)
+    conn.execute("UPDATE mergeSources SET lastEventID = 1000 WHERE name = 'Laptop'")
+    conn.commit()
+    conn.close()
+    addedEvents, _ = mergeDatabases(merged, local)
+    assert addedEvents == 0
+    assert len(readMerged(merged)[0]) == 5
+
+# A source with the original layout is merged from a copy, and the source itself is left as it was
+def test_old_source_is_not_changed(databases, tmp_path):
+    local, _, merged = databases
+    old = str(tmp_path / 'Old.db')
+    createOriginalDatabase(old, [(1, 1, '2024-03-05 12:00:00', 'a', None, None, None, None)], [('a', 1)])
+    conn = sqlite3.connect(merged)
+    addSource(conn, 'Old', old)
+    conn.close()
+
+    mergeDatabases(merged, local)
+    events, totals, _ = readMerged(merged)
+    assert ('Old', 'a', MARCH) in events
+    assert totals['a'] == 4
+    with sqlite3.connect(old) as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == 0
+        assert 'timestamp' in [row[1] for row in conn.execute('PRAGMA table_info(events)')]
+    conn.close()
+    assert not any(path.suffix == '.tmp' for path in tmp_path.iterdir())
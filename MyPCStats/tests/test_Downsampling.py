@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+from Downsampling import getLTTBIndices, downsampleLTTB
+
+# A long flat series with one spike and one dip
+def makeFlatSeries(pointCount=10000, spikeIndex=2500, dipIndex=7300):
+    x = np.arange(pointCount, dtype=float)
+    y = np.zeros(pointCount)
+    y[spikeIndex] = 100
+    y[dipIndex] = -100
+    return x, y
+
+@pytest.mark.parametrize('threshold', [3, 4, 10, 100, 500])
+def test_spike_and_dip_are_kept(threshold):
+    x, y = makeFlatSeries()
+    keptX, keptY = downsampleLTTB(x, y, threshold)
+    if threshold == 3:
+        # A single bucket can only keep one of the two extremes
+        assert keptY.max() == 100 or keptY.min() == -100
+    else:
+        assert 2500 in keptX and 7300 in keptX
+        assert keptY.max() == 100 and keptY.min() == -100
+
+@pytest.mark.parametrize('threshold', [3, 7, 50, 999])
+def test_first_and_last_points_are_kept(threshold):
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 17) * 50 + np.cos(x / 3)
+    indices = getLTTBIndices(x, y, threshold)
+    assert indices[0] == 0
+    assert indices[-1] == len(x) - 1
+
+@pytest.mark.parametrize('pointCount, threshold', [(1000, 3), (1000, 10), (1000, 999), (10001, 640), (37, 36)])
+def test_output_has_at_most_threshold_points(pointCount, threshold):
+    x = np.arange(pointCount, dtype=float)
+    y = np.random.default_rng(pointCount).normal(size=pointCount)
+    indices = getLTTBIndices(x, y, threshold)
+    assert len(indices) <= threshold
+    assert np.all(np.diff(indices) > 0)
+
+@pytest.mark.parametrize('threshold', [0, 1, 2, 50, 51, 1000])
+def test_series_passes_through_unchanged(threshold):
+    x = np.arange(50, dtype=float)
+    y = np.random.default_rng(0).normal(size=50)
+    keptX, keptY = downsampleLTTB(x, y, threshold)
+    assert np.array_equal(keptX, x)
+    assert np.array_equal(keptY, y)
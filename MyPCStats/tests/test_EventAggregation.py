@@ -0,0 +1,71 @@
+from datetime import datetime
+import sqlite3
+
+import pytest
+
+import EventAggregation
+from StatsDatabase import setupDatabase, toEventTime
+from EventPartitions import getPartitionDirectory, getDatabasePath, insertEvents, detachPartitions
+from EventAggregation import aggregateEvents, shutdownExecutor
+
+# (month, input id, hold duration) of the events in the partitions
+EVENTS = [
+    (1, 1, 0.5), (1, 2, 2.0),
+    (2, 1, 1.5),
+    (3, 2, 0.25), (3, 2, 4.0),
+    (4, 1, 0.75), (4, 3, 3.0),
+]
+
+@pytest.fixture
+def conn(tmp_path):
+    database = str(tmp_path / 'InputDB.db')
+    setupDatabase(database)
+    conn = sqlite3.connect(database, uri=True)
+
+    # An event that was never moved into a partition
+    conn.execute('INSERT INTO events (id, eventTypeID, time, inputID, duration) VALUES (100, 2, ?, 3, 9.0)',
+                 (toEventTime(datetime(2023, 12, 31)),))
+    conn.execute('UPDATE eventIDs SET nextID = 101')
+    conn.commit()
+    insertEvents(conn, getPartitionDirectory(database),
+                 [(2, toEventTime(datetime(2024, month, 10)), inputID, None, None, duration) for month, inputID, duration in EVENTS])
+    conn.commit()
+    detachPartitions(conn)
+    yield conn
+    conn.close()
+    shutdownExecutor()
+
+# Runs every test on the pool and in the calling thread, which must agree
+@pytest.fixture(params=['pool', 'sequential'], autouse=True)
+def parallelMinPartitions(request, monkeypatch):
+    monkeypatch.setattr(EventAggregation, 'PARALLEL_MIN_PARTITIONS', 1 if request.param == 'pool' else 100)
+
+DURATIONS = 'SELECT inputID, {merge}(duration) FROM {{events}} WHERE eventTypeID = 2 GROUP BY inputID'
+
+def test_sum_adds_counts_over_all_tables(conn):
+    assert aggregateEvents(conn, 'SELECT inputID, COUNT(*) FROM {events} GROUP BY inputID') == {1: 3, 2: 3, 3: 2}
+
+def test_max_and_min_keep_the_extremes(conn):
+    assert aggregateEvents(conn, DURATIONS.format(merge='MAX'), merge='max') == {1: 1.5, 2: 4.0, 3: 9.0}
+    assert aggregateEvents(conn, DURATIONS.format(merge='MIN'), merge='min') == {1: 0.5, 2: 0.25, 3: 3.0}
+
+def test_time_range_limits_the_partitions(conn):
+    startTime, endTime = toEventTime(datetime(2024, 2, 1)), toEventTime(datetime(2024, 3, 31))
+    counts = aggregateEvents(conn, 'SELECT inputID, COUNT(*) FROM {events} WHERE time >= ? AND time < ? GROUP BY inputID',
+                             (startTime, endTime), startTime, endTime)
+    assert counts == {1: 1, 2: 2}
+
+# Groups of more than one column are keyed by a tuple, and NULL values (like MAX of no rows) are left out
+def test_multi_column_groups_and_empty_tables(conn):
+    counts = aggregateEvents(conn, '''
+        SELECT eventTypeID, inputID, COUNT(*) FROM {events} WHERE inputID = 3 GROUP BY eventTypeID, inputID
+    ''')
+    assert counts == {(2, 3): 2}
+    assert aggregateEvents(conn, 'SELECT 1, MAX(time) FROM {events} WHERE inputID = 99', merge='max') == {}
+
+# Workers attach the main database as 'stats' to look up input names, the caller attaches it itself
+def test_queries_can_read_the_main_database(conn):
+    query = 'SELECT i.name, COUNT(*) FROM {events} e JOIN stats.inputs i ON i.id = e.inputID GROUP BY i.name'
+    conn.execute('ATTACH DATABASE ? AS stats', (getDatabasePath(conn),))
+    assert aggregateEvents(conn, query) == {'a': 3, 'b': 3, 'c': 2}
+    conn.execute('DETACH DATABASE stats')
@@ -0,0 +1,110 @@
+from datetime import datetime
+import sqlite3
+
+import pytest
+
+import EventJournal
+from StatsDatabase import setupDatabase, toEventTime
+from EventPartitions import getPartitionDirectory, getNextEventID, queryEvents, detachPartitions
+from EventJournal import EventJournal as Journal, RECORD, HEADER, getSegments, readSegment, compactSegments
+
+START = toEventTime(datetime(2024, 3, 5, 12))
+
+@pytest.fixture
+def database(tmp_path):
+    database = str(tmp_path / 'InputDB.db')
+    setupDatabase(database)
+    return database
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(str(tmp_path / 'journal'))
+    yield journal
+    journal.map.close()
+
+# Writes count key presses a second apart and closes the segment, returning the sequence left open
+def appendKeyPresses(journal, count, start=START):
+    for index in range(count):
+        journal.append(1, start + index * 1000, 7)
+    return journal.rotateIfOlderThan(0)
+
+# Returns the (id, time) of every event, in id order
+def getEvents(conn):
+    rows = queryEvents(conn, 'SELECT id, time FROM {events}')
+    detachPartitions(conn)
+    return sorted(rows)
+
+def test_segment_round_trip(journal):
+    journal.append(1, START, 7)
+    journal.append(3, START + 1, 2, positionX=-5, positionY=1080, duration=0.25)
+    journal.rotateIfOlderThan(0)
+    (_, path), _ = getSegments(journal.directory)
+    assert readSegment(path) == [(1, START, 7, None, None, None), (3, START + 1, 2, -5, 1080, 0.25)]
+
+# A record is only counted once it is written whole, so a crash in the middle of one loses just that record
+def test_records_past_the_count_are_not_read(journal):
+    journal.append(1, START, 7)
+    RECORD.pack_into(journal.map, HEADER.size + RECORD.size, START + 1, 8, 1, 0, 0, 0.0)
+    journal.map.flush()
+    (_, path), = getSegments(journal.directory)
+    assert readSegment(path) == [(1, START, 7, None, None, None)]
+
+def test_new_journal_continues_after_old_segments(journal):
+    openSequence = appendKeyPresses(journal, 1)
+    restarted = Journal(journal.directory)
+    assert restarted.sequence == openSequence + 1
+    restarted.map.close()
+
+def test_compaction_adds_closed_segments_and_deletes_them(database, journal):
+    openSequence = appendKeyPresses(journal, 3)
+    journal.append(1, START + 60000, 7)
+    conn = sqlite3.connect(database)
+    assert compactSegments(conn, journal.directory, openSequence, getPartitionDirectory(database)) == 3
+    assert getEvents(conn) == [(1, START), (2, START + 1000), (3, START + 2000)]
+    assert [sequence for sequence, _ in getSegments(journal.directory)] == [openSequence]
+    assert conn.execute('SELECT COUNT(*) FROM journalSegments').fetchone()[0] == 0
+    conn.close()
+
+# A segment that was added but could not be deleted (like one still mapped by a dashboard) is skipped
+def test_segment_that_was_not_deleted_is_not_added_twice(database, journal, monkeypatch):
+    openSequence = appendKeyPresses(journal, 2)
+    conn = sqlite3.connect(database)
+    partitionDirectory = getPartitionDirectory(database)
+
+    def failRemove(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(EventJournal.os, 'remove', failRemove)
+    assert compactSegments(conn, journal.directory, openSequence, partitionDirectory) == 2
+    assert compactSegments(conn, journal.directory, openSequence, partitionDirectory) == 0
+    monkeypatch.undo()
+    assert compactSegments(conn, journal.directory, openSequence, partitionDirectory) == 0
+    assert getEvents(conn) == [(1, START), (2, START + 1000)]
+    assert [sequence for sequence, _ in getSegments(journal.directory)] == [openSequence]
+    conn.close()
+
+# Events and the segment's journalSegments row are one transaction: if it fails nothing of it is kept,
+# and the next compaction adds the segment once with the same ids
+def test_failed_compaction_keeps_nothing(database, journal, monkeypatch):
+    openSequence = appendKeyPresses(journal, 2)
+    conn = sqlite3.connect(database)
+    partitionDirectory = getPartitionDirectory(database)
+    insertEvents = EventJournal.insertEvents
+
+    def insertEventsThenFail(*args):
+        insertEvents(*args)
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(EventJournal, 'insertEvents', insertEventsThenFail)
+    with pytest.raises(sqlite3.OperationalError):
+        compactSegments(conn, journal.directory, openSequence, partitionDirectory)
+    conn.rollback()
+    detachPartitions(conn)
+    assert getEvents(conn) == []
+    assert getNextEventID(conn) == 1
+
+    monkeypatch.undo()
+    assert compactSegments(conn, journal.directory, openSequence, partitionDirectory) == 2
+    assert getEvents(conn) == [(1, START), (2, START + 1000)]
+    assert getNextEventID(conn) == 3
+    conn.close()
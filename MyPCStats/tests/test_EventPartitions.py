@@ -0,0 +1,139 @@
+from datetime import datetime
+import sqlite3
+
+import pytest
+
+import EventPartitions
+from StatsDatabase import setupDatabase, toEventTime
+from EventPartitions import (getPartitionDirectory, getPartitionMonths, getPartitionPath, getMonthsInRange, getMonthBounds,
+                             createPartition, insertEvents, detachPartitions, queryEvents, countEvents, migrateToPartitions,
+                             deleteOldPartitions, getNextEventID, getDatabasePath, MAX_ATTACHED_PARTITIONS)
+
+JANUARY = toEventTime(datetime(2024, 1, 20, 9))
+FEBRUARY = toEventTime(datetime(2024, 2, 29, 23, 59))
+MARCH = toEventTime(datetime(2024, 3, 1))
+
+@pytest.fixture
+def database(tmp_path):
+    database = str(tmp_path / 'InputDB.db')
+    setupDatabase(database)
+    return database
+
+# Adds key presses of an input at the given ms times the way compaction does
+def addEvents(conn, times, inputID=1):
+    insertEvents(conn, getPartitionDirectory(getDatabasePath(conn)), [(1, eventTime, inputID, None, None, None) for eventTime in times])
+    conn.commit()
+    detachPartitions(conn)
+
+# Returns the names of the attached partitions
+def getAttached(conn):
+    return [name for _, name, _ in conn.execute('PRAGMA database_list').fetchall() if name.startswith('events_')]
+
+def test_events_go_to_the_partition_of_their_month(database):
+    conn = sqlite3.connect(database)
+    addEvents(conn, [JANUARY, FEBRUARY, MARCH])
+    directory = getPartitionDirectory(database)
+    assert getPartitionMonths(directory) == ['2024-01', '2024-02', '2024-03']
+    for eventID, month, eventTime in ((1, '2024-01', JANUARY), (2, '2024-02', FEBRUARY), (3, '2024-03', MARCH)):
+        partition = sqlite3.connect(getPartitionPath(directory, month))
+        assert partition.execute('SELECT id, time FROM events').fetchall() == [(eventID, eventTime)]
+        partition.close()
+    assert getNextEventID(conn) == 4
+    conn.close()
+
+def test_queries_read_only_the_months_in_range(database):
+    conn = sqlite3.connect(database, uri=True)
+    addEvents(conn, [JANUARY, FEBRUARY, MARCH])
+    directory = getPartitionDirectory(database)
+    marchStart, _ = getMonthBounds('2024-03')
+    assert getMonthsInRange(directory, FEBRUARY, marchStart - 1) == ['2024-02']
+    assert getMonthsInRange(directory, FEBRUARY) == ['2024-02', '2024-03']
+    assert getMonthsInRange(directory, None, JANUARY) == ['2024-01']
+
+    rows = queryEvents(conn, 'SELECT time FROM {events} WHERE time >= ?', (FEBRUARY,), FEBRUARY, None, newestFirst=True)
+    assert rows == [(MARCH,), (FEBRUARY,)]
+    assert getAttached(conn) == ['events_2024_03', 'events_2024_02']
+    conn.close()
+
+# Events that were never moved into a partition are still counted
+def test_counts_include_the_main_table(database):
+    conn = sqlite3.connect(database, uri=True)
+    conn.execute('INSERT INTO events (id, eventTypeID, time, inputID) VALUES (100, 1, ?, 2)', (JANUARY,))
+    conn.execute('UPDATE eventIDs SET nextID = 101')
+    conn.commit()
+    addEvents(conn, [JANUARY, MARCH], inputID=2)
+    addEvents(conn, [FEBRUARY], inputID=3)
+    assert countEvents(conn, 'SELECT inputID, COUNT(*) FROM {events} GROUP BY inputID') == {2: 3, 3: 1}
+    conn.close()
+
+def test_older_partitions_are_detached_past_the_limit(database):
+    conn = sqlite3.connect(database, uri=True)
+    times = [toEventTime(datetime(2023, month, 15)) for month in range(1, 13)]
+    for eventTime in times:
+        addEvents(conn, [eventTime])
+    assert len(queryEvents(conn, 'SELECT id FROM {events}')) == 12
+    assert len(getAttached(conn)) == MAX_ATTACHED_PARTITIONS
+    conn.close()
+
+def test_batch_over_the_most_attached_months_is_added(database):
+    conn = sqlite3.connect(database, uri=True)
+    times = [toEventTime(datetime(2023, month, 15)) for month in range(1, MAX_ATTACHED_PARTITIONS + 1)]
+    addEvents(conn, times)
+    assert sorted(queryEvents(conn, 'SELECT time FROM {events}')) == [(eventTime,) for eventTime in times]
+    conn.close()
+
+def test_batch_over_too_many_months_is_refused(database):
+    conn = sqlite3.connect(database)
+    times = [toEventTime(datetime(2023, month, 15)) for month in range(1, MAX_ATTACHED_PARTITIONS + 2)]
+    with pytest.raises(ValueError):
+        addEvents(conn, times)
+    conn.close()
+
+def test_migration_moves_main_events_into_partitions(database):
+    with sqlite3.connect(database) as conn:
+        conn.executemany('INSERT INTO events (id, eventTypeID, time, inputID) VALUES (?, 1, ?, 1)',
+                         [(1, JANUARY), (2, FEBRUARY), (3, MARCH)])
+        conn.execute('UPDATE eventIDs SET nextID = 4')
+    conn.close()
+    migrateToPartitions(database)
+
+    conn = sqlite3.connect(database)
+    assert conn.execute('SELECT COUNT(*) FROM main.events').fetchone()[0] == 0
+    assert sorted(queryEvents(conn, 'SELECT id, time FROM {events}')) == [(1, JANUARY), (2, FEBRUARY), (3, MARCH)]
+    assert getPartitionMonths(getPartitionDirectory(database)) == ['2024-01', '2024-02', '2024-03']
+    conn.close()
+
+# Returns the month monthsAgo months before the current one
+def getMonthsAgo(monthsAgo):
+    now = datetime.now()
+    monthIndex = now.year * 12 + now.month - 1 - monthsAgo
+    return f'{monthIndex // 12:04d}-{monthIndex % 12 + 1:02d}'
+
+def test_retention_deletes_months_before_the_kept_ones(tmp_path):
+    directory = str(tmp_path / 'InputDB-events')
+    tmp_path.joinpath('InputDB-events').mkdir()
+    for monthsAgo in range(5):
+        createPartition(getPartitionPath(directory, getMonthsAgo(monthsAgo)))
+    assert deleteOldPartitions(directory, 3) == 0
+    assert getPartitionMonths(directory) == [getMonthsAgo(2), getMonthsAgo(1), getMonthsAgo(0)]
+
+# A partition that is still open somewhere on Windows can not be deleted, and is deleted on a later call
+def test_retention_retries_partitions_that_could_not_be_deleted(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'InputDB-events')
+    tmp_path.joinpath('InputDB-events').mkdir()
+    for monthsAgo in range(4):
+        createPartition(getPartitionPath(directory, getMonthsAgo(monthsAgo)))
+    openPath = getPartitionPath(directory, getMonthsAgo(3))
+    remove = EventPartitions.os.remove
+
+    def removeUnlessOpen(path):
+        if path == openPath:
+            raise PermissionError(f"The process cannot access the file: {path}")
+        remove(path)
+
+    monkeypatch.setattr(EventPartitions.os, 'remove', removeUnlessOpen)
+    assert deleteOldPartitions(directory, 1) == 1
+    assert getPartitionMonths(directory) == [getMonthsAgo(3), getMonthsAgo(0)]
+    monkeypatch.undo()
+    assert deleteOldPartitions(directory, 1) == 0
+    assert getPartitionMonths(directory) == [getMonthsAgo(0)]
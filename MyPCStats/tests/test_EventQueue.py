@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from EventQueue import EventQueue, EVENT, MOUSE_MOVE
+
+# Returns a full queue of two events with the given policy, and the list its spilled items go to
+def makeFullQueue(policy):
+    spilled = []
+    queue = EventQueue(2, policy, lambda kind, item: spilled.append((kind, item)))
+    queue.put(EVENT, 'a')
+    queue.put(MOUSE_MOVE, (1, 1))
+    return queue, spilled
+
+def test_items_come_out_in_order():
+    queue, _ = makeFullQueue('drop')
+    assert queue.getDepth() == 2
+    assert queue.takeBatch() == [(EVENT, 'a'), (MOUSE_MOVE, (1, 1))]
+    assert queue.getDepth() == 0
+
+@pytest.mark.parametrize('policy', ['drop', 'collapse', 'spill'])
+def test_items_fit_until_full(policy):
+    queue, spilled = makeFullQueue(policy)
+    assert spilled == []
+    assert all(queue.takeOverflowCount(name) == 0 for name in ('dropped', 'collapsed', 'spilled'))
+
+def test_drop_counts_dropped_items():
+    queue, spilled = makeFullQueue('drop')
+    queue.put(EVENT, 'b')
+    queue.put(MOUSE_MOVE, (2, 2))
+    assert queue.takeBatch() == [(EVENT, 'a'), (MOUSE_MOVE, (1, 1))]
+    assert queue.takeOverflowCount('dropped') == 2
+    assert queue.takeOverflowCount('dropped') == 0
+    assert spilled == []
+
+def test_collapse_keeps_newest_mouse_move_and_drops_events():
+    queue, spilled = makeFullQueue('collapse')
+    queue.put(MOUSE_MOVE, (2, 2))
+    queue.put(MOUSE_MOVE, (3, 3))
+    queue.put(EVENT, 'b')
+    assert queue.takeBatch() == [(EVENT, 'a'), (MOUSE_MOVE, (1, 1)), (MOUSE_MOVE, (3, 3))]
+    assert queue.takeOverflowCount('collapsed') == 2
+    assert queue.takeOverflowCount('dropped') == 1
+    assert spilled == []
+
+def test_spill_hands_events_to_the_caller_and_collapses_mouse_moves():
+    queue, spilled = makeFullQueue('spill')
+    queue.put(EVENT, 'b')
+    queue.put(MOUSE_MOVE, (2, 2))
+    assert spilled == [(EVENT, 'b')]
+    assert queue.takeBatch() == [(EVENT, 'a'), (MOUSE_MOVE, (1, 1)), (MOUSE_MOVE, (2, 2))]
+    assert queue.takeOverflowCount('spilled') == 1
+    assert queue.takeOverflowCount('collapsed') == 1
+    assert queue.takeOverflowCount('dropped') == 0
+
+# A batch of only the collapsed mouse move is still taken when the queue itself is empty
+def test_collapsed_move_is_taken_alone():
+    queue = EventQueue(0, 'collapse', None)
+    queue.put(MOUSE_MOVE, (2, 2))
+    assert queue.getDepth() == 0
+    assert queue.takeBatch() == [(MOUSE_MOVE, (2, 2))]
+
+def test_high_water_resets_to_current_depth():
+    queue, _ = makeFullQueue('drop')
+    queue.takeBatch()
+    queue.put(EVENT, 'b')
+    assert queue.takeHighWater() == 2
+    assert queue.takeHighWater() == 1
+
+def test_take_batch_waits_for_items():
+    queue = EventQueue(10, 'drop', None)
+    batches = []
+    writer = threading.Thread(target=lambda: batches.append(queue.takeBatch()))
+    writer.start()
+    queue.put(EVENT, 'a')
+    writer.join(timeout=5)
+    assert batches == [[(EVENT, 'a')]]
@@ -0,0 +1,77 @@
+from datetime import datetime
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from KeyTransitions import SIZE, KEY_INDEX, KEY_FINGERS, ALL_KEYS, KeyTransitionCounter
+from KeyTransitionReader import getKeyTransitions, getTopSequences, getLayoutStats
+from StatsDatabase import createTables, toEventTime
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    createTables(conn.cursor())
+    yield conn
+    conn.close()
+
+# Returns a random daily snapshot as a blob and as a SIZE x SIZE array
+def makeSnapshot(seed, size=SIZE):
+    counts = np.random.default_rng(seed).integers(0, 50, size=(size, size)).astype(np.uint32)
+    counts[counts < 40] = 0
+    return counts.tobytes(), counts.astype(np.int64)
+
+def test_days_in_range_are_summed(conn):
+    expected = np.zeros((SIZE, SIZE), dtype=np.int64)
+    for day in range(1, 6):
+        blob, counts = makeSnapshot(day)
+        conn.execute('INSERT INTO keyTransitions (day, counts) VALUES (?, ?)', (f'2024-03-{day:02d}', blob))
+        if 2 <= day <= 4:
+            expected += counts
+    assert np.array_equal(getKeyTransitions(conn, '2024-03-02', '2024-03-04'), expected)
+    assert not getKeyTransitions(conn, '2024-04-01', '2024-04-30').any()
+
+# Snapshots saved before keys were appended to ALL_KEYS are smaller, and fill the top left corner
+def test_older_smaller_snapshots_are_added(conn):
+    oldBlob, oldCounts = makeSnapshot(1, SIZE - 5)
+    blob, counts = makeSnapshot(2)
+    conn.executemany('INSERT INTO keyTransitions (day, counts) VALUES (?, ?)', [('2024-03-01', oldBlob), ('2024-03-02', blob)])
+    expected = counts.copy()
+    expected[:SIZE - 5, :SIZE - 5] += oldCounts
+    assert np.array_equal(getKeyTransitions(conn, '2024-03-01', '2024-03-02'), expected)
+
+def test_counter_snapshots_are_read_back(conn):
+    counter = KeyTransitionCounter()
+    start = toEventTime(datetime(2024, 3, 5, 12))
+    for index, key in enumerate('abab'):
+        counter.addKey(key, start + index * 100)
+    counter.flush(conn)
+    matrix = getKeyTransitions(conn, '2024-03-05', '2024-03-05')
+    assert matrix[KEY_INDEX['a'], KEY_INDEX['b']] == 2
+    assert matrix[KEY_INDEX['b'], KEY_INDEX['a']] == 1
+    assert matrix.sum() == 3
+
+def test_top_sequences_are_most_common_first():
+    matrix = np.zeros((SIZE, SIZE), dtype=np.int64)
+    matrix[KEY_INDEX['t'], KEY_INDEX['h']] = 30
+    matrix[KEY_INDEX['h'], KEY_INDEX['e']] = 20
+    matrix[KEY_INDEX['e'], KEY_INDEX['r']] = 5
+    assert getTopSequences(matrix, 2) == [('t', 'h', 30), ('h', 'e', 20)]
+    assert getTopSequences(matrix, 10) == [('t', 'h', 30), ('h', 'e', 20), ('e', 'r', 5)]
+    assert getTopSequences(np.zeros((SIZE, SIZE), dtype=np.int64), 10) == []
+
+def test_layout_stats_match_a_count_of_every_sequence():
+    _, matrix = makeSnapshot(7)
+    total = alternating = sameFinger = 0
+    for fromKey in ALL_KEYS:
+        for toKey in ALL_KEYS:
+            count = matrix[KEY_INDEX[fromKey], KEY_INDEX[toKey]]
+            if fromKey not in KEY_FINGERS or toKey not in KEY_FINGERS:
+                continue
+            total += count
+            if (KEY_FINGERS[fromKey] < 4) != (KEY_FINGERS[toKey] < 4):
+                alternating += count
+            elif KEY_FINGERS[fromKey] == KEY_FINGERS[toKey] and fromKey != toKey:
+                sameFinger += count
+    assert getLayoutStats(matrix) == pytest.approx((alternating / total * 100, sameFinger / total * 100))
+    assert getLayoutStats(np.zeros((SIZE, SIZE), dtype=np.int64)) == (0, 0)
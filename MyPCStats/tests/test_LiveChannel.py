@@ -0,0 +1,61 @@
+import threading
+import time
+import sys
+
+import pytest
+
+import LiveChannel
+from LiveChannel import LivePublisher, LiveSubscriber
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='the test channel is a Unix socket')
+
+# Starts a publisher and a subscriber in a folder, and returns the publisher and the messages received
+def startChannel(directory, getSnapshot):
+    publisher = LivePublisher(directory, getSnapshot)
+    publisher.start()
+    messages = []
+    received = threading.Condition()
+
+    def onMessage(message):
+        with received:
+            messages.append(message)
+            received.notify_all()
+
+    LiveSubscriber(directory, onMessage, lambda connected: None, retryInterval=0.05).start()
+    return publisher, messages, received
+
+# Waits until count messages have come, and returns them
+def waitForMessages(messages, received, count):
+    with received:
+        assert received.wait_for(lambda: len(messages) >= count, timeout=5)
+        return list(messages)
+
+def test_new_dashboard_gets_the_snapshot_then_changes(tmp_path):
+    publisher, messages, received = startChannel(str(tmp_path), lambda: ({'a': 3}, {'a': 0.5}))
+    first, = waitForMessages(messages, received, 1)
+    assert first == {'totals': {'a': 3}, 'longest': {'a': 0.5}, 'clicks': 0, 'keys': 0, 'stats': {}}
+
+    publisher.updateTotal('a', 4)
+    publisher.countKey()
+    publisher.countClick()
+    publisher.updateStat('wpm', 60)
+    _, second = waitForMessages(messages, received, 2)
+    assert second == {'totals': {'a': 4}, 'longest': {}, 'clicks': 1, 'keys': 1, 'stats': {'wpm': 60}}
+
+# Changes made while the snapshot is being taken are not pushed before the dashboard is a client
+def test_changes_during_the_snapshot_reach_the_new_dashboard(tmp_path, monkeypatch):
+    monkeypatch.setattr(LiveChannel, 'PUBLISH_INTERVAL', 0.01)
+
+    def getSnapshot():
+        publisher.countKey()
+        publisher.updateTotal('a', 4)
+
+        # Gives the publish loop time to push the batch
+        time.sleep(0.3)
+        return {'a': 3}, {}
+
+    publisher, messages, received = startChannel(str(tmp_path), getSnapshot)
+    first, second = waitForMessages(messages, received, 2)
+    assert first['totals'] == {'a': 3}
+    assert second['totals'] == {'a': 4}
+    assert second['keys'] == 1
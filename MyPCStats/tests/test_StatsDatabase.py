@@ -0,0 +1,104 @@
+from datetime import datetime
+import sqlite3
+
+from InputNames import COUNTER_NAMES
+from StatsDatabase import setupDatabase, toEventTime, SCHEMA_VERSION
+
+# Returns the rows of the eventIDs table
+def getEventIDRows(database):
+    with sqlite3.connect(database) as conn:
+        return conn.execute('SELECT nextID FROM eventIDs').fetchall()
+
+def test_setup_twice_keeps_one_event_id_row(tmp_path):
+    database = str(tmp_path / 'stats.db')
+    setupDatabase(database)
+    setupDatabase(database)
+    assert getEventIDRows(database) == [(1,)]
+
+# Databases seeded by the broken guard have one row per startup, all kept at the same nextID
+def test_setup_removes_duplicate_event_id_rows(tmp_path):
+    database = str(tmp_path / 'stats.db')
+    setupDatabase(database)
+    with sqlite3.connect(database) as conn:
+        conn.executemany('INSERT INTO eventIDs (nextID) VALUES (?)', [(1,), (1,)])
+        conn.execute('UPDATE eventIDs SET nextID = 42')
+    setupDatabase(database)
+    assert getEventIDRows(database) == [(42,)]
+
+# Creates a database with the original layout: TEXT input names and local DATETIME timestamps
+def createOriginalDatabase(database, events, totalCounts=(), longestDurations=()):
+    with sqlite3.connect(database) as conn:
+        conn.execute('''
+        CREATE TABLE events (
+            id INTEGER PRIMARY KEY,
+            eventTypeID INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            key TEXT,
+            button TEXT,
+            positionX INTEGER,
+            positionY INTEGER,
+            duration REAL
+        )
+        ''')
+        conn.execute('CREATE TABLE totalCounts (id INTEGER PRIMARY KEY, inputName TEXT UNIQUE NOT NULL, totalCount INTEGER DEFAULT 0)')
+        conn.execute('CREATE TABLE lifetimeLongestDurations (id INTEGER PRIMARY KEY, inputName TEXT UNIQUE NOT NULL, duration REAL DEFAULT 0)')
+        conn.executemany('''
+        INSERT INTO events (id, eventTypeID, timestamp, key, button, positionX, positionY, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', events)
+        conn.executemany('INSERT INTO totalCounts (inputName, totalCount) VALUES (?, ?)', totalCounts)
+        conn.executemany('INSERT INTO lifetimeLongestDurations (inputName, duration) VALUES (?, ?)', longestDurations)
+    conn.close()
+
+def test_migration_moves_next_event_id_past_migrated_events(tmp_path):
+    database = str(tmp_path / 'stats.db')
+    createOriginalDatabase(database, [(5, 1, '2024-03-05 12:00:00', 'a', None, None, None, None)])
+    setupDatabase(database)
+    assert getEventIDRows(database) == [(6,)]
+
+def test_migration_keeps_events_with_input_ids_and_ms_times(tmp_path):
+    database = str(tmp_path / 'stats.db')
+    createOriginalDatabase(database, [
+        (3, 1, '2024-03-05 12:00:00', 'a', None, None, None, None),
+        (4, 3, '2024-03-05 12:00:01', None, 'mouseleft', 640, 480, None),
+        (9, 2, '2024-03-05 12:00:02', 'f13', None, None, None, 0.5),
+    ], [('a', 10), ('mousedistance', 2.5), ('media_play', 4)], [('a', 1.5)])
+    setupDatabase(database)
+
+    with sqlite3.connect(database) as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+        inputIDs = dict(conn.execute('SELECT name, id FROM inputs').fetchall())
+        events = conn.execute('SELECT id, eventTypeID, time, inputID, positionX, positionY, duration FROM events ORDER BY id').fetchall()
+        totals = dict(conn.execute('SELECT inputID, totalCount FROM totalCounts').fetchall())
+        durations = dict(conn.execute('SELECT inputID, duration FROM lifetimeLongestDurations').fetchall())
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+
+    # Known inputs have the same ids in every database, unknown ones come after them
+    assert [inputIDs[name] for name in COUNTER_NAMES] == list(range(1, len(COUNTER_NAMES) + 1))
+    assert sorted((inputIDs['f13'], inputIDs['media_play'])) == [len(COUNTER_NAMES) + 1, len(COUNTER_NAMES) + 2]
+
+    noon = toEventTime(datetime(2024, 3, 5, 12))
+    assert events == [
+        (3, 1, noon, inputIDs['a'], None, None, None),
+        (4, 3, noon + 1000, inputIDs['mouseleft'], 640, 480, None),
+        (9, 2, noon + 2000, inputIDs['f13'], None, None, 0.5),
+    ]
+    assert totals[inputIDs['a']] == 10
+    assert totals[inputIDs['mousedistance']] == 2.5
+    assert totals[inputIDs['media_play']] == 4
+    assert totals[inputIDs['b']] == 0
+    assert durations[inputIDs['a']] == 1.5
+    assert not tables & {'eventsText', 'totalCountsText', 'lifetimeLongestDurationsText'}
+    assert getEventIDRows(database) == [(10,)]
+
+def test_setup_does_not_migrate_current_layout_again(tmp_path):
+    database = str(tmp_path / 'stats.db')
+    createOriginalDatabase(database, [(1, 1, '2024-03-05 12:00:00', 'a', None, None, None, None)])
+    setupDatabase(database)
+    with sqlite3.connect(database) as conn:
+        before = conn.execute('SELECT * FROM events').fetchall()
+    conn.close()
+    setupDatabase(database)
+    with sqlite3.connect(database) as conn:
+        assert conn.execute('SELECT * FROM events').fetchall() == before
+    conn.close()